@@ -1,18 +1,21 @@
 import os
 import asyncio
-import shutil
-import hashlib
 import json
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, UploadFile, File, Form, Request
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
 from main import process_pdf, process_pdf_stream
+from src.ingest import ingest_form
+from src.page_cache import PageCache
+from src.llm_cache import get_llm_cache
+from src.singleflight import SingleFlight
+from src.coordination import make_coordinator, Lease
+from src.metrics import REGISTRY
 from upstash_redis.asyncio import Redis
-from src.config import UPSTASH_REDIS_REST_URL, UPSTASH_REDIS_REST_TOKEN
+from src.config import UPSTASH_REDIS_REST_URL, UPSTASH_REDIS_REST_TOKEN, PAGE_CACHE
+from src.config import DOCUMENT_LEASE_WAIT, GENERATE_RATE_LIMIT, GENERATE_RATE_WINDOW, METRICS
 
 # Initialize Redis client (Fail gracefully if keys are missing)
 redis_client = None
@@ -23,10 +26,21 @@ if UPSTASH_REDIS_REST_URL and UPSTASH_REDIS_REST_TOKEN:
     except Exception as e:
         print(f"⚠️ Failed to connect to Redis: {e}")
 else:
-    print("⚠️ Redis credentials not found. Caching will be disabled.")
+    print("⚠️ Redis credentials not found. Only the in-process page cache is available.")
 
-# Initialize Rate Limiter using client IP
-limiter = Limiter(key_func=get_remote_address)
+# Per-page results, keyed by page content: revised handouts only pay for the pages that changed
+page_cache = PageCache(redis_client) if PAGE_CACHE else None
+
+# LLM responses: identical boilerplate pages across different handouts hit the model once
+llm_cache = get_llm_cache()
+if llm_cache:
+    llm_cache.redis = redis_client
+
+# Concurrent uploads of the same PDF (and date format) share one pipeline run
+in_flight = SingleFlight()
+
+# Document leases and rate-limit counters shared by every worker (Redis, or a local SQLite file)
+coordinator = make_coordinator(redis_client)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -35,8 +49,6 @@ async def lifespan(app: FastAPI):
     yield
 
 app = FastAPI(title="Handout to Calendar API", lifespan=lifespan)
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
 # Secure CORS Policy: Only allow the Next.js frontend to talk to this API
 app.add_middleware(
@@ -53,55 +65,80 @@ app.add_middleware(
 UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+async def rate_limit_exceeded(request: Request):
+    """Per-client-IP limit on /generate, counted across all workers. Exempt in development."""
+    if os.getenv("ENVIRONMENT") == "development":
+        return False
+    try:
+        allowed = await coordinator.hit(f"ratelimit:generate:{get_remote_address(request)}", GENERATE_RATE_LIMIT, GENERATE_RATE_WINDOW)
+    except Exception as e:
+        print(f"⚠️ Rate limit counter error: {e}")
+        return False
+    return not allowed
+
+async def read_cached_result(pdf_hash):
+    """The whole-PDF result cached in Redis, or None."""
+    if not redis_client:
+        return None
+    try:
+        cached_data = await redis_client.get(pdf_hash)
+        # Upstash Redis client might return a string or dict. 
+        if isinstance(cached_data, str):
+            cached_data = json.loads(cached_data)
+        return cached_data or None
+    except Exception as e:
+        print(f"⚠️ Redis read error: {e}")
+        return None
+
+async def cached_events(cached_data):
+    yield json.dumps({"type": "init", "total_pages": 1}) + "\n"
+    yield json.dumps({"type": "progress", "message": "Cache Hit! Instantly loaded."}) + "\n"
+    yield json.dumps({"type": "done", "data": cached_data}) + "\n"
+
+@app.get("/metrics")
+async def metrics():
+    """Per-node and per-model counters, latencies, tokens and cost in the Prometheus text format."""
+    if not METRICS:
+        return JSONResponse(status_code=404, content={"detail": "Not Found"})
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 @app.post("/generate")
-@limiter.limit("3000/day", exempt_when=lambda: os.getenv("ENVIRONMENT") == "development")
-async def generate_schedule(
-    request: Request,
-    file: UploadFile = File(...),
-    date_format: str = Form("DMY"),
-    force_refresh: bool = Form(False)
-):
-    if not file.filename.endswith(".pdf"):
+async def generate_schedule(request: Request):
+    if await rate_limit_exceeded(request):
+        return JSONResponse(status_code=429, content={"error": f"Rate limit exceeded: {GENERATE_RATE_LIMIT} per {GENERATE_RATE_WINDOW} seconds."})
+
+    # The form (file, date_format, force_refresh) is parsed here as the body arrives, hashing the
+    # PDF (SHA-256, for caching) off the event loop chunk by chunk. Small PDFs stay in memory and
+    # go straight to PyMuPDF; big ones spill to a unique temp file (see src/ingest.py).
+    try:
+        upload, form = await ingest_form(request, spill_dir=UPLOAD_DIR)
+    except ValueError as e:
+        return JSONResponse(status_code=422, content={"error": f"Invalid upload: {e}"})
+    if upload is None:
+        return JSONResponse(status_code=422, content={"error": "No file provided."})
+    filename = upload.filename
+    if not filename.endswith(".pdf"):
+        upload.cleanup()
         return JSONResponse(status_code=400, content={"error": "File must be a PDF."})
+    date_format = form.get("date_format", "DMY")
+    force_refresh = form.get("force_refresh", "false").strip().lower() in ("true", "1", "yes", "on")
 
-    # Generate SHA-256 hash for future caching
-    file_content = await file.read()
-    pdf_hash = hashlib.sha256(file_content).hexdigest()
-    print(f"🔑 [CACHE] Generated Hash for {file.filename}: {pdf_hash}")
-    
-    # Reset file cursor so the file can be saved to disk correctly
-    await file.seek(0)
+    pdf_hash = upload.sha256
+    print(f"🔑 [CACHE] Generated Hash for {filename}: {pdf_hash}")
     
     # ---------------- CACHE READ LOGIC ----------------
-    if redis_client and not force_refresh:
-        try:
-            cached_data = await redis_client.get(pdf_hash)
-            if cached_data:
-                print(f"🎯 [CACHE HIT] Found {file.filename} in cache! Bypassing AI.")
-                
-                # Upstash Redis client might return a string or dict. 
-                if isinstance(cached_data, str):
-                    cached_data = json.loads(cached_data)
-
-                # Return a StreamingResponse that instantly streams the cached JSON
-                async def cached_generator():
-                    yield json.dumps({"type": "init", "total_pages": 1}) + "\n"
-                    yield json.dumps({"type": "progress", "message": "Cache Hit! Instantly loaded."}) + "\n"
-                    yield json.dumps({"type": "done", "data": cached_data}) + "\n"
-                
-                return StreamingResponse(cached_generator(), media_type="application/x-ndjson")
-        except Exception as e:
-            print(f"⚠️ Redis read error: {e}")
+    cached_data = None if force_refresh else await read_cached_result(pdf_hash)
+    if cached_data:
+        print(f"🎯 [CACHE HIT] Found {filename} in cache! Bypassing AI.")
+        # Return a StreamingResponse that instantly streams the cached JSON
+        upload.cleanup()
+        return StreamingResponse(cached_events(cached_data), media_type="application/x-ndjson")
     # ---------------------------------------------------
 
-    # Save uploaded file temporarily
-    temp_file_path = os.path.join(UPLOAD_DIR, file.filename)
-    with open(temp_file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-
     async def event_generator():
         try:
-            async for chunk in process_pdf_stream(temp_file_path, date_format):
+            async for chunk in process_pdf_stream(upload.source, date_format, filename=filename,
+                                                 page_cache=None if force_refresh else page_cache, source_hash=pdf_hash):
                 yield chunk
                 # ---------------- CACHE WRITE LOGIC ----------------
                 try:
@@ -118,21 +155,58 @@ async def generate_schedule(
                             
                             if not is_empty:
                                 await redis_client.set(pdf_hash, json.dumps(final_data))
-                                print(f"💾 [CACHE WRITE] Saved {file.filename} to Redis!")
+                                print(f"💾 [CACHE WRITE] Saved {filename} to Redis!")
                             else:
-                                print(f"⚠️ [CACHE SKIP] {file.filename} returned empty data. Not caching to allow future retries.")
+                                print(f"⚠️ [CACHE SKIP] {filename} returned empty data. Not caching to allow future retries.")
                 except Exception as cache_err:
                     print(f"⚠️ Redis write error: {cache_err}")
                 # ----------------------------------------------------
+        finally:
+            # Release the upload buffer / spill file to prevent memory and disk bloat
+            upload.cleanup()
+
+    # ---------------- SINGLE-FLIGHT ----------------
+    # The pipeline runs in a background task owned by the flight, so a client that
+    # disconnects doesn't cut the stream off for the others that attached to it.
+    flight_key = f"{pdf_hash}:{date_format}:{'refresh' if force_refresh else 'cached'}"
+
+    async def coordinated_generator():
+        # Across workers: whoever holds the document lease runs the pipeline; the others
+        # wait for it and then serve its cached result (or run it themselves if it failed)
+        lease = Lease(coordinator, f"lease:{flight_key}")
+        try:
+            if not await lease.try_acquire():
+                print(f"🔒 [COORDINATION] {filename} is being processed by another worker. Waiting for it.")
+                yield json.dumps({"type": "progress", "message": "This handout is already being processed. Waiting for the result..."}) + "\n"
+                await lease.wait(DOCUMENT_LEASE_WAIT)
+                cached_data = None if force_refresh else await read_cached_result(pdf_hash)
+                if cached_data:
+                    async for chunk in cached_events(cached_data):
+                        yield chunk
+                    return
+            async for chunk in event_generator():
+                yield chunk
+        finally:
+            await lease.release()
+
+    flight, started = in_flight.join(flight_key, coordinated_generator)
+    if started:
+        # Also covers a flight cancelled before the pipeline ever started
+        flight.task.add_done_callback(lambda _: upload.cleanup())
+    else:
+        upload.cleanup()
+        print(f"🔗 [SINGLE-FLIGHT] {filename} is already being processed. Attaching to the running pipeline.")
+
+    async def subscriber():
+        try:
+            async for chunk in flight.subscribe():
+                yield chunk
         except asyncio.CancelledError:
             # Client disconnected mid-stream
             pass
-        finally:
-            # Clean up temporary file to prevent disk bloat
-            if os.path.exists(temp_file_path):
-                os.remove(temp_file_path)
+    # -----------------------------------------------
 
-    return StreamingResponse(event_generator(), media_type="application/x-ndjson")
+    return StreamingResponse(subscriber(), media_type="application/x-ndjson")
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,76 @@
+"""
+Hedged request benchmark.
+
+Runs the reference vision extractor against a fake model with a long latency
+tail (most calls are fast, a few stall) with hedging off and on, and reports
+p50/p95/p99 of what the node waited plus the extra model calls hedging cost.
+Latencies are scaled down (milliseconds instead of seconds) so it runs quickly.
+
+Usage (from backend/):
+    python benchmarks/bench_hedging.py [calls] [percentile]
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Importing src compiles the graph; benchmarks never call the provider.
+os.environ.setdefault("AICREDITS_API_KEY", "offline-benchmark-key")
+os.environ.setdefault("LLM_CACHE", "false")
+
+import src.graph as graph
+import src.hedging as hedging
+from src.render import PageImage
+
+CONCURRENCY = 4
+
+class LongTailVisionLLM:
+    """95% of calls take 40-80 ms, 5% stall for 400-800 ms."""
+
+    def __init__(self, seed=7):
+        self.random = random.Random(seed)
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        slow = self.random.random() < 0.05
+        await asyncio.sleep(self.random.uniform(0.4, 0.8) if slow else self.random.uniform(0.04, 0.08))
+        return AIMessage(content=json.dumps({"items": [{"title": "Digital Design", "author": "Mano"}]}))
+
+async def run_calls(calls):
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await graph.vision_reference_extractor_node({"page_image_b64": PageImage(b"\x89PNG fake").b64})
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return latencies
+
+def measure(calls, enabled, pct):
+    hedging._latencies.clear()
+    fake = LongTailVisionLLM()
+    with patch.object(graph, "vision_llm", fake), patch.object(graph, "HEDGING", enabled), \
+            patch.object(hedging, "HEDGE_PERCENTILE", pct), \
+            open(os.devnull, "w") as devnull, patch.object(sys, "stdout", devnull):
+        latencies = asyncio.run(run_calls(calls))
+    return latencies, fake.calls
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    pct = float(sys.argv[2]) if len(sys.argv) > 2 else 95
+    print(f"🚀 Hedging benchmark: {calls} calls, hedge after p{pct:g}, {CONCURRENCY} in flight\n")
+    for label, enabled in (("off", False), ("on", True)):
+        latencies, model_calls = measure(calls, enabled, pct)
+        p = {q: hedging.percentile(latencies, q) * 1000 for q in (50, 95, 99)}
+        print(f"hedging {label:>3}: p50 {p[50]:6.1f} ms   p95 {p[95]:6.1f} ms   p99 {p[99]:6.1f} ms   "
+              f"model calls {model_calls} ({model_calls - calls:+d})")
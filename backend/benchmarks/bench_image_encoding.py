@@ -0,0 +1,73 @@
+"""
+Vision payload benchmark.
+
+Encodes a synthetic handout (text pages, an evaluation table page and a scanned
+page) with every VISION_IMAGE_FORMAT and a few byte budgets, then reports the
+payload actually sent to the vision model (base64 data URLs) per handout, the
+encode time, and the estimated upload time at a few uplink speeds.
+
+Usage (from backend/):
+    python benchmarks/bench_image_encoding.py [dpi]
+"""
+import os
+import sys
+import time
+import base64
+
+import fitz # PyMuPDF
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Importing src compiles the graph; benchmarks never call the provider.
+os.environ.setdefault("AICREDITS_API_KEY", "offline-benchmark-key")
+
+from src.encode import encode_page, resolve_format
+
+UPLINKS_MBPS = (2, 10, 50)
+BUDGETS = (0, 60_000, 25_000)
+FORMATS = ("png", "gray", "palette", "jpeg", "webp")
+
+def make_handout():
+    doc = fitz.open()
+    for n in range(3):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(72, 72, 520, 760), ("Course description and policies. " * 60), fontsize=10)
+    table = doc.new_page()
+    table.insert_text((72, 72), "EVALUATION SCHEME", fontsize=16)
+    for row in range(14):
+        y = 110 + row * 26
+        table.draw_rect(fitz.Rect(72, y, 520, y + 26), color=(0, 0, 0), fill=(0.95, 0.95 - row * 0.03, 0.85))
+        table.insert_text((80, y + 17), f"Quiz {row + 1}   {row + 1:02d}/09/2025   4-5 PM   CB   5%", fontsize=10)
+    scan = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 1240, 1754), False)
+    scan.set_rect(scan.irect, (238, 236, 230))
+    for y in range(120, 1700, 36):
+        scan.set_rect(fitz.IRect(140, y, 1100 - (y % 300), y + 14), (40, 40, 55))
+    doc.new_page().insert_image(fitz.Rect(0, 0, 595, 842), pixmap=scan)
+    return doc
+
+def run_benchmark(dpi=81):
+    doc = make_handout()
+    print(f"🚀 Vision payload benchmark: {len(doc)}-page handout @ {dpi} DPI\n")
+    header = f"{'format':>14} {'budget':>8} {'payload':>10} {'encode':>8}  " + "  ".join(f"{m:>3} Mbps" for m in UPLINKS_MBPS)
+    print(header)
+    print("-" * len(header))
+
+    seen = set()
+    for fmt in FORMATS:
+        resolved = resolve_format(fmt)
+        for budget in BUDGETS:
+            if (resolved, budget) in seen:
+                continue
+            seen.add((resolved, budget))
+            start = time.perf_counter()
+            payload = 0
+            for page in doc:
+                img_bytes, mime = encode_page(page, dpi, fmt=fmt, max_bytes=budget)
+                payload += len(f"data:{mime};base64,") + len(base64.b64encode(img_bytes))
+            encode_time = time.perf_counter() - start
+            uploads = "  ".join(f"{payload * 8 / (m * 1_000_000):7.2f}s" for m in UPLINKS_MBPS)
+            label = fmt if resolved == fmt else f"{fmt}->{resolved}"
+            print(f"{label:>14} {budget or '-':>8} {payload / 1024:8.1f}KB {encode_time:7.2f}s  {uploads}")
+    doc.close()
+
+if __name__ == "__main__":
+    run_benchmark(*[int(a) for a in sys.argv[1:2]])
@@ -0,0 +1,86 @@
+"""
+Peak memory of the vision fan-out, per concurrent upload.
+
+Compares the old message building (the page image kept as a base64 string in
+State, and every vision node formatting its own f"data:image/png;base64,..."
+URL) against the shared PageImage (bytes held once, data URL and content part
+built once). Messages are held while the simulated requests are in flight,
+exactly as the vision nodes hold them while awaiting the provider.
+
+Usage (from backend/):
+    python benchmarks/bench_image_memory.py [pages_per_upload] [vision_nodes_per_page]
+"""
+import os
+import sys
+import asyncio
+import base64
+import tracemalloc
+
+import fitz # PyMuPDF
+from langchain_core.messages import HumanMessage
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Importing src compiles the graph; benchmarks never call the provider.
+os.environ.setdefault("AICREDITS_API_KEY", "offline-benchmark-key")
+
+from src.render import PageImage
+
+PROMPT = "Extract Exam Dates, Times, Format, and Weightage from the provided image."
+
+def render_handout_pngs(pages):
+    # Low-amplitude sensor noise compresses poorly, like a real colour scan (~1MB PNG per page)
+    width, height = 660, 935
+    samples = os.urandom(width * height * 3).translate(bytes(200 + (i & 0x1F) for i in range(256)))
+    noise = fitz.Pixmap(fitz.csRGB, width, height, samples, False)
+    doc = fitz.open()
+    for _ in range(pages):
+        doc.new_page(width=595, height=842).insert_image(fitz.Rect(0, 0, 595, 842), pixmap=noise)
+    pngs = [page.get_pixmap(dpi=81).tobytes("png") for page in doc]
+    doc.close()
+    return pngs
+
+async def in_flight(message):
+    await asyncio.sleep(0.05) # the request is "on the wire"; the message stays alive
+    return message
+
+async def legacy_upload(pngs, nodes):
+    states = [{"page_image_b64": base64.b64encode(png).decode("utf-8")} for png in pngs]
+    requests = []
+    for state in states:
+        for _ in range(nodes):
+            image_b64 = state["page_image_b64"]
+            requests.append(in_flight(HumanMessage(content=[
+                {"type": "text", "text": PROMPT},
+                {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{image_b64}"}},
+            ])))
+    await asyncio.gather(*requests)
+
+async def shared_upload(pngs, nodes):
+    images = [PageImage(png, "image/png") for png in pngs]
+    requests = []
+    for image in images:
+        for _ in range(nodes):
+            requests.append(in_flight(HumanMessage(content=[{"type": "text", "text": PROMPT}, image.content_part])))
+    await asyncio.gather(*requests)
+
+def peak_mb(upload, pngs, nodes, uploads):
+    async def run():
+        await asyncio.gather(*[upload(pngs, nodes) for _ in range(uploads)])
+    tracemalloc.start()
+    asyncio.run(run())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+def run_benchmark(pages=6, nodes=2):
+    pngs = render_handout_pngs(pages)
+    png_kb = sum(len(p) for p in pngs) / 1024
+    print(f"🚀 Fan-out memory: {pages} relevant pages/upload, {nodes} vision nodes/page, {png_kb:.0f}KB of PNG per upload\n")
+    print(f"{'uploads':>8} {'legacy':>10} {'shared':>10} {'per upload':>22}")
+    for uploads in (1, 4, 16):
+        legacy = peak_mb(legacy_upload, pngs, nodes, uploads)
+        shared = peak_mb(shared_upload, pngs, nodes, uploads)
+        print(f"{uploads:>8} {legacy:8.2f}MB {shared:8.2f}MB   {legacy / uploads:6.2f}MB -> {shared / uploads:5.2f}MB")
+
+if __name__ == "__main__":
+    run_benchmark(*[int(a) for a in sys.argv[1:3]])
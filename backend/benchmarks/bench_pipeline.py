@@ -0,0 +1,54 @@
+"""
+End-to-end pipeline benchmark on an LLM cassette.
+
+Runs process_pdf on a handout with every model call served from a cassette
+(src/cassette.py), replaying the recorded latencies, so a performance change
+can be measured on the whole pipeline without a network and with the same
+model answers every time. Record the cassette once, with the provider key set:
+
+    LLM_CASSETTE_MODE=record python benchmarks/bench_pipeline.py <handout.pdf> <cassette.json>
+
+Usage (from backend/):
+    python benchmarks/bench_pipeline.py <handout.pdf> <cassette.json> [runs]
+"""
+import os
+import sys
+import time
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+    os.environ["LLM_CASSETTE"] = sys.argv[2]
+    os.environ.setdefault("LLM_CASSETTE_MODE", "replay")
+    os.environ.setdefault("LLM_CASSETTE_LATENCY", "true")
+    # Importing src compiles the graph; replays never call the provider.
+    os.environ.setdefault("AICREDITS_API_KEY", "offline-benchmark-key")
+    # Every run should pay for its model calls, not hit the on-disk response cache
+    os.environ.setdefault("LLM_CACHE", "false")
+    os.environ.setdefault("RENDER_CACHE", "false")
+
+import main
+import src.graph as graph
+
+if __name__ == "__main__":
+    pdf_path = sys.argv[1]
+    runs = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    mode = os.environ["LLM_CASSETTE_MODE"]
+    if mode == "record":
+        runs = 1
+    print(f"🚀 Pipeline benchmark: {pdf_path}, cassette {sys.argv[2]} ({mode}), {runs} run(s)\n")
+
+    timings = []
+    for run in range(runs):
+        start = time.perf_counter()
+        title, events, syllabus, refs = asyncio.run(main.process_pdf(pdf_path))
+        timings.append(time.perf_counter() - start)
+        print(f"run {run + 1}: {timings[-1]:.2f}s, {len(events)} events, {len(refs)} references, title {title!r}")
+
+    stats = graph.cassette.stats
+    print(f"\nbest {min(timings):.2f}s, mean {sum(timings) / len(timings):.2f}s "
+          f"({stats['replayed']} replayed / {stats['recorded']} recorded model calls)")
@@ -0,0 +1,82 @@
+"""
+Local pre-router precision / recall benchmark.
+
+Runs the keyword pre-router over the labelled router cases in tests/test_router.py
+and tests/test_multi_domain.py and reports, for the pages it decides locally,
+per-category precision and recall, plus how many LLM router calls it saves.
+
+Labels are mapped onto what the graph routes today: SYLLABUS and ADMIN pages end
+the graph just like SKIP, so they count as SKIP. Case 5 of test_router.py predates
+the REFERENCES category; its textbook line makes it a REFERENCES page now.
+
+Usage (from backend/):
+    python benchmarks/bench_prerouter.py [min_confidence]
+"""
+import os
+import sys
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND)
+sys.path.append(os.path.join(BACKEND, "tests"))
+# Importing src compiles the graph; benchmarks never call the provider.
+os.environ.setdefault("AICREDITS_API_KEY", "offline-benchmark-key")
+
+from src.prerouter import preroute
+from src.config import PREROUTER_MIN_CONFIDENCE
+import test_router
+import test_multi_domain
+
+ROUTED = ("EVAL", "REFERENCES")
+RELABELLED = {"5. Irrelevant / Introductory (SKIP)": ["REFERENCES"]}
+
+def routed_labels(categories):
+    labels = sorted(set(categories) & set(ROUTED))
+    return labels or ["SKIP"]
+
+def labelled_cases():
+    cases = []
+    for case in test_router.test_cases:
+        expected = RELABELLED.get(case["name"], case["expected_in"])
+        cases.append((case["name"], case["text"], routed_labels(expected)))
+    for case in test_multi_domain.test_cases:
+        cases.append((case["desc"], case["text"], routed_labels(case["expected"])))
+    return cases
+
+def run_benchmark(min_confidence=PREROUTER_MIN_CONFIDENCE):
+    cases = labelled_cases()
+    print(f"🚀 Pre-router benchmark: {len(cases)} labelled pages, min confidence {min_confidence}\n")
+
+    counts = {label: {"tp": 0, "fp": 0, "fn": 0} for label in ROUTED + ("SKIP",)}
+    decided = correct = 0
+    start = time.perf_counter()
+    for name, text, expected in cases:
+        categories, confidence = preroute(text)
+        if confidence < min_confidence:
+            print(f"   ↪️  LLM     {name[:45]:<45} expected {expected}")
+            continue
+        decided += 1
+        correct += sorted(categories) == expected
+        mark = "✅" if sorted(categories) == expected else "❌"
+        print(f"   {mark} local   {name[:45]:<45} {categories} (expected {expected})")
+        for label in counts:
+            if label in categories and label in expected:
+                counts[label]["tp"] += 1
+            elif label in categories:
+                counts[label]["fp"] += 1
+            elif label in expected:
+                counts[label]["fn"] += 1
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{'category':>12} {'precision':>10} {'recall':>8}   (over locally decided pages)")
+    for label, c in counts.items():
+        precision = c["tp"] / (c["tp"] + c["fp"]) if c["tp"] + c["fp"] else float("nan")
+        recall = c["tp"] / (c["tp"] + c["fn"]) if c["tp"] + c["fn"] else float("nan")
+        print(f"{label:>12} {precision:10.2f} {recall:8.2f}")
+
+    print(f"\nDecided locally: {decided}/{len(cases)} pages ({correct} exactly right)")
+    print(f"LLM router calls saved: {decided} of {len(cases)} ({decided / len(cases):.0%}), "
+          f"{elapsed * 1000 / len(cases):.3f} ms per page")
+
+if __name__ == "__main__":
+    run_benchmark(float(sys.argv[1]) if len(sys.argv) > 1 else PREROUTER_MIN_CONFIDENCE)
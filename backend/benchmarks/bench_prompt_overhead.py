@@ -0,0 +1,110 @@
+"""
+Per-call prompt/parser overhead benchmark.
+
+Times router_node, extract_course_title and the reference vision extractor with
+instant fake models, so what is left is the per-call cost of building parsers,
+format instructions, prompt strings and chains around the LLM call.
+
+Two columns: "per call" rebuilds the PydanticOutputParser, get_format_instructions()
+and the `prompt | llm | parser` chain (or vision message) on every call, as the
+nodes did before the prompt registry; "registry" runs the current nodes, which
+use what src/prompts.py compiled once at import.
+
+Usage (from backend/):
+    python benchmarks/bench_prompt_overhead.py [calls]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableLambda
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Importing src compiles the graph; benchmarks never call the provider.
+os.environ.setdefault("AICREDITS_API_KEY", "offline-benchmark-key")
+# Measure the per-call work itself, not replies replayed from the on-disk response cache
+os.environ.setdefault("LLM_CACHE", "false")
+
+import src.graph as graph
+from src.prompts import TITLE_PROMPT, ROUTER_PROMPT, REFERENCES_PROMPT
+from src.render import PageImage
+from src.schema import CourseTitle, RouteDecision, ReferenceList
+
+# Ambiguous enough that the local pre-router defers to the LLM router
+ROUTER_TEXT = "Grading notice: students are expected to appear for all evaluation components. " * 3
+TITLE_TEXT = "BITS Pilani, Course Handout Part II, Course No. CS F215, Course Title: Digital Design. " * 2
+
+class FakeVisionLLM:
+    async def ainvoke(self, messages):
+        return AIMessage(content=json.dumps({"items": [{"title": "Digital Design", "author": "Mano"}]}))
+
+def fake_text_llm(prompt_value):
+    system = prompt_value.to_messages()[0].content
+    if "Main Subject" in system:
+        return json.dumps({"title": "Digital Design"})
+    return json.dumps({"categories": ["SKIP"]})
+
+async def per_call_text_node(schema, template, text):
+    """A text node as it was before the registry: parser, instructions and chain built per call."""
+    parser = PydanticOutputParser(pydantic_object=schema)
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", template),
+        ("human", "{text}"),
+    ])
+    chain = prompt | graph.llm | parser
+    return await chain.ainvoke({"text": text[:3000], "format_instructions": parser.get_format_instructions()})
+
+async def per_call_vision_node(schema, template, image_b64):
+    """A vision node as it was before the registry: parser and formatted instructions built per call."""
+    parser = PydanticOutputParser(pydantic_object=schema)
+    system_text = template.replace("{format_instructions}", parser.get_format_instructions())
+    message = HumanMessage(content=[{"type": "text", "text": system_text},
+                                    {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{image_b64}"}}])
+    response = await graph.vision_llm.ainvoke([message])
+    return parser.invoke(response)
+
+async def time_calls(make_call, calls):
+    await make_call() # warm-up
+    start = time.perf_counter()
+    for _ in range(calls):
+        await make_call()
+    return (time.perf_counter() - start) / calls * 1e6
+
+async def run_benchmark(calls):
+    image = PageImage(b"\x89PNG fake")
+    state = {"page_image_b64": "", "page": None, "raw_text": ROUTER_TEXT}
+    cases = {
+        "router_node": (
+            lambda: per_call_text_node(RouteDecision, ROUTER_PROMPT, ROUTER_TEXT),
+            lambda: graph.router_node(state),
+        ),
+        "extract_course_title": (
+            lambda: per_call_text_node(CourseTitle, TITLE_PROMPT, TITLE_TEXT),
+            lambda: graph.extract_course_title(TITLE_TEXT, local=False),
+        ),
+        "vision_reference_extractor": (
+            lambda: per_call_vision_node(ReferenceList, REFERENCES_PROMPT, image.b64),
+            lambda: graph.vision_reference_extractor_node({"page_image_b64": image.b64}),
+        ),
+    }
+    results = {}
+    # The nodes' [DEBUG] prints would dominate the measurement, so stdout is muted while timing
+    with open(os.devnull, "w") as devnull, patch.object(sys, "stdout", devnull):
+        for name, (per_call, registry) in cases.items():
+            results[name] = (await time_calls(per_call, calls), await time_calls(registry, calls))
+    return results
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    print(f"🚀 Prompt overhead benchmark: {calls} calls each, instant fake models\n")
+    with patch.object(graph, "llm", RunnableLambda(fake_text_llm)), patch.object(graph, "vision_llm", FakeVisionLLM()):
+        results = asyncio.run(run_benchmark(calls))
+    print(f"{'':>28}  {'per call':>10}  {'registry':>10}")
+    for name, (per_call, registry) in results.items():
+        print(f"{name:>28}: {per_call:7.1f} µs  {registry:7.1f} µs")
@@ -0,0 +1,54 @@
+"""
+Render cache benchmark.
+
+Renders every page of a handout twice through the lazy renderer: once with a cold
+on-disk render cache and once warm (what a retry, force_refresh request or CLI rerun
+sees). Uses the PDFs in backend/Handouts when given, otherwise a synthetic scanned handout.
+
+Usage (from backend/):
+    python benchmarks/bench_render_cache.py [handout.pdf ...]
+"""
+import os
+import sys
+import time
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Importing src compiles the graph; benchmarks never call the provider.
+os.environ.setdefault("AICREDITS_API_KEY", "offline-benchmark-key")
+
+from src.render import OpenDocument
+from src.render_cache import RenderCache
+from bench_render_pool import make_scanned_pdf
+
+def render_all(pdf_path, cache, dpi=81):
+    start = time.perf_counter()
+    document = OpenDocument(pdf_path, cache=cache)
+    try:
+        pages = len(document)
+        for index in range(pages):
+            document.render(index, dpi)
+    finally:
+        document.close()
+    return pages, time.perf_counter() - start
+
+def run_benchmark(pdf_paths):
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = RenderCache(cache_dir, max_bytes=1024 * 1024 * 1024)
+        for pdf_path in pdf_paths:
+            _, cold = render_all(pdf_path, cache)
+            pages, warm = render_all(pdf_path, cache)
+            print(f"{os.path.basename(pdf_path)[:40]:>40}: {pages:3d} pages  "
+                  f"cold {cold * 1000:8.1f} ms  warm {warm * 1000:8.1f} ms  ({cold / warm:5.1f}x)")
+        print(f"\nCache: {cache.hits} hits / {cache.misses} misses")
+
+if __name__ == "__main__":
+    paths = sys.argv[1:]
+    print("🚀 Render cache benchmark (81 DPI)\n")
+    if paths:
+        run_benchmark(paths)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            synthetic = os.path.join(tmp, "scanned.pdf")
+            make_scanned_pdf(synthetic, 12)
+            run_benchmark([synthetic])
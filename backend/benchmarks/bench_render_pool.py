@@ -0,0 +1,67 @@
+"""
+Render pool scaling benchmark.
+
+Builds a synthetic "scanned" handout (every page is a full-page raster image plus a
+text layer) and reports pages/sec for the in-process renderer and for the process
+pool at 1..N workers.
+
+Usage (from backend/):
+    python benchmarks/bench_render_pool.py [pages] [dpi]
+"""
+import os
+import sys
+import time
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz # PyMuPDF
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Importing src compiles the graph; benchmarks never call the provider.
+os.environ.setdefault("AICREDITS_API_KEY", "offline-benchmark-key")
+
+from src.render import render_pages, render_pages_in_process
+
+def make_scanned_pdf(path, pages):
+    noise = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 1240, 1754), False)
+    noise.set_rect(noise.irect, (235, 235, 235))
+    for y in range(0, 1754, 7):
+        noise.set_rect(fitz.IRect(0, y, 1240, y + 2), (40 + y % 90, 40, 60))
+    doc = fitz.open()
+    for n in range(pages):
+        page = doc.new_page(width=595, height=842)
+        page.insert_image(page.rect, pixmap=noise)
+        page.insert_text((72, 72), f"Scanned page {n + 1}", fontsize=16)
+    doc.save(path)
+    doc.close()
+
+def timed(fn):
+    start = time.perf_counter()
+    pages = fn()
+    return len(pages), time.perf_counter() - start
+
+def run_benchmark(pages=24, dpi=81):
+    cores = os.cpu_count() or 1
+    print(f"🚀 Render pool benchmark: {pages} pages @ {dpi} DPI, {cores} CPU cores\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "scanned.pdf")
+        make_scanned_pdf(pdf_path, pages)
+
+        count, elapsed = timed(lambda: render_pages_in_process(pdf_path, dpi))
+        baseline = count / elapsed
+        print(f"{'in-process':>12}: {baseline:8.2f} pages/sec")
+
+        workers = 1
+        while workers <= max(cores, 2):
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # Warm the pool so process start-up isn't billed to the first run
+                list(pool.map(abs, range(workers)))
+                count, elapsed = timed(lambda: render_pages(pdf_path, dpi, workers=max(workers, 2), pool=pool))
+            rate = count / elapsed
+            print(f"{f'{workers} worker(s)':>12}: {rate:8.2f} pages/sec  ({rate / baseline:.2f}x)")
+            workers *= 2
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    run_benchmark(*args)
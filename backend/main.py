@@ -1,13 +1,19 @@
 import time
-import base64
-import fitz # PyMuPDF
 from src.utils import save_ics
-from src import app, extract_course_title
+from src.render import open_pages
+from src.page_cache import replay_page, CACHED_FIELDS
+from src.scheduler import schedulers
+from src.llm_cache import get_llm_cache
+from src.hedging import hedging_stats
+from src.cascade import CascadeReport
+from src.metrics import PAGE_LATENCY
+from src.graph import SPECULATION_STATS, confident_local_title
+from src import app, extract_course_title, route_pages
+from src.config import MAX_CONCURRENT_PAGES, VISION_DPI, ROUTER_MODE, HEDGING, STREAM_ROWS
 
 import json
 import os
 import asyncio
-import uuid
 
 # from langchain_core.globals import set_debug
 # set_debug(True)
@@ -22,198 +28,354 @@ file1_path = "Handouts/EM Handout.pdf"
 file2_path = "Handouts/DD Handout_2025_2026.pdf"
 file3_path = "Handouts/EEPE18-Digital Signal Processing.pdf"
 
+async def run_pages_concurrently(pages, course_title, user_date_format="DMY", max_in_flight=MAX_CONCURRENT_PAGES, page_cache=None, router_mode=ROUTER_MODE, stream_rows=False):
+    """Runs every page through the graph with at most `max_in_flight` pages in flight.
+
+    Yields ("start", page_num) when a page acquires a slot and
+    ("done", page_num, result, error, elapsed) as each page finishes, in completion order.
+    With a `page_cache`, pages seen before are answered from it without touching the graph
+    (their result carries "cached": True).
+    With router_mode="document", the remaining pages are classified up front in batched
+    router calls and each graph run starts with its classification already set.
+    With stream_rows=True, ("row", page_num, kind, data) is also yielded for every evaluation
+    or reference row as soon as the extractors have it, before its page is done.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_in_flight))
+    queue = asyncio.Queue()
+
+    async def lookup(page):
+        try:
+            fingerprint = await asyncio.to_thread(page.fingerprint)
+            return fingerprint, await page_cache.get(fingerprint)
+        except Exception as e:
+            print(f"⚠️ Page cache lookup error on page {page.page_num}: {e}")
+            return None, None
+
+    lookups = {}
+    if page_cache is not None:
+        found = await asyncio.gather(*(lookup(page) for page in pages))
+        lookups = {page.page_num: item for page, item in zip(pages, found)}
+
+    routes = {}
+    if router_mode == "document":
+        uncached = [page for page in pages if lookups.get(page.page_num, (None, None))[1] is None]
+        try:
+            routes = await route_pages({page.page_num: page.text for page in uncached})
+        except Exception as e:
+            print(f"⚠️ Batched router error, falling back to per-page routing: {e}")
+
+    def row_emitter(page_num):
+        seen = set() # A fused call that falls back to separate calls may produce a row twice
+        def on_row(kind, data):
+            key = (kind, json.dumps(data, sort_keys=True))
+            if key not in seen:
+                seen.add(key)
+                queue.put_nowait(("row", page_num, kind, data))
+        return on_row
+
+    async def run_page(page):
+        page_num = page.page_num
+        fingerprint, entry = lookups.get(page_num, (None, None))
+        if entry is not None:
+            result = replay_page(entry, course_title, user_date_format)
+            result["cached"] = True
+            await queue.put(("start", page_num))
+            PAGE_LATENCY.observe(0.0, cached="true")
+            await queue.put(("done", page_num, result, None, 0.0))
+            return
+
+        async with semaphore:
+            await queue.put(("start", page_num))
+            start_time = time.time()
+            result, error = None, None
+            try:
+                initial_state = {
+                    'raw_text': page.text,
+                    'page': page, # Image is rendered lazily, only if a vision node asks for it
+                    'known_course_title': course_title,
+                    'user_date_format': user_date_format
+                }
+                if page_num in routes:
+                    initial_state['classification'] = routes[page_num] # router_node passes it through
+                if stream_rows:
+                    initial_state['on_row'] = row_emitter(page_num)
+                # Run langgraph natively async — no thread wrapper needed
+                result = await app.ainvoke(initial_state)
+                if fingerprint is not None:
+                    await page_cache.put(fingerprint, result)
+            except Exception as e:
+                error = e
+            elapsed = time.time() - start_time
+            PAGE_LATENCY.observe(elapsed, cached="false")
+            await queue.put(("done", page_num, result, error, elapsed))
+
+    tasks = [asyncio.create_task(run_page(page)) for page in pages]
+    try:
+        finished = 0
+        while finished < len(tasks):
+            item = await queue.get()
+            if item[0] == "done":
+                finished += 1
+            yield item
+    finally:
+        # Client disconnects close this generator early; don't leave pages burning LLM calls
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+async def resolve_course_title(base_name, first_page):
+    """Course title from the model (the local reading was not confident). Never raises."""
+    try:
+        # Pass the first page to support Vision Fallback on scanned PDFs
+        title = await extract_course_title(first_page.text, page=first_page, local=False)
+        if title:
+            print(f"🎓 [{base_name}] Extracted Course Title: {title}")
+            return title
+        print(f"⚠️ [{base_name}] No Course Title extracted.")
+    except Exception as e:
+        print(f"🔥 [{base_name}] Course Title Extraction error: {e}")
+    return "Unknown Course"
+
+async def start_course_title(base_name, pages):
+    """Returns (title, None) when page 1 states the title, else ("", task) with the model call running
+    in the background. Pages run with the "" title and are re-titled by `retitle` once the task is done."""
+    if not pages:
+        return "Unknown Course", None
+    title = await confident_local_title(pages[0].text, pages[0])
+    if title:
+        print(f"🎓 [{base_name}] Course Title read from the PDF: {title}")
+        return title, None
+    return "", asyncio.create_task(resolve_course_title(base_name, pages[0]))
+
+def retitle(result, course_title, user_date_format="DMY"):
+    """Re-runs the aggregator on a page result that was produced before the course title was known."""
+    entry = {field: result.get(field) or [] for field in CACHED_FIELDS}
+    return replay_page(entry, course_title, user_date_format)
+
+def log_page_result(base_name, page_num, events, syllabus, refs):
+    if events:
+        print(f"  ✅ [{base_name}] Extracted {len(events)} Evaluation events from Page {page_num}.")
+    if syllabus:
+        print(f"  ✅ [{base_name}] Extracted {len(syllabus)} Syllabus topics from Page {page_num}.")
+    if refs:
+        print(f"  ✅ [{base_name}] Extracted {len(refs)} Reference Books from Page {page_num}.")
+
+    if not events and not syllabus and not refs:
+        print(f"  ⏭️ [{base_name}] Skipped Page {page_num} (No relevant data found).")
+
+def log_cascade(base_name, cascade):
+    if cascade.tiers:
+        print(f"🪜 [{base_name}] EVAL answered by: {cascade.summary()}")
+
+def assemble_in_page_order(page_results):
+    """Flattens {page_num: (events, syllabus, refs)} back into document order."""
+    all_events = []
+    all_syllabus = []
+    all_refs = []
+    for page_num in sorted(page_results):
+        events, syllabus, refs = page_results[page_num]
+        all_events.extend(events)
+        all_syllabus.extend(syllabus)
+        all_refs.extend(refs)
+    return all_events, all_syllabus, all_refs
+
+def release_document(document, base_name):
+    """Closes a lazily-rendered document and reports how many pages actually needed an image."""
+    if document is None:
+        return
+    print(f"🖼️ [{base_name}] Rendered {document.renders}/{len(document)} page images.")
+    if document.cache:
+        stats = document.cache.stats()
+        print(f"🗃️ [{base_name}] Render cache: {document.cache_hits} hits this document "
+              f"({stats['hits']} hits / {stats['misses']} misses since start).")
+    llm_cache = get_llm_cache()
+    if llm_cache:
+        stats = llm_cache.stats()
+        print(f"💾 [{base_name}] LLM cache: {stats['hits']} hits / {stats['misses']} misses since start "
+              f"(hit rate {stats['hit_rate']:.0%}).")
+    if SPECULATION_STATS["started"]:
+        stats = SPECULATION_STATS
+        print(f"🔮 [{base_name}] Speculative EVAL: {stats['kept']}/{stats['started']} kept "
+              f"(hit rate {stats['kept'] / stats['started']:.0%}), {stats['wasted_calls']} wasted vision calls since start.")
+    if HEDGING:
+        for node, stats in hedging_stats().items():
+            print(f"🪁 [{base_name}] Hedging {node}: {stats['hedges']}/{stats['calls']} calls hedged "
+                  f"({stats['hedge_wins']} won, {stats['extra_calls']} extra calls); latency first attempt "
+                  f"{stats['first_attempt']}, observed {stats['observed']}")
+    for scheduler in schedulers().values():
+        print(f"🚦 [{base_name}] LLM scheduler {scheduler.name}: concurrency limit {int(scheduler.limit)}, {scheduler.stats}")
+    document.close()
+
 async def process_pdf(pdf_file, user_date_format="DMY"):
     if pdf_file is None:
         return "", [], [], []
     
     print(f"Processing PDF: {pdf_file}")
-    raw_pages = []
+    base_name = os.path.basename(pdf_file)
 
     try:
-        doc = fitz.open(pdf_file)
-        print(f"Total pages = {len(doc)}")
-
-        for i in range(len(doc)):
-            page = doc[i]
-            text = page.get_text()
-            
-            # Extract Image Base64
-            pix = page.get_pixmap(dpi=100) # Moderate DPI for API speed
-            img_bytes = pix.tobytes("png")
-            b64_image = base64.b64encode(img_bytes).decode("utf-8")
-            
-            raw_pages.append((i+1, text, b64_image))
+        # Text layers are read now; page images are rendered only if a vision node needs them
+        document, pages = await asyncio.to_thread(open_pages, pdf_file, VISION_DPI)
+        print(f"Total pages = {len(pages)}")
 
     except Exception as e:
         print(f"PDF Processing error: {e}")
         return "", [], [], []
 
-    course_title_final = ""
-    if raw_pages:
-        try:
-            # Pass text and image for the first page to support Vision Fallback on scanned PDFs
-            title = await extract_course_title(text=raw_pages[0][1], image_b64=raw_pages[0][2])
-            if title:
-                course_title_final = title
-                print(f"Extracted Course Title: {course_title_final}")
+    try:
+        # Pages start right away; a title the model has to find is patched in when it arrives
+        course_title_final, title_task = await start_course_title(base_name, pages)
+
+        page_results = {}
+        untitled = {}
+        cascade = CascadeReport()
+
+        # Rate limit prevention (Free Gemini Tier allows 15 RPM): every model call goes through
+        # the shared scheduler, so set LLM_RPM / LLM_TPM (env vars) to the tier's limits to
+        # prevent 429 Too Many Requests instead of lowering MAX_CONCURRENT_PAGES
+        async for item in run_pages_concurrently(pages, course_title_final, user_date_format):
+            if item[0] == "start":
+                print(f"Processing Page {item[1]}...")
+                continue
+
+            _, page_num, result, error, elapsed = item
+            if error is not None:
+                print(f"  🔥 Error on Page {page_num}: {error}")
             else:
-                print("No Course Title extracted.")
-                course_title_final = "Unknown Course"
+                events = result.get("final_schedule", [])
+                syllabus = result.get("syllabus_data", [])
+                refs = result.get("reference_data", [])
+                page_results[page_num] = (events, syllabus, refs)
+                if title_task is not None:
+                    untitled[page_num] = result
+                cascade.add(result)
+                log_page_result(base_name, page_num, events, syllabus, refs)
 
-        except Exception as e:
-            print(f"Course Title Extraction error: {e}")
+            print(f"Time taken for Page {page_num}: {elapsed:.2f} seconds.\n")
 
-    all_events = []
-    all_syllabus = []
-    all_refs = []
+        log_cascade(base_name, cascade)
 
-    for page_num, text, b64_image in raw_pages:
-        print(f"Processing Page {page_num}...")
-        start_time = time.time()
-        try:
-            initial_state = {
-                'raw_text': text,
-                'page_image_b64': b64_image,
-                'known_course_title': course_title_final,
-                'user_date_format': user_date_format
-            }
-
-            result = await app.ainvoke(initial_state)
-            
-            events = result.get("final_schedule", [])
-            syllabus = result.get("syllabus_data", [])
-            refs = result.get("reference_data", [])
-            
-            all_events.extend(events)
-            all_syllabus.extend(syllabus)
-            
-            if refs:
-                all_refs.extend(refs)
-            
-            if events:
-                print(f"  ✅ Extracted {len(events)} Evaluation events from Page {page_num}.")
-            if syllabus:
-                print(f"  ✅ Extracted {len(syllabus)} Syllabus topics from Page {page_num}.")
-            if refs:
-                print(f"  ✅ Extracted {len(refs)} Reference Books from Page {page_num}.")
-                
-            if not events and not syllabus and not refs:
-                print(f"  ⏭️ Skipped Page {page_num} (No relevant data found).")
+        if title_task is not None:
+            course_title_final = await title_task
+            for page_num, result in untitled.items():
+                _, syllabus, refs = page_results[page_num]
+                page_results[page_num] = (retitle(result, course_title_final, user_date_format)["final_schedule"], syllabus, refs)
+    finally:
+        release_document(document, base_name)
 
-        except Exception as e:
-            print(f"  🔥 Error on Page {page_num}: {e}")
-        
-        end_time = time.time()
-        print(f"Time taken: {end_time - start_time:.2f} seconds.\n")
-        
-        # Rate limit prevention (Free Gemini Tier allows 15 RPM)
-        # Since we run 3 parallel vision nodes, we must sleep to prevent 429 Too Many Requests
-        # UNCOMMENT THE FOLLOWING LINE IF RUNNING ON FREE GOOGLE AI STUDIO TIER
-        # time.sleep(4)
+    all_events, all_syllabus, all_refs = assemble_in_page_order(page_results)
 
     return course_title_final, all_events, all_syllabus, all_refs
 
-async def process_pdf_stream(pdf_file, user_date_format="DMY"):
+async def process_pdf_stream(pdf_file, user_date_format="DMY", filename=None, page_cache=None, source_hash=None):
+    """Streams NDJSON progress for one PDF.
+
+    `pdf_file` is a file path or an in-memory buffer (the API hands uploads over
+    without a temp-file round trip); `filename` labels the logs for buffers.
+    `page_cache` (a src.page_cache.PageCache) skips the graph for pages seen before.
+    `source_hash` is the upload's SHA-256, reused as the render cache key.
+    """
     if pdf_file is None:
         yield json.dumps({"type": "error", "message": "No file provided"}) + "\n"
         return
     
     try:
-        base_name = os.path.basename(pdf_file)
-        print(f"\n🚀 [{base_name}] Processing PDF: {pdf_file}")
-        doc = await asyncio.to_thread(fitz.open, pdf_file)
-        total_pages = len(doc)
-        print(f"📄 [{base_name}] Total pages = {total_pages}")
+        if isinstance(pdf_file, str):
+            base_name = filename or os.path.basename(pdf_file)
+            print(f"\n🚀 [{base_name}] Processing PDF: {pdf_file}")
+        else:
+            base_name = filename or "upload.pdf"
+            print(f"\n🚀 [{base_name}] Processing PDF from memory ({len(pdf_file) / 1024:.0f} KB)")
+        # Text layers are read now; page images are rendered only if a vision node needs them
+        document, pages = await asyncio.to_thread(open_pages, pdf_file, VISION_DPI, source_hash=source_hash)
+        print(f"📄 [{base_name}] Total pages = {len(pages)}")
     except Exception as e:
         yield json.dumps({"type": "error", "message": f"PDF Processing error: {e}"}) + "\n"
         return
 
+    try:
+        async for chunk in stream_pages(base_name, pages, user_date_format, page_cache):
+            yield chunk
+    finally:
+        release_document(document, base_name)
+
+async def stream_pages(base_name, pages, user_date_format="DMY", page_cache=None):
+    total_pages = len(pages)
     yield json.dumps({"type": "init", "total_pages": total_pages}) + "\n"
 
-    # Extract pages concurrently or in a thread to avoid blocking
-    def extract_pages():
-        pages = []
-        for i in range(total_pages):
-            page = doc[i]
-            text = page.get_text()
-            pix = page.get_pixmap(dpi=81)
-            img_bytes = pix.tobytes("png")
-            b64_image = base64.b64encode(img_bytes).decode("utf-8")
-            pages.append((i+1, text, b64_image))
-        doc.close() # Crucial: Release file lock so Windows can delete it later
-        return pages
-
-    raw_pages = await asyncio.to_thread(extract_pages)
-
-    course_title_final = "Unknown Course"
-    if raw_pages:
-        try:
-            title = await extract_course_title(raw_pages[0][1], raw_pages[0][2])
-            if title:
-                course_title_final = title
-                print(f"🎓 [{base_name}] Extracted Course Title: {course_title_final}")
-            else:
-                print(f"⚠️ [{base_name}] No Course Title extracted.")
-        except Exception as e:
-            print(f"🔥 [{base_name}] Course Title Extraction error: {e}")
+    # Page processing doesn't wait for the title: when page 1 doesn't state it, the model
+    # call runs in the background and its answer is patched into every event's Subject.
+    course_title_final, title_task = await start_course_title(base_name, pages)
+    if title_task is None:
+        yield json.dumps({"type": "progress", "message": f"Extracted Title: {course_title_final}"}) + "\n"
 
-    yield json.dumps({"type": "progress", "message": f"Extracted Title: {course_title_final}"}) + "\n"
+    page_results = {}
+    untitled = {}
+    cascade = CascadeReport()
 
-    all_events = []
-    all_syllabus = []
-    all_refs = []
-
-    run_id = str(uuid.uuid4())[:8]
+    # Pages are independent, so they run concurrently (bounded by MAX_CONCURRENT_PAGES).
+    # page_done events arrive in completion order; the final payload is re-assembled in page order.
+    try:
+        async for item in run_pages_concurrently(pages, course_title_final, user_date_format, page_cache=page_cache, stream_rows=STREAM_ROWS):
+            if title_task is not None and title_task.done() and not course_title_final:
+                course_title_final = title_task.result()
+                yield json.dumps({"type": "progress", "message": f"Extracted Title: {course_title_final}"}) + "\n"
+
+            if item[0] == "start":
+                page_num = item[1]
+                print(f"🔄 [{base_name}] Processing Page {page_num}...")
+                yield json.dumps({"type": "progress", "message": f"Processing Page {page_num}/{total_pages}..."}) + "\n"
+                continue
+
+            if item[0] == "row":
+                # Preview of one evaluation / reference row; the "done" payload stays authoritative
+                _, page_num, kind, data = item
+                yield json.dumps({"type": "row", "page": page_num, "kind": kind, "data": data}) + "\n"
+                continue
+
+            _, page_num, result, error, elapsed = item
+            if error is not None:
+                print(f"  🔥 [{base_name}] Error on Page {page_num}: {error}")
+                yield json.dumps({"type": "error", "message": f"Error on Page {page_num}: {str(error)}"}) + "\n"
+                continue
 
-    for page_num, text, b64_image in raw_pages:
-        start_time = time.time()
-        print(f"🔄 [{base_name}] Processing Page {page_num}...")
-        yield json.dumps({"type": "progress", "message": f"Processing Page {page_num}/{total_pages}..."}) + "\n"
-        
-        try:
-            initial_state = {
-                'raw_text': text,
-                'page_image_b64': b64_image,
-                'known_course_title': course_title_final,
-                'user_date_format': user_date_format
-            }
-            
-            # Run langgraph natively async — no thread wrapper needed
-            result = await app.ainvoke(initial_state)
-            
             events = result.get("final_schedule", [])
             syllabus = result.get("syllabus_data", [])
             refs = result.get("reference_data", [])
-            
-            all_events.extend(events)
-            all_syllabus.extend(syllabus)
-            if refs:
-                all_refs.extend(refs)
-                
-            if events:
-                print(f"  ✅ [{base_name}] Extracted {len(events)} Evaluation events from Page {page_num}.")
-            if syllabus:
-                print(f"  ✅ [{base_name}] Extracted {len(syllabus)} Syllabus topics from Page {page_num}.")
-            if refs:
-                print(f"  ✅ [{base_name}] Extracted {len(refs)} Reference Books from Page {page_num}.")
-                
-            if not events and not syllabus and not refs:
-                print(f"  ⏭️ [{base_name}] Skipped Page {page_num} (No relevant data found).")
-            
-            end_time = time.time()
-            print(f"⏱️ [{base_name}] Time taken for Page {page_num}: {end_time - start_time:.2f} seconds.\n")
+            page_results[page_num] = (events, syllabus, refs)
+            if title_task is not None:
+                untitled[page_num] = result
+            cascade.add(result)
+
+            log_page_result(base_name, page_num, events, syllabus, refs)
+            if result.get("cached"):
+                print(f"🎯 [{base_name}] Page {page_num} served from the page cache.\n")
+            else:
+                print(f"⏱️ [{base_name}] Time taken for Page {page_num}: {elapsed:.2f} seconds.\n")
 
             yield json.dumps({
                 "type": "page_done", 
                 "page": page_num, 
                 "events_found": len(events),
                 "syllabus_found": len(syllabus),
-                "refs_found": len(refs)
+                "refs_found": len(refs),
+                "cached": bool(result.get("cached"))
             }) + "\n"
-            
-        except Exception as e:
-            print(f"  🔥 [{base_name}] Error on Page {page_num}: {e}")
-            yield json.dumps({"type": "error", "message": f"Error on Page {page_num}: {str(e)}"}) + "\n"
+
+        log_cascade(base_name, cascade)
+        if title_task is not None:
+            if not course_title_final:
+                course_title_final = await title_task
+                yield json.dumps({"type": "progress", "message": f"Extracted Title: {course_title_final}"}) + "\n"
+            for page_num, result in untitled.items():
+                _, syllabus, refs = page_results[page_num]
+                page_results[page_num] = (retitle(result, course_title_final, user_date_format)["final_schedule"], syllabus, refs)
+    finally:
+        # Client disconnects close this generator early; don't leave the title call running
+        if title_task is not None and not title_task.done():
+            title_task.cancel()
+
+    all_events, all_syllabus, all_refs = assemble_in_page_order(page_results)
 
     final_data = {
         "course_title": course_title_final,
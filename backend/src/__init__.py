@@ -1,5 +1,5 @@
-from .graph import app, extract_course_title
+from .graph import app, extract_course_title, route_pages
 
 from .schema import State
 
-__all__ = ["app", "State", "extract_course_title"]
\ No newline at end of file
+__all__ = ["app", "State", "extract_course_title", "route_pages"]
\ No newline at end of file
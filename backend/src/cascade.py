@@ -0,0 +1,99 @@
+import re
+import statistics
+from collections import Counter, deque
+
+from src.utils import predefined
+from src.eval_table import TBA_PATTERN
+
+from src.config import EVAL_CASCADE_WEIGHTAGE_TOLERANCE
+
+# ==============================================================================
+# EVAL MODEL CASCADE
+# When the text-layer table reader isn't confident, EVAL used to go straight to
+# the vision model with the page image. With EVAL_CASCADE on, pages with a rich
+# text layer are first sent to the (cheaper, faster) text model; its answer is
+# kept only if it passes the checks below, otherwise the page goes to vision.
+#   - every row has an event name and a date predefined() can parse (or "TBA"),
+#   - the weightages that are stated sum to about 100% (duplicated rows for an
+#     event held on several dates are counted once).
+# Each EVAL page records which tier answered, so the per-handout report can say
+# how often vision was avoided and roughly how much latency that saved.
+# ==============================================================================
+
+TIER_TEXT_LAYER = "text_layer"
+TIER_TEXT_LLM = "text_llm"
+TIER_VISION = "vision"
+
+ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+PERCENT = re.compile(r"(\d+(?:\.\d+)?)")
+
+def parse_weightage(weightage):
+    """First number in a weightage cell ("30%", "35 %", "20 marks"), or None for "N/A" and the like."""
+    match = PERCENT.search(weightage or "")
+    return float(match.group(1)) if match else None
+
+def check_eval_items(items, user_format="DMY", tolerance=None):
+    """Returns (ok, reason) for text-model EVAL rows; `reason` says why they go to vision instead."""
+    tolerance = EVAL_CASCADE_WEIGHTAGE_TOLERANCE if tolerance is None else tolerance
+    if not items:
+        return False, "no rows"
+
+    weights = {}
+    for item in items:
+        name = (item.get("event_name") or "").strip()
+        date_raw = (item.get("date_raw") or "").strip()
+        if not name:
+            return False, "row without an event name"
+        if not TBA_PATTERN.search(date_raw):
+            try:
+                _, end = predefined(date_raw, item.get("time_raw") or "", name, user_format)
+                date_iso = end[:10]
+            except Exception:
+                date_iso = ""
+            if not ISO_DATE.match(date_iso):
+                return False, f"unparseable date {date_raw!r} for {name}"
+        weight = parse_weightage(item.get("weightage"))
+        if weight is not None:
+            weights[(name.lower(), weight)] = weight
+
+    if weights:
+        total = sum(weights.values())
+        if abs(total - 100) > tolerance:
+            return False, f"weightages sum to {total:g}%"
+    return True, ""
+
+# Recent vision EVAL latencies: the cost a text-tier answer avoided
+VISION_LATENCY = deque(maxlen=50)
+
+def record_vision_latency(seconds):
+    VISION_LATENCY.append(seconds)
+
+def latency_saved(tier, elapsed):
+    """Seconds saved against a vision call, `elapsed` being the time spent in the cheaper tiers.
+
+    For a vision answer that time was wasted and counts as a (negative) saving.
+    None until a vision latency has been observed.
+    """
+    if tier == TIER_VISION:
+        return -elapsed
+    if not VISION_LATENCY:
+        return None
+    return statistics.median(VISION_LATENCY) - elapsed
+
+class CascadeReport:
+    """Per-handout tally of which tier answered each EVAL page, built from the graph results."""
+
+    def __init__(self):
+        self.tiers = Counter()
+        self.saved = 0.0
+
+    def add(self, result):
+        tier = (result or {}).get("eval_tier")
+        if not tier:
+            return
+        self.tiers[tier] += 1
+        self.saved += result.get("eval_saved") or 0.0
+
+    def summary(self):
+        tiers = ", ".join(f"{tier} {count}" for tier, count in sorted(self.tiers.items()))
+        return f"{tiers}; ~{self.saved:.1f}s of vision latency saved"
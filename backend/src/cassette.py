@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from src.llm_cache import message_payload
+
+# ==============================================================================
+# LLM CASSETTES
+# Record / replay for the chat models, so the pipeline (tests, benchmarks) can
+# run end to end without a network, deterministically. A wrapped model in
+# "record" mode calls the provider and saves every response with its latency
+# to a JSON cassette, keyed by model and a fingerprint of the exact messages
+# (image data included). In "replay" mode the same requests are answered from
+# the cassette, optionally after the recorded latency; a request that was
+# never recorded raises CassetteMiss. "auto" replays what it has and records
+# the rest. Identical requests recorded several times replay in order.
+# ==============================================================================
+
+CASSETTE_VERSION = 1
+STREAM_CHUNK_CHARS = 16
+
+class CassetteMiss(LookupError):
+    pass
+
+def fingerprint(model_name, messages):
+    payload = json.dumps(message_payload(messages), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(f"{model_name}\n{payload}".encode("utf-8")).hexdigest()
+
+class Cassette:
+    """One cassette file shared by every model wrapped with it."""
+
+    def __init__(self, path, mode="replay", replay_latency=False):
+        if mode not in ("record", "replay", "auto"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.replay_latency = replay_latency
+        self.interactions = {}
+        self.replayed = {}
+        self.stats = {"recorded": 0, "replayed": 0}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != CASSETTE_VERSION:
+                raise ValueError(f"Cassette {path} has version {data.get('version')}, expected {CASSETTE_VERSION}")
+            self.interactions = data.get("interactions", {})
+
+    def wrap(self, model):
+        return CassetteModel(model, self)
+
+    def lookup(self, key):
+        """The next recorded response for `key` (the last one repeats), or None."""
+        recorded = self.interactions.get(key)
+        if not recorded or self.mode == "record":
+            return None
+        index = self.replayed.get(key, 0)
+        self.replayed[key] = index + 1
+        if index >= len(recorded) and self.mode == "auto":
+            return None
+        self.stats["replayed"] += 1
+        return recorded[min(index, len(recorded) - 1)]
+
+    def record(self, key, model_name, messages, response, latency):
+        entry = {
+            "model": model_name,
+            "content": response.content,
+            "latency": round(latency, 4),
+            "usage": getattr(response, "usage_metadata", None),
+            "request": json.dumps(message_payload(messages), ensure_ascii=False)[:200],
+        }
+        self.interactions.setdefault(key, []).append(entry)
+        self.replayed[key] = len(self.interactions[key])
+        self.stats["recorded"] += 1
+        self.save()
+
+    def save(self):
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CASSETTE_VERSION, "interactions": self.interactions}, f, indent=1, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+class CassetteModel:
+    """Wraps a chat model's ainvoke / astream with a Cassette; other attributes pass through."""
+
+    def __init__(self, model, cassette):
+        self.model = model
+        self.cassette = cassette
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    @property
+    def name(self):
+        return getattr(self.model, "model_name", None) or type(self.model).__name__
+
+    def _replay(self, messages):
+        key = fingerprint(self.name, messages)
+        entry = self.cassette.lookup(key)
+        if entry is None and self.cassette.mode == "replay":
+            raise CassetteMiss(f"No recording in {self.cassette.path} for this {self.name} request; re-record with LLM_CASSETTE_MODE=record")
+        return key, entry
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        key, entry = self._replay(messages)
+        if entry is not None:
+            if self.cassette.replay_latency:
+                await asyncio.sleep(entry["latency"])
+            return AIMessage(content=entry["content"], usage_metadata=entry.get("usage"))
+
+        start_time = time.perf_counter()
+        response = await self.model.ainvoke(messages, *args, **kwargs)
+        self.cassette.record(key, self.name, messages, response, time.perf_counter() - start_time)
+        return response
+
+    async def astream(self, messages, *args, **kwargs):
+        key, entry = self._replay(messages)
+        if entry is not None:
+            content = entry["content"]
+            pieces = [content[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(content), STREAM_CHUNK_CHARS)] or [""]
+            delay = entry["latency"] / len(pieces) if self.cassette.replay_latency else 0
+            for index, piece in enumerate(pieces):
+                if delay:
+                    await asyncio.sleep(delay)
+                last = index == len(pieces) - 1
+                yield AIMessageChunk(content=piece, usage_metadata=entry.get("usage") if last else None)
+            return
+
+        start_time = time.perf_counter()
+        response = None
+        async for chunk in self.model.astream(messages, *args, **kwargs):
+            response = chunk if response is None else response + chunk
+            yield chunk
+        if response is not None:
+            self.cassette.record(key, self.name, messages, response, time.perf_counter() - start_time)
@@ -1,4 +1,5 @@
 import os
+import json
 
 # Optional: If you want to use a local .env file instead of system variables, 
 # uncomment the two lines below (make sure you have installed python-dotenv).
@@ -15,4 +16,153 @@ AIGATEWAY_API_KEY = os.environ.get("AIGATEWAY_API_KEY")
 UPSTASH_REDIS_REST_URL = os.environ.get("UPSTASH_REDIS_REST_URL")
 UPSTASH_REDIS_REST_TOKEN = os.environ.get("UPSTASH_REDIS_REST_TOKEN")
 
-ENVIRONMENT = os.environ.get("ENVIRONMENT", "development")
\ No newline at end of file
+ENVIRONMENT = os.environ.get("ENVIRONMENT", "development")
+
+# Page pipeline: how many pages of a single handout may run through the graph at once.
+# Each in-flight page can fan out to several LLM calls, so keep this modest on free tiers.
+MAX_CONCURRENT_PAGES = int(os.environ.get("MAX_CONCURRENT_PAGES", "4"))
+
+# PDF rasterization: worker processes for the render pool, and the page count below
+# which rendering stays in a single thread (process start-up isn't worth it).
+RENDER_WORKERS = int(os.environ.get("RENDER_WORKERS", str(os.cpu_count() or 1)))
+RENDER_POOL_MIN_PAGES = int(os.environ.get("RENDER_POOL_MIN_PAGES", "8"))
+
+# Lazy rendering: rasterize a page only when a vision node asks for its image.
+# Set RENDER_LAZY=false to render every page up front (uses the render pool).
+RENDER_LAZY = os.environ.get("RENDER_LAZY", "true").lower() != "false"
+
+# Vision payload encoding. 81 DPI is the tuned default (see README).
+# VISION_IMAGE_FORMAT: png | gray | palette | jpeg | webp (palette/webp need Pillow).
+# VISION_IMAGE_MAX_BYTES: per-page budget for the encoded image; 0 disables it.
+VISION_DPI = int(os.environ.get("VISION_DPI", "81"))
+VISION_IMAGE_FORMAT = os.environ.get("VISION_IMAGE_FORMAT", "png")
+VISION_IMAGE_MAX_BYTES = int(os.environ.get("VISION_IMAGE_MAX_BYTES", "0"))
+
+# Upload ingest: uploads are hashed chunk by chunk and kept in memory; only uploads
+# larger than UPLOAD_SPILL_BYTES spill to a unique temp file.
+UPLOAD_CHUNK_BYTES = int(os.environ.get("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+UPLOAD_SPILL_BYTES = int(os.environ.get("UPLOAD_SPILL_BYTES", str(16 * 1024 * 1024)))
+
+# Evaluation-table cropping: send the vision model only the detected table region
+# (rendered at up to EVAL_CROP_MAX_DPI) instead of the whole page.
+EVAL_CROP = os.environ.get("EVAL_CROP", "true").lower() != "false"
+EVAL_CROP_MAX_DPI = int(os.environ.get("EVAL_CROP_MAX_DPI", "150"))
+
+# Rule-based evaluation table extraction from the PDF text layer. Pages whose
+# table is read with at least EVAL_TEXT_MIN_CONFIDENCE skip the vision model.
+EVAL_TEXT_EXTRACT = os.environ.get("EVAL_TEXT_EXTRACT", "true").lower() != "false"
+EVAL_TEXT_MIN_CONFIDENCE = float(os.environ.get("EVAL_TEXT_MIN_CONFIDENCE", "0.8"))
+
+# Router mode: "page" classifies each page in its own LLM call; "document" packs many
+# pages into one call (split into batches of at most ROUTER_BATCH_CHARS characters).
+ROUTER_MODE = os.environ.get("ROUTER_MODE", "page").lower()
+ROUTER_BATCH_CHARS = int(os.environ.get("ROUTER_BATCH_CHARS", "48000"))
+
+# Local keyword pre-router: pages it classifies with at least PREROUTER_MIN_CONFIDENCE
+# (obvious cover/policy pages, unambiguous evaluation or textbook pages) skip the LLM router.
+PREROUTER = os.environ.get("PREROUTER", "true").lower() != "false"
+PREROUTER_MIN_CONFIDENCE = float(os.environ.get("PREROUTER_MIN_CONFIDENCE", "0.9"))
+
+# On-disk cache of encoded page images, keyed by (document hash, page, DPI, encoding).
+# Least recently used images are evicted once the directory exceeds RENDER_CACHE_MAX_BYTES.
+RENDER_CACHE = os.environ.get("RENDER_CACHE", "true").lower() != "false"
+RENDER_CACHE_DIR = os.environ.get("RENDER_CACHE_DIR", os.path.join("cache", "renders"))
+RENDER_CACHE_MAX_BYTES = int(os.environ.get("RENDER_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# Fused vision extraction: pages classified as both EVAL and REFERENCES get one vision
+# call with a combined schema instead of one call per category (separate calls remain the fallback).
+VISION_FUSED = os.environ.get("VISION_FUSED", "true").lower() != "false"
+
+# Per-page result cache, keyed by each page's content (so a re-issued handout only pays
+# for the pages that changed). Prompt edits invalidate it automatically (the key includes
+# the prompt registry hash); bump PAGE_CACHE_VERSION when the models change.
+# Pages the router skipped get a shorter TTL, since a router error also reads as SKIP.
+PAGE_CACHE = os.environ.get("PAGE_CACHE", "true").lower() != "false"
+PAGE_CACHE_VERSION = os.environ.get("PAGE_CACHE_VERSION", "1")
+PAGE_CACHE_MAX_ENTRIES = int(os.environ.get("PAGE_CACHE_MAX_ENTRIES", "2048"))
+PAGE_CACHE_TTL = int(os.environ.get("PAGE_CACHE_TTL", str(30 * 24 * 3600)))
+PAGE_CACHE_SKIP_TTL = int(os.environ.get("PAGE_CACHE_SKIP_TTL", str(24 * 3600)))
+
+# Shared LLM scheduler (one per provider): LLM_RPM / LLM_TPM token buckets (0 = no local
+# limit, rely on the provider's rate-limit headers), an adaptive concurrency limit between
+# LLM_MIN_CONCURRENCY and LLM_MAX_CONCURRENCY, and LLM_MAX_RETRIES retries on 429s/timeouts.
+# LLM_IMAGE_TOKENS is the TPM estimate charged per page image.
+LLM_SCHEDULER = os.environ.get("LLM_SCHEDULER", "true").lower() != "false"
+LLM_RPM = int(os.environ.get("LLM_RPM", "0"))
+LLM_TPM = int(os.environ.get("LLM_TPM", "0"))
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "16"))
+LLM_MIN_CONCURRENCY = int(os.environ.get("LLM_MIN_CONCURRENCY", "1"))
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "4"))
+LLM_IMAGE_TOKENS = int(os.environ.get("LLM_IMAGE_TOKENS", "1000"))
+
+# LLM response cache, keyed by model + prompt version + input hash. The local tier is a
+# SQLite file (LRU-evicted past LLM_CACHE_MAX_ENTRIES); Redis is used as well when configured.
+LLM_CACHE = os.environ.get("LLM_CACHE", "true").lower() != "false"
+LLM_CACHE_PATH = os.environ.get("LLM_CACHE_PATH", os.path.join("cache", "llm_responses.sqlite3"))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "50000"))
+LLM_CACHE_TTL = int(os.environ.get("LLM_CACHE_TTL", str(30 * 24 * 3600)))
+
+# Cross-worker coordination (several uvicorn/gunicorn workers or instances): document
+# leases so only one worker runs the pipeline for a given upload, and shared API rate-limit
+# counters. COORDINATION: auto (Redis when configured, else a local SQLite file) | local |
+# off (in-process only).
+# Workers waiting on another worker's lease give up after DOCUMENT_LEASE_WAIT seconds.
+COORDINATION = os.environ.get("COORDINATION", "auto").lower()
+COORDINATION_PATH = os.environ.get("COORDINATION_PATH", os.path.join("cache", "coordination.sqlite3"))
+DOCUMENT_LEASE_TTL = int(os.environ.get("DOCUMENT_LEASE_TTL", "60"))
+DOCUMENT_LEASE_WAIT = int(os.environ.get("DOCUMENT_LEASE_WAIT", "600"))
+GENERATE_RATE_LIMIT = int(os.environ.get("GENERATE_RATE_LIMIT", "3000"))
+GENERATE_RATE_WINDOW = int(os.environ.get("GENERATE_RATE_WINDOW", str(24 * 3600)))
+
+# Speculative extraction (latency over cost): when the text layer suggests an evaluation
+# table, the eval extractor starts alongside the LLM router; its result is kept if the
+# router says EVAL and cancelled or discarded otherwise.
+SPECULATIVE_EVAL = os.environ.get("SPECULATIVE_EVAL", "false").lower() == "true"
+
+# Local course title: read from "Course Title:" / course-code lines, PDF metadata or the
+# largest font on page 1; the LLM is asked only below TITLE_LOCAL_MIN_CONFIDENCE (and then
+# in the background, while the pages already run).
+TITLE_LOCAL = os.environ.get("TITLE_LOCAL", "true").lower() != "false"
+TITLE_LOCAL_MIN_CONFIDENCE = float(os.environ.get("TITLE_LOCAL_MIN_CONFIDENCE", "0.8"))
+
+# Hedged model calls (off by default): a call still running after the HEDGE_PERCENTILE of its
+# node's last HEDGE_WINDOW latencies is duplicated and the first valid answer wins. Nothing is
+# hedged before a node has HEDGE_MIN_SAMPLES latencies. HEDGE_TEXT_MODEL / HEDGE_VISION_MODEL
+# send the duplicate to another model on the same provider (empty: the same model).
+HEDGING = os.environ.get("HEDGING", "false").lower() == "true"
+HEDGE_PERCENTILE = float(os.environ.get("HEDGE_PERCENTILE", "95"))
+HEDGE_MIN_SAMPLES = int(os.environ.get("HEDGE_MIN_SAMPLES", "20"))
+HEDGE_WINDOW = int(os.environ.get("HEDGE_WINDOW", "200"))
+HEDGE_TEXT_MODEL = os.environ.get("HEDGE_TEXT_MODEL", "")
+HEDGE_VISION_MODEL = os.environ.get("HEDGE_VISION_MODEL", "")
+
+# EVAL model cascade (off by default): pages the text-layer table reader can't settle, but
+# that have at least EVAL_CASCADE_MIN_CHARS of text, go to the text model first. Its rows are
+# kept if every date parses and the weightages sum to 100% (+/- EVAL_CASCADE_WEIGHTAGE_TOLERANCE
+# points); otherwise the page goes to the vision model as before.
+EVAL_CASCADE = os.environ.get("EVAL_CASCADE", "false").lower() == "true"
+EVAL_CASCADE_MIN_CHARS = int(os.environ.get("EVAL_CASCADE_MIN_CHARS", "300"))
+EVAL_CASCADE_WEIGHTAGE_TOLERANCE = float(os.environ.get("EVAL_CASCADE_WEIGHTAGE_TOLERANCE", "5"))
+
+# Streamed rows: on the streaming API, vision extractions are read with astream and every
+# evaluation / reference row is sent to the client as a "row" event as soon as the model has
+# generated it. The final "done" payload is unchanged. STREAM_ROWS=false waits for whole pages.
+STREAM_ROWS = os.environ.get("STREAM_ROWS", "true").lower() != "false"
+
+# Metrics (/metrics, Prometheus text format). LLM_PRICES estimates cost: USD per million
+# [input, output] tokens by model name, as JSON; entries override the defaults below
+# (approximate list prices, replace with your provider's).
+METRICS = os.environ.get("METRICS", "true").lower() != "false"
+LLM_PRICES = {
+    "openai/gpt-oss-20b": [0.03, 0.15],
+    "qwen/qwen3-vl-8b-instruct": [0.08, 0.50],
+    **json.loads(os.environ.get("LLM_PRICES", "{}")),
+}
+
+# LLM cassettes (src/cassette.py): with LLM_CASSETTE set to a JSON file, every chat model call
+# goes through it. LLM_CASSETTE_MODE: record (call the provider and save), replay (offline;
+# unrecorded requests fail) or auto (replay what's recorded, record the rest).
+# LLM_CASSETTE_LATENCY=true waits the recorded latency on replay, for end-to-end benchmarks.
+LLM_CASSETTE = os.environ.get("LLM_CASSETTE", "")
+LLM_CASSETTE_MODE = os.environ.get("LLM_CASSETTE_MODE", "replay").lower()
+LLM_CASSETTE_LATENCY = os.environ.get("LLM_CASSETTE_LATENCY", "false").lower() == "true"
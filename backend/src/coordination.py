@@ -0,0 +1,198 @@
+import os
+import time
+import uuid
+import sqlite3
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+
+from src.config import COORDINATION, COORDINATION_PATH, DOCUMENT_LEASE_TTL
+
+# ==============================================================================
+# CROSS-WORKER COORDINATION
+# With several uvicorn/gunicorn workers (or instances), in-process state is not
+# enough: each worker would run its own pipeline for the same pdf_hash and keep
+# its own rate-limit counters. Two primitives cover both:
+#   - leases: a lock with an owner and an expiry, renewed while the work runs,
+#     so a crashed worker's lease simply runs out,
+#   - counters: fixed-window counters shared by every worker.
+# RedisCoordinator uses Redis (shared across machines); LocalCoordinator is a
+# SQLite file, shared by the workers of one machine, that works offline.
+# ==============================================================================
+
+def make_coordinator(redis=None):
+    """Redis when it is configured (unless COORDINATION=local), else the local SQLite stand-in."""
+    if COORDINATION == "off":
+        # Process-local state only, as with a single worker
+        return LocalCoordinator(":memory:")
+    if redis is not None and COORDINATION != "local":
+        return RedisCoordinator(redis)
+    return LocalCoordinator(COORDINATION_PATH)
+
+class Coordinator(ABC):
+    """Interface shared by the Redis and local implementations."""
+
+    @abstractmethod
+    async def acquire(self, key, owner, ttl):
+        """Takes the lease on `key` for `ttl` seconds if it is free or expired. Returns True on success."""
+
+    @abstractmethod
+    async def renew(self, key, owner, ttl):
+        """Extends a lease `owner` still holds. Returns False if it was lost."""
+
+    @abstractmethod
+    async def release(self, key, owner):
+        """Gives up the lease on `key` if `owner` still holds it."""
+
+    @abstractmethod
+    async def incr(self, key, window):
+        """Adds one to the counter for the current `window`-second window and returns the new count."""
+
+    async def hit(self, key, limit, window):
+        """Counts one hit; True while the window's count is within `limit`."""
+        return await self.incr(key, window) <= limit
+
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end
+"""
+RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('expire', KEYS[1], ARGV[2]) else return 0 end
+"""
+INCR_SCRIPT = """
+local count = redis.call('incr', KEYS[1])
+if count == 1 then redis.call('expire', KEYS[1], ARGV[1]) end
+return count
+"""
+
+class RedisCoordinator(Coordinator):
+    def __init__(self, redis):
+        self.redis = redis
+
+    async def acquire(self, key, owner, ttl):
+        return bool(await self.redis.set(key, owner, nx=True, ex=int(ttl)))
+
+    async def renew(self, key, owner, ttl):
+        # Compare-and-set in a script: never extend a lease another worker has taken over
+        return bool(await self.redis.eval(RENEW_SCRIPT, keys=[key], args=[owner, str(int(ttl))]))
+
+    async def release(self, key, owner):
+        await self.redis.eval(RELEASE_SCRIPT, keys=[key], args=[owner])
+
+    async def incr(self, key, window):
+        window_key = f"{key}:{int(time.time() // window)}"
+        return int(await self.redis.eval(INCR_SCRIPT, keys=[window_key], args=[str(int(window))]))
+
+class LocalCoordinator(Coordinator):
+    def __init__(self, path=COORDINATION_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS counters (key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires_at REAL NOT NULL)")
+
+    def _transaction(self, work):
+        # BEGIN IMMEDIATE takes SQLite's write lock up front, so the read-then-write below
+        # is atomic across processes as well as threads
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(self._db, time.time())
+                self._db.execute("COMMIT")
+                return result
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    async def _run(self, work):
+        return await asyncio.to_thread(self._transaction, work)
+
+    async def acquire(self, key, owner, ttl):
+        def work(db, now):
+            row = db.execute("SELECT owner, expires_at FROM leases WHERE key = ?", (key,)).fetchone()
+            if row and row[1] > now and row[0] != owner:
+                return False
+            db.execute("INSERT OR REPLACE INTO leases (key, owner, expires_at) VALUES (?, ?, ?)", (key, owner, now + ttl))
+            return True
+        return await self._run(work)
+
+    async def renew(self, key, owner, ttl):
+        def work(db, now):
+            updated = db.execute("UPDATE leases SET expires_at = ? WHERE key = ? AND owner = ? AND expires_at > ?",
+                                 (now + ttl, key, owner, now))
+            return updated.rowcount == 1
+        return await self._run(work)
+
+    async def release(self, key, owner):
+        def work(db, now):
+            db.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner))
+        await self._run(work)
+
+    async def incr(self, key, window):
+        def work(db, now):
+            window_key = f"{key}:{int(now // window)}"
+            db.execute("DELETE FROM counters WHERE expires_at <= ?", (now,))
+            db.execute(
+                "INSERT INTO counters (key, count, expires_at) VALUES (?, 1, ?) "
+                "ON CONFLICT(key) DO UPDATE SET count = count + 1",
+                (window_key, (int(now // window) + 1) * window),
+            )
+            return db.execute("SELECT count FROM counters WHERE key = ?", (window_key,)).fetchone()[0]
+        return await self._run(work)
+
+class Lease:
+    """One worker's claim on a key, renewed in the background until released.
+
+    `try_acquire()` is False when another worker holds it; `wait()` blocks until it is free.
+    """
+
+    def __init__(self, coordinator, key, ttl=DOCUMENT_LEASE_TTL):
+        self.coordinator = coordinator
+        self.key = key
+        self.ttl = ttl
+        self.owner = uuid.uuid4().hex
+        self.acquired = False
+        self._renewer = None
+
+    async def try_acquire(self):
+        try:
+            self.acquired = await self.coordinator.acquire(self.key, self.owner, self.ttl)
+        except Exception as e:
+            # Coordination is an optimization: if the backend is down, run uncoordinated
+            print(f"⚠️ [COORDINATION] Lease backend unavailable ({e}); continuing without it.")
+            self.acquired = True
+        if self.acquired:
+            self._renewer = asyncio.create_task(self._renew())
+        return self.acquired
+
+    async def wait(self, timeout, poll=1.0):
+        """Polls until the lease is ours (its holder released it or died). False on timeout."""
+        deadline = time.monotonic() + timeout
+        while not await self.try_acquire():
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(poll)
+        return True
+
+    async def _renew(self):
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            try:
+                if not await self.coordinator.renew(self.key, self.owner, self.ttl):
+                    print(f"⚠️ [COORDINATION] Lost the lease on {self.key}.")
+                    return
+            except Exception as e:
+                print(f"⚠️ [COORDINATION] Lease renewal failed: {e}")
+
+    async def release(self):
+        if self._renewer:
+            self._renewer.cancel()
+            self._renewer = None
+        if self.acquired:
+            self.acquired = False
+            try:
+                await self.coordinator.release(self.key, self.owner)
+            except Exception as e:
+                print(f"⚠️ [COORDINATION] Lease release failed: {e}")
@@ -0,0 +1,94 @@
+import io
+
+import fitz # PyMuPDF
+
+from src.config import VISION_IMAGE_FORMAT, VISION_IMAGE_MAX_BYTES
+
+try:
+    from PIL import Image # Optional: only needed for the "palette" and "webp" formats
+except ImportError:
+    Image = None
+
+# ==============================================================================
+# VISION IMAGE ENCODER
+# Upload size is a large share of vision latency and provider cost, so page
+# images can be sent as grayscale / palette PNG, JPEG or WebP and squeezed under
+# a per-page byte budget: lossy formats step down in quality first, then every
+# format steps down in DPI (never below MIN_DPI, where text gets illegible).
+# ==============================================================================
+
+MIME_TYPES = {
+    "png": "image/png",
+    "gray": "image/png",
+    "palette": "image/png",
+    "jpeg": "image/jpeg",
+    "webp": "image/webp",
+}
+
+# Formats that need Pillow, and what to use instead when it isn't installed
+PILLOW_FALLBACKS = {"palette": "gray", "webp": "jpeg"}
+
+QUALITY_STEPS = (85, 70, 55, 40)
+PALETTE_COLORS = 16
+MIN_DPI = 60
+DPI_STEP = 0.8
+
+_warned_fallbacks = set()
+
+def resolve_format(fmt):
+    fmt = (fmt or "png").lower()
+    if fmt == "jpg":
+        fmt = "jpeg"
+    if fmt not in MIME_TYPES:
+        raise ValueError(f"Unknown vision image format '{fmt}'. Choose from {sorted(MIME_TYPES)}")
+    if fmt in PILLOW_FALLBACKS and Image is None:
+        fallback = PILLOW_FALLBACKS[fmt]
+        if fmt not in _warned_fallbacks:
+            _warned_fallbacks.add(fmt)
+            print(f"⚠️ Pillow is not installed; encoding '{fmt}' page images as '{fallback}' instead.")
+        fmt = fallback
+    return fmt
+
+def encode_pixmap(pix, fmt, quality=None):
+    """Encodes an already-rendered pixmap. `fmt` must come from resolve_format()."""
+    if fmt in ("png", "gray"):
+        return pix.tobytes("png")
+    if fmt == "jpeg":
+        return pix.tobytes("jpeg", jpg_quality=quality or QUALITY_STEPS[0])
+
+    mode = "L" if pix.n == 1 else "RGB"
+    img = Image.frombytes(mode, (pix.width, pix.height), pix.samples)
+    buffer = io.BytesIO()
+    if fmt == "palette":
+        img.quantize(colors=PALETTE_COLORS).save(buffer, "PNG", optimize=True)
+    else:
+        img.save(buffer, "WEBP", quality=quality or QUALITY_STEPS[0])
+    return buffer.getvalue()
+
+def encode_page(page, dpi, fmt=None, max_bytes=None, clip=None):
+    """Renders a fitz page (or just the `clip` rectangle of it) and encodes it for the vision model.
+
+    `fmt` and `max_bytes` default to VISION_IMAGE_FORMAT / VISION_IMAGE_MAX_BYTES.
+    The budget applies to the encoded image (before base64); 0 means no budget.
+    If the budget can't be met, the smallest attempt is returned.
+    Returns (image_bytes, mime_type).
+    """
+    fmt = resolve_format(fmt or VISION_IMAGE_FORMAT)
+    max_bytes = VISION_IMAGE_MAX_BYTES if max_bytes is None else max_bytes
+    qualities = QUALITY_STEPS if fmt in ("jpeg", "webp") else (None,)
+    colorspace = fitz.csRGB if fmt in ("png", "jpeg", "webp") else fitz.csGRAY
+
+    smallest = None
+    while True:
+        pix = page.get_pixmap(dpi=dpi, colorspace=colorspace, clip=clip)
+        for quality in qualities:
+            data = encode_pixmap(pix, fmt, quality)
+            if smallest is None or len(data) < len(smallest):
+                smallest = data
+            if not max_bytes or len(data) <= max_bytes:
+                return data, MIME_TYPES[fmt]
+        if dpi <= MIN_DPI:
+            break
+        dpi = max(MIN_DPI, int(dpi * DPI_STEP))
+
+    return smallest, MIME_TYPES[fmt]
@@ -0,0 +1,180 @@
+import re
+
+import fitz # PyMuPDF
+
+from src.layout import find_tables, table_rows, find_anchor_rects, ANCHOR_GAP
+
+# ==============================================================================
+# TEXT-LAYER EVALUATION TABLE EXTRACTOR
+# Most handouts are born-digital, and their Evaluation Scheme is a real table.
+# This reads it straight from find_tables() and maps the columns onto the
+# EvalExtraction fields, with a confidence score. When the score is high
+# enough the page never reaches the vision model; otherwise (scanned pages,
+# odd layouts, free-text schedules) it falls back to vision_eval_extractor_node.
+# ==============================================================================
+
+# Header keywords for each EvalExtraction field, checked in this order
+COLUMN_KEYWORDS = (
+    ("weightage", ("weightage", "weight", "marks", "%")),
+    ("format", ("nature", "format", "mode")),
+    ("date_raw", ("date",)),
+    ("time_raw", ("time", "slot", "session")),
+    ("duration", ("duration",)),
+    ("event_name", ("component", "evaluation", "exam", "assessment", "test", "name")),
+)
+
+MONTHS = r"jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec"
+DATE_PATTERN = re.compile(
+    # 11/10/2025, 11.10.25, 11-10-2025, 11/10 (but not times like "4-5" or "10.30")
+    rf"\d{{1,2}}\s*(?P<sep>[/.-])\s*\d{{1,2}}\s*(?P=sep)\s*\d{{2,4}}"
+    rf"|\d{{1,2}}\s*/\s*\d{{1,2}}(?![:\d])"
+    rf"|\d{{1,2}}(?:st|nd|rd|th)?[\s-]*(?:{MONTHS})[a-z]*\.?(?:[\s,-]*\d{{4}})?"
+    rf"|(?:{MONTHS})[a-z]*\.?[\s-]*\d{{1,2}}(?:st|nd|rd|th)?(?:[\s,-]*\d{{4}})?",
+    re.IGNORECASE,
+)
+TBA_PATTERN = re.compile(r"\b(tba|tbd|to be announced|to be decided|announced later)\b", re.IGNORECASE)
+FORMAT_PATTERN = re.compile(r"\b(OB|CB|open[\s-]*book|closed[\s-]*book)\b", re.IGNORECASE)
+SKIP_ROWS = ("total",)
+
+def map_header(header):
+    """Maps column index -> EvalExtraction field from a header row. Unknown columns are left out."""
+    columns = {}
+    for index, cell in enumerate(header):
+        text = cell.lower()
+        if not text:
+            continue
+        # "Date & Time" is one column on most handouts
+        if "date" in text and "time" in text:
+            columns[index] = "date_time"
+            continue
+        for field, keywords in COLUMN_KEYWORDS:
+            if field not in columns.values() and any(keyword in text for keyword in keywords):
+                columns[index] = field
+                break
+    return columns
+
+def find_header(rows):
+    """Returns (row_index, column_map) for the first row that looks like an evaluation header."""
+    for index, row in enumerate(rows[:3]):
+        columns = map_header(row)
+        fields = set(columns.values())
+        if "event_name" in fields and fields & {"date_raw", "date_time"}:
+            return index, columns
+    return None, {}
+
+def split_date_time(text):
+    """Splits a "Date & Time" cell into (date_raw, time_raw), one pair per date found.
+
+    "11/10/2025 4-5:30 PM" -> [("11/10/2025", "4-5:30 PM")]
+    "05/09 & 12/10 (FN)" -> [("05/09", "FN"), ("12/10", "FN")]
+    """
+    text = " ".join(text.split())
+    dates = list(DATE_PATTERN.finditer(text))
+    if not dates:
+        return [(text, "")]
+
+    pairs = []
+    for i, match in enumerate(dates):
+        end = dates[i + 1].start() if i + 1 < len(dates) else len(text)
+        time_raw = text[match.end():end].strip(" ,;&-/()")
+        pairs.append([match.group(0).strip(), time_raw])
+
+    # A shared time written once at the end applies to every date ("05/09 & 12/10 FN")
+    shared = pairs[-1][1]
+    for pair in pairs:
+        if not pair[1] or pair[1].lower() in ("and", "&"):
+            pair[1] = shared
+    return [tuple(pair) for pair in pairs]
+
+def split_dates(text):
+    """Splits a date-only cell into one date per entry, keeping the raw text."""
+    text = " ".join(text.split())
+    dates = [match.group(0).strip() for match in DATE_PATTERN.finditer(text)]
+    return dates or [text]
+
+def normalize_format(text):
+    match = FORMAT_PATTERN.search(text or "")
+    if not match:
+        return "TBA"
+    value = match.group(1).upper()
+    return "OB" if value.startswith("O") else "CB"
+
+def row_to_items(row, columns):
+    cells = {field: " ".join(row[index].split()) for index, field in columns.items() if index < len(row)}
+    event_name = cells.get("event_name", "")
+
+    if "date_time" in cells:
+        pairs = split_date_time(cells["date_time"])
+    else:
+        time_raw = cells.get("time_raw", "")
+        pairs = [(date_raw, time_raw) for date_raw in split_dates(cells.get("date_raw", ""))]
+
+    return [
+        {
+            "event_name": event_name,
+            "date_raw": date_raw,
+            "time_raw": time_raw,
+            "format": normalize_format(cells.get("format", "")),
+            "weightage": cells.get("weightage") or "N/A",
+        }
+        for date_raw, time_raw in pairs
+    ]
+
+def row_confidence(item):
+    """1.0 for a row with a recognisable date (or an explicit TBA), less for rows that only look plausible."""
+    if not item["event_name"]:
+        return 0.0
+    if DATE_PATTERN.search(item["date_raw"]):
+        return 1.0
+    if TBA_PATTERN.search(item["date_raw"]):
+        return 0.8
+    return 0.3
+
+def extract_from_rows(rows):
+    """Returns (items, confidence) for one table's extracted rows."""
+    header_index, columns = find_header(rows)
+    if header_index is None:
+        return [], 0.0
+
+    items = []
+    previous_name = ""
+    for row in rows[header_index + 1:]:
+        if not any(row):
+            continue
+        first = " ".join(row[0].split()).lower() if row else ""
+        if first in SKIP_ROWS:
+            continue
+        for item in row_to_items(row, columns):
+            # Merged cells: a blank component belongs to the row above it
+            if not item["event_name"]:
+                item["event_name"] = previous_name
+            previous_name = item["event_name"]
+            if item["date_raw"] or item["weightage"] != "N/A":
+                items.append(item)
+
+    if not items:
+        return [], 0.0
+    confidence = sum(row_confidence(item) for item in items) / len(items)
+    return items, round(confidence, 2)
+
+def extract_eval_table(page):
+    """Extracts evaluation rows from a fitz page's text layer.
+
+    Returns (items, confidence) where items are EvalExtraction-shaped dicts and
+    confidence is 0..1. Pages without a usable table return ([], 0.0).
+    """
+    anchors = find_anchor_rects(page)
+    best_items, best_confidence = [], 0.0
+
+    for table in find_tables(page):
+        items, confidence = extract_from_rows(table_rows(table))
+        if not items:
+            continue
+        bbox = fitz.Rect(table.bbox)
+        # An evaluation table without its "Evaluation Scheme" heading is a bit less certain
+        if anchors and not any(0 <= bbox.y0 - a.y1 <= ANCHOR_GAP for a in anchors):
+            confidence = round(confidence * 0.9, 2)
+        if confidence > best_confidence:
+            best_items, best_confidence = items, confidence
+
+    return best_items, best_confidence
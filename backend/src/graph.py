@@ -3,16 +3,31 @@ import asyncio
 import time
 
 from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import PydanticOutputParser
-from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableLambda
+from langchain_core.messages import AIMessage
 
 from langgraph.graph import StateGraph, END, START
 
-from src.schema import State, RouteDecision, EvalList, CourseTitle, SyllabusList, ReferenceList
-from src.utils import normalize_event_name, clean_subject_key, predefined, enrich_refs_async
-
-from src.config import AICREDITS_API_KEY
+from src.schema import State, EvalExtraction, ReferenceExtraction
+from src.prompts import PROMPTS
+from src.utils import normalize_event_name, predefined, enrich_refs_async
+from src.render import PageImage
+from src.prerouter import preroute, likely_eval
+from src.title import local_course_title
+from src.scheduler import get_scheduler, PRIORITY_TITLE, PRIORITY_ROUTER, PRIORITY_EXTRACTION
+from src.llm_cache import get_llm_cache
+from src.hedging import hedged
+from src.row_stream import PartialRows
+from src.cassette import Cassette
+from src.metrics import timed, record_llm_call, LLM_ERRORS, LLM_IN_FLIGHT, LLM_CACHE_HITS
+from src.cascade import check_eval_items, record_vision_latency, latency_saved, TIER_TEXT_LAYER, TIER_TEXT_LLM, TIER_VISION
+
+from src.config import AICREDITS_API_KEY, EVAL_TEXT_EXTRACT, EVAL_TEXT_MIN_CONFIDENCE, ROUTER_BATCH_CHARS
+from src.config import PREROUTER, PREROUTER_MIN_CONFIDENCE, VISION_FUSED, LLM_SCHEDULER, SPECULATIVE_EVAL
+from src.config import TITLE_LOCAL, TITLE_LOCAL_MIN_CONFIDENCE
+from src.config import HEDGING, HEDGE_TEXT_MODEL, HEDGE_VISION_MODEL
+from src.config import EVAL_CASCADE, EVAL_CASCADE_MIN_CHARS, STREAM_ROWS
+from src.config import LLM_CASSETTE, LLM_CASSETTE_MODE, LLM_CASSETTE_LATENCY
 # from src.config import GOOGLE_API_KEY, AIGATEWAY_API_KEY
 # from langchain_google_genai import ChatGoogleGenerativeAI
 
@@ -50,7 +65,9 @@ llm = ChatOpenAI(
     openai_api_base="https://api.aicredits.in/v1",
     openai_api_key=AICREDITS_API_KEY,
     temperature=0,
-    max_retries=3, 
+    # Retries and 429 backoff are handled by the shared scheduler (src/scheduler.py)
+    max_retries=0 if LLM_SCHEDULER else 3,
+    include_response_headers=True,
 )
 
 vision_llm = ChatOpenAI(
@@ -59,9 +76,34 @@ vision_llm = ChatOpenAI(
     openai_api_base="https://api.aicredits.in/v1",
     openai_api_key=AICREDITS_API_KEY,
     temperature=0,
-    max_retries=3 
+    max_retries=0 if LLM_SCHEDULER else 3,
+    include_response_headers=True,
 )
 
+# Optional second models for hedged duplicates (HEDGING); None hedges to the same model
+def hedge_model(model_name):
+    if not model_name:
+        return None
+    return ChatOpenAI(
+        model_name=model_name,
+        openai_api_base="https://api.aicredits.in/v1",
+        openai_api_key=AICREDITS_API_KEY,
+        temperature=0,
+        max_retries=0 if LLM_SCHEDULER else 3,
+        include_response_headers=True,
+    )
+
+hedge_llm = hedge_model(HEDGE_TEXT_MODEL)
+hedge_vision_llm = hedge_model(HEDGE_VISION_MODEL)
+
+# Offline / deterministic runs: every model call is recorded to or replayed from a cassette
+if LLM_CASSETTE:
+    cassette = Cassette(LLM_CASSETTE, LLM_CASSETTE_MODE, LLM_CASSETTE_LATENCY)
+    llm, vision_llm = cassette.wrap(llm), cassette.wrap(vision_llm)
+    hedge_llm = cassette.wrap(hedge_llm) if hedge_llm is not None else None
+    hedge_vision_llm = cassette.wrap(hedge_vision_llm) if hedge_vision_llm is not None else None
+    print(f"📼 LLM cassette {LLM_CASSETTE} ({LLM_CASSETTE_MODE})")
+
 # ------------------------------------------------------------------------------
 # CASE 3: Development / Testing (Archived)
 # Text & Vision: google/gemma-4-26b-a4b-it (AIGateway ONLY Promo)
@@ -85,141 +127,368 @@ vision_llm = ChatOpenAI(
 #     max_retries=3 
 # )
 
-async def extract_course_title(text: str, image_b64: str = ""):
-    parser = PydanticOutputParser(pydantic_object=CourseTitle)
-    
-    system_message = '''
-    Analyze the text to identify the Main Subject or Course Name of this document.
-    
-    CONTEXT: This is a university course handout.
-    
-    INSTRUCTIONS:
-    1. Find the descriptive English name (e.g. "Digital Design", "Microprocessors", "General Biology").
-    2. Ignore alphanumeric codes (like "CS F215", "EEE F111") if a descriptive name is present.
-    3. Ignore labels like "Course Title:", "Course No:", "Part II" - just extract the name itself.
-    
-    Examples:
-    - Text: "EEE F211 Electrical Machines" -> Output: "Electrical Machines"
-    - Text: "BITS PILANI ... GENERAL BIOLOGY" -> Output: "General Biology"
-    
-    {format_instructions}
-    '''
-
-    # Vision Fallback for scanned PDFs
-    if len(text.strip()) < 50 and image_b64 and vision_llm:
-        formatted_sys = system_message.format(format_instructions=parser.get_format_instructions())
-        message = HumanMessage(content=[
-            {"type": "text", "text": formatted_sys}, 
-            {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{image_b64}"}}
-        ])
+# ------------------------------------------------------------------------------
+# Every model call goes through these two functions. They look `llm` / `vision_llm`
+# up at call time, so the chains below can be compiled once at import. Calls made
+# for a prompt (`spec`) are answered from the response cache when possible; the rest
+# queue on the provider's shared scheduler (rate limits, adaptive concurrency, retries).
+# ------------------------------------------------------------------------------
+def streaming_call(model, on_chunk):
+    """`model.ainvoke`, but through astream so that `on_chunk(text)` sees the completion as it is generated."""
+    async def call(messages):
+        response = None
+        async for chunk in model.astream(messages):
+            if isinstance(chunk.content, str) and chunk.content:
+                on_chunk(chunk.content)
+            response = chunk if response is None else response + chunk
+        return response
+    return call
+
+def model_label(model):
+    return getattr(model, "model_name", None) or type(model).__name__
+
+async def invoke_model(model, messages, priority, on_chunk=None, node="unknown", on_acquire=None):
+    call = streaming_call(model, on_chunk) if on_chunk is not None else model.ainvoke
+    name = model_label(model)
+    LLM_IN_FLIGHT.inc(node=node)
+    start_time = time.perf_counter()
+    try:
+        if not LLM_SCHEDULER:
+            if on_acquire is not None:
+                on_acquire()
+            response = await call(messages)
+        else:
+            scheduler = get_scheduler(getattr(model, "openai_api_base", None) or type(model).__name__)
+            response = await scheduler.run(call, messages, priority, on_acquire)
+    except Exception as e:
+        LLM_ERRORS.inc(node=node, model=name, error=type(e).__name__)
+        raise
+    finally:
+        LLM_IN_FLIGHT.dec(node=node)
+    record_llm_call(node, name, messages, response, time.perf_counter() - start_time)
+    return response
+
+async def call_model(model, messages, priority, spec=None, hedge_with=None, on_chunk=None):
+    node = spec.name if spec is not None else "unknown"
+    cache = get_llm_cache() if spec is not None else None
+    if cache:
+        key = cache.key(model_label(model), spec.version, messages)
+        content = await cache.get(key)
+        if content is not None:
+            LLM_CACHE_HITS.inc(node=node)
+            if on_chunk is not None:
+                on_chunk(content)
+            return AIMessage(content=content)
+
+    if HEDGING and spec is not None:
+        # Two attempts can't share one stream: rows are emitted once the winner is known.
+        # The hedge clock starts once the first attempt leaves the scheduler queue.
+        sent, hedge_sent = asyncio.Event(), asyncio.Event()
+        response = await hedged(
+            lambda m: invoke_model(model, m, priority, node=node, on_acquire=sent.set), messages, spec.name, spec.parser.invoke,
+            hedge_call=lambda m: invoke_model(model if hedge_with is None else hedge_with, m, priority, node=node, on_acquire=hedge_sent.set),
+            started=sent, hedge_started=hedge_sent,
+        )
+        if on_chunk is not None and isinstance(getattr(response, "content", None), str):
+            on_chunk(response.content)
+    else:
+        response = await invoke_model(model, messages, priority, on_chunk, node)
+
+    if cache:
         try:
-            response = await vision_llm.ainvoke([message])
-            result = parser.invoke(response)
+            spec.parser.invoke(response) # Never cache a response the node would reject
+            await cache.put(key, getattr(response, "content", response))
+        except Exception:
+            pass
+    return response
+
+async def call_text_llm(messages, priority=PRIORITY_EXTRACTION, spec=None):
+    return await call_model(llm, messages, priority, spec, hedge_llm)
+
+async def call_vision_llm(messages, priority=PRIORITY_EXTRACTION, spec=None, on_chunk=None):
+    return await call_model(vision_llm, messages, priority, spec, hedge_vision_llm, on_chunk)
+
+def text_model(spec, priority):
+    """The text model as a chain step for `spec`, queued at the given scheduler priority."""
+    async def call(messages):
+        return await call_text_llm(messages, priority, spec)
+    return RunnableLambda(call)
+
+# Precompiled text-node chains: prompt | model | parser, built once per process
+CHAIN_PRIORITIES = {
+    "course_title": PRIORITY_TITLE, "router": PRIORITY_ROUTER, "router_batch": PRIORITY_ROUTER,
+    "eval_text": PRIORITY_EXTRACTION,
+}
+CHAINS = {
+    name: PROMPTS[name].chat_template | text_model(PROMPTS[name], priority) | PROMPTS[name].parser
+    for name, priority in CHAIN_PRIORITIES.items()
+}
+
+# Streamed rows: the top-level lists of each vision prompt's answer and the row kind they hold
+ROW_FIELDS = {
+    "eval": {"items": ("eval", EvalExtraction)},
+    "references": {"items": ("reference", ReferenceExtraction)},
+    "fused": {"evaluations": ("eval", EvalExtraction), "references": ("reference", ReferenceExtraction)},
+}
+ROW_FIELDS["fused_syllabus"] = ROW_FIELDS["fused"]
+
+def emit_rows(state: State, kind, rows):
+    """Hands finished rows to the caller's `on_row(kind, data)`; EVAL rows go through the aggregator first."""
+    on_row = state.get("on_row")
+    if on_row is None or not rows:
+        return
+    if kind == "eval":
+        rows = aggregator_node({
+            "eval_data": rows,
+            "known_course_title": state.get("known_course_title", ""),
+            "user_date_format": state.get("user_date_format", "DMY"),
+        })["final_schedule"]
+    for row in rows:
+        on_row(kind, row)
+
+def row_streamer(state: State, spec):
+    """A chunk callback that emits each row of `spec`'s answer as soon as it is generated (None if nobody listens)."""
+    if not STREAM_ROWS or state.get("on_row") is None or spec.name not in ROW_FIELDS:
+        return None
+    scanner = PartialRows()
+    fields = ROW_FIELDS[spec.name]
+
+    def on_chunk(text):
+        for key, row in scanner.feed(text):
+            if key not in fields:
+                continue
+            kind, schema = fields[key]
+            try:
+                emit_rows(state, kind, [schema.model_validate(row).model_dump()])
+            except Exception as e:
+                print(f"[DEBUG] !!! Streamed row skipped= {e}")
+    return on_chunk
+
+async def get_page_image(state: State):
+    """Returns the page's shared PageImage, rendering it lazily (once per request) if only a page handle was passed."""
+    page = state.get("page")
+    if page is not None:
+        image = await page.aimage()
+        if image is not None:
+            return image
+    image_b64 = state.get("page_image_b64", "")
+    if image_b64:
+        return PageImage.from_b64(image_b64)
+    return None
+
+async def get_eval_image(state: State):
+    """Like get_page_image, but cropped to the detected evaluation table when one is found."""
+    page = state.get("page")
+    if page is not None:
+        image = await page.aeval_image()
+        if image is not None:
+            return image
+    return await get_page_image(state)
+
+async def confident_local_title(text: str, page=None):
+    """The course title read from page 1 without a model call, or None when it isn't clear enough."""
+    if not TITLE_LOCAL:
+        return None
+    metadata, lines = "", []
+    if page is not None:
+        try:
+            metadata, lines = await asyncio.to_thread(page.title_hints)
+        except Exception as e:
+            print(f"Local title hints error= {e}")
+    title, confidence = local_course_title(text, metadata, lines)
+    if not title or confidence < TITLE_LOCAL_MIN_CONFIDENCE:
+        return None
+    print(f"[DEBUG] Course title read locally: {title} (confidence {confidence:.2f}), no LLM call")
+    return title
+
+@timed("title")
+async def extract_course_title(text: str, image_b64: str = "", page=None, local=True):
+    """Course title of the handout: read locally when page 1 states it (unless local=False), else from the LLM."""
+    if local:
+        title = await confident_local_title(text, page)
+        if title:
+            return title
+
+    spec = PROMPTS["course_title"]
+
+    # Vision Fallback for scanned PDFs (the page is only rendered when the text layer is empty)
+    image = None
+    if len(text.strip()) < 50 and vision_llm:
+        image = await get_page_image({"page_image_b64": image_b64, "page": page})
+    if image is not None:
+        try:
+            response = await call_vision_llm([spec.vision_message(image)], PRIORITY_TITLE, spec)
+            result = spec.parser.invoke(response)
             return result.title
         except Exception as e:
             print(f"Vision Title Extraction error= {e}")
             return "Unknown Course"
 
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", system_message),
-        ("human", "{text}"),
-    ])
-
-    chain = prompt | llm | parser
-
     try:
-        result = await chain.ainvoke({
-            "text": text[:3000],
-            "format_instructions": parser.get_format_instructions()
-        })
+        result = await CHAINS["course_title"].ainvoke({"text": text[:3000]})
         return result.title
     
     except Exception as e:
         print(f"extracting course error= {e}")
         return "Unknown Course"
-    # - 'SYLLABUS': Contains Course Plan, Topics, Lectures, Learning Objectives. (DISABLED: Uncomment when syllabus feature is needed)
+
+VALID_CATEGORIES = {"EVAL", "SYLLABUS", "REFERENCES", "SKIP"}
+# Per-page text sent to the router (both modes)
+ROUTER_PAGE_CHARS = 3000
+
+def confident_preroute(text):
+    """The local pre-router's categories when it is sure enough to skip the LLM, else None."""
+    if not PREROUTER:
+        return None
+    categories, confidence = preroute(text)
+    if confidence < PREROUTER_MIN_CONFIDENCE:
+        return None
+    print(f"[DEBUG] Pre-router: {categories} (confidence {confidence:.2f}), no LLM call")
+    return categories
+
+# Speculative eval extraction: started next to the LLM router on likely evaluation pages.
+# "kept" / "started" is the hit rate; "wasted_calls" counts discarded speculations that had
+# already gone to the vision model (text-layer answers cost nothing).
+SPECULATION_STATS = {"started": 0, "kept": 0, "discarded": 0, "wasted_calls": 0}
+
+class Speculation:
+    def __init__(self, state):
+        self.used_vision = False
+        # Rows are emitted by the orchestrator once the router has confirmed EVAL
+        self.task = asyncio.create_task(self._run({**state, "on_row": None}))
+        SPECULATION_STATS["started"] += 1
+
+    async def _run(self, state):
+        return await eval_extractor_node(state, before_vision=self._mark_vision)
+
+    def _mark_vision(self):
+        self.used_vision = True
+
+    async def result(self):
+        SPECULATION_STATS["kept"] += 1
+        return await self.task
+
+    def discard(self):
+        self.task.cancel()
+        SPECULATION_STATS["discarded"] += 1
+        if self.used_vision:
+            SPECULATION_STATS["wasted_calls"] += 1
 
 async def router_node(state: State):
-    parser = PydanticOutputParser(pydantic_object=RouteDecision)
-    
-    system_message = '''
-    You are a document classifier for university handouts.
-    Analyze the text and categorize it. It may belong to multiple categories.
-    Categories:
-    - 'EVAL': MUST contain an actual Evaluation Scheme, Exam Schedule, list of Quizzes, Mid-Sem dates, Comprehensive exam dates, or Weightage tables. Do NOT classify general grading notices or make-up policies as EVAL unless actual dates or weightages are present. Do NOT classify Course Plans, Lecture Schedules, or lists of academic topics as EVAL.
-    - 'REFERENCES': Contains Textbooks, Reference Books, required reading materials.
-    - 'SKIP': General introduction, textbook lists without schedules, or completely irrelevant.
-    
-    Return a list of the applicable categories. If none apply, return ['SKIP'].
-    
-    {format_instructions}
-    '''
-    
+    # Batched router (ROUTER_MODE=document) already classified this page
+    if state.get("classification"):
+        return {"classification": state["classification"]}
+
+    local = confident_preroute(state.get("raw_text", ""))
+    if local:
+        return {"classification": local}
+
     raw_text = state.get("raw_text", "").strip()
     
     # Vision Fallback for scanned PDFs or images
     if len(raw_text) < 50:
-        image_b64 = state.get("page_image_b64", "")
-        if image_b64 and vision_llm:
-            formatted_sys = system_message.format(format_instructions=parser.get_format_instructions())
-            message = HumanMessage(content=[
-                {"type": "text", "text": formatted_sys}, 
-                {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{image_b64}"}}
-            ])
+        image = await get_page_image(state)
+        if image is not None and vision_llm:
+            spec = PROMPTS["router"]
             try:
-                response = await vision_llm.ainvoke([message])
-                result = parser.invoke(response)
+                response = await call_vision_llm([spec.vision_message(image)], PRIORITY_ROUTER, spec)
+                result = spec.parser.invoke(response)
                 return {"classification": result.categories}
             except Exception as e:
                 print(f"Vision Router error= {e}")
                 return {"classification": ["SKIP"]}
         else:
             return {"classification": ["SKIP"]}
-            
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", system_message),
-        ("human", "{text}"),
-    ])
 
-    chain = prompt | llm | parser
+    speculation = None
+    if SPECULATIVE_EVAL and state.get("page") is not None and likely_eval(raw_text):
+        print("[DEBUG] Speculative EVAL extraction started alongside the router")
+        speculation = Speculation(state)
 
     try:
-        result = await chain.ainvoke({
-            "text": raw_text[:3000],
-            "format_instructions": parser.get_format_instructions()
-        })
+        result = await CHAINS["router"].ainvoke({"text": raw_text[:ROUTER_PAGE_CHARS]})
         categories = result.categories
+    except asyncio.CancelledError:
+        # The page was cancelled: don't leave its speculative extraction running
+        if speculation is not None:
+            speculation.discard()
+        raise
     except Exception as e:
         print(f"Router error= {e}")
         categories = ["SKIP"]
 
-    return {"classification": categories}
-
+    if speculation is None:
+        return {"classification": categories}
+    if "EVAL" not in categories or "SKIP" in categories:
+        print(f"[DEBUG] Router said {categories}, discarding speculative EVAL extraction")
+        speculation.discard()
+        return {"classification": categories}
+    return {"classification": categories, "speculative_eval": speculation}
+
+def split_router_batches(page_texts, max_chars=ROUTER_BATCH_CHARS):
+    """Groups {page_num: text} into batches of at most `max_chars` (each page truncated like the per-page router)."""
+    batches, current, size = [], {}, 0
+    for page_num, text in page_texts.items():
+        text = text.strip()[:ROUTER_PAGE_CHARS]
+        if current and size + len(text) > max_chars:
+            batches.append(current)
+            current, size = {}, 0
+        current[page_num] = text
+        size += len(text)
+    if current:
+        batches.append(current)
+    return batches
+
+async def route_batch(batch):
+    text = "\n\n".join(f"=== PAGE {page_num} ===\n{page_text}" for page_num, page_text in batch.items())
+    start_time = time.time()
+    print(f"[DEBUG] >>> Sending batched ROUTER request for pages {list(batch)}...")
+    result = await CHAINS["router_batch"].ainvoke({"text": text})
+    print(f"[DEBUG] <<< Received batched ROUTER response in {time.time() - start_time:.2f}s!")
+
+    routes = {}
+    for route in result.pages:
+        categories = [c.upper() for c in route.categories if c.upper() in VALID_CATEGORIES]
+        if route.page in batch and categories:
+            routes[route.page] = categories
+    return routes
+
+async def route_pages(page_texts, max_chars=ROUTER_BATCH_CHARS):
+    """Classifies many pages with one router call per batch (ROUTER_MODE=document).
+
+    `page_texts` is {page_num: text}. Returns {page_num: categories} for the pages the
+    model answered (or the local pre-router settled); scanned pages (too little text),
+    pages it left out and failed batches are simply missing, so router_node classifies
+    those on its own.
+    """
+    routes, texts = {}, {}
+    for page_num, text in page_texts.items():
+        local = confident_preroute(text)
+        if local:
+            routes[page_num] = local
+        elif len(text.strip()) >= 50:
+            texts[page_num] = text
+    batches = split_router_batches(texts, max_chars)
+    if not batches:
+        return routes
+
+    results = await asyncio.gather(*(route_batch(batch) for batch in batches), return_exceptions=True)
+    for batch, res in zip(batches, results):
+        if isinstance(res, Exception):
+            print(f"Batched router error for pages {list(batch)}= {res}")
+            continue
+        routes.update(res)
+    print(f"🧭 Batched router: {len(routes)}/{len(page_texts)} pages classified with {len(batches)} LLM call(s)")
+    return routes
+
+@timed("vision_eval_extractor")
 async def vision_eval_extractor_node(state: State):
-    parser = PydanticOutputParser(pydantic_object=EvalList)
-    
-    system_text = f'''
-    Extract Exam Dates, Times, Format, and Weightage from the provided image of a university syllabus.
+    spec = PROMPTS["eval"]
     
-    CRITICAL INSTRUCTION:
-    1. You are analyzing an image from an INDIAN UNIVERSITY. 
-    2. Dates are strictly DD/MM/YYYY.
-    3. ONLY extract items from the official Evaluation/Grading Scheme table. IGNORE weekly lecture schedules and class plans.
+    # Only the evaluation table region is sent when it can be located from the text layer
+    image = await get_eval_image(state)
     
-    EXTRACTION RULES:
-    1. Extract 'event_name' (e.g. "Quiz 1", "Mid-Sem Exam", "Comprehensive Exam").
-    2. Output 'date_raw' exactly as it is written in the document. Do not reformat.
-    3. If an event has multiple dates, create TWO separate items in the list.
-    4. Extract 'time_raw'. Output exactly what is written (e.g. '4-5:30 PM', 'FN', 'AN').
-    5. Extract 'format'. Look for 'OB' or 'CB'. If missing, return 'TBA'.
-    6. Extract 'weightage'. If missing, return 'N/A'.
-    
-    {parser.get_format_instructions()}
-    '''
-    
-    image_b64 = state.get("page_image_b64", "")
-    
-    if not image_b64:
+    if image is None:
         print("Vision Extractor: No image provided!")
         return {"eval_data": []}
         
@@ -227,24 +496,123 @@ async def vision_eval_extractor_node(state: State):
         print("Vision Extractor: GOOGLE_API_KEY is missing! Cannot run vision model.")
         return {"eval_data": []}
 
-    message = HumanMessage(
-        content=[
-            {"type": "text", "text": system_text},
-            {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{image_b64}"}},
-        ]
-    )
-
     try:
         start_time = time.time()
         print(f"[DEBUG] >>> Sending EVAL Vision LLM request...")
-        response = await vision_llm.ainvoke([message])
+        response = await call_vision_llm([spec.vision_message(image)], spec=spec, on_chunk=row_streamer(state, spec))
         print(f"[DEBUG] <<< Received EVAL Vision LLM response in {time.time() - start_time:.2f}s!")
-        result = parser.invoke(response)
+        result = spec.parser.invoke(response)
+        record_vision_latency(time.time() - start_time)
         return {"eval_data": [item.model_dump() for item in result.items]}
     except Exception as e:
         print(f"[DEBUG] !!! Vision extractor error= {e}")
         return {"eval_data": []}
 
+# Syllabus extraction is switched off (see the commented-out SYLLABUS branches in the orchestrator);
+# flip this together with them so the fused call asks for it too.
+SYLLABUS_ENABLED = False
+
+async def text_layer_eval(state: State):
+    """Evaluation rows from the text layer when they are confident enough to skip vision, else None."""
+    page = state.get("page")
+    if not EVAL_TEXT_EXTRACT or page is None:
+        return None
+    try:
+        items, confidence = await asyncio.to_thread(page.eval_rows)
+        if items and confidence >= EVAL_TEXT_MIN_CONFIDENCE:
+            print(f"[DEBUG] EVAL read from text layer ({len(items)} rows, confidence {confidence:.2f}), skipping vision")
+            return items
+        if items:
+            print(f"[DEBUG] EVAL text layer confidence {confidence:.2f} too low, falling back to vision")
+    except Exception as e:
+        print(f"[DEBUG] !!! Text-layer eval extractor error= {e}")
+    return None
+
+async def text_llm_eval(state: State):
+    """EVAL rows from the text model (EVAL_CASCADE) when they pass check_eval_items, else None."""
+    raw_text = state.get("raw_text", "").strip()
+    if not EVAL_CASCADE or len(raw_text) < EVAL_CASCADE_MIN_CHARS:
+        return None
+    try:
+        start_time = time.time()
+        result = await CHAINS["eval_text"].ainvoke({"text": raw_text})
+        items = [item.model_dump() for item in result.items]
+        ok, reason = check_eval_items(items, state.get("user_date_format", "DMY"))
+        if ok:
+            print(f"[DEBUG] EVAL read by the text model ({len(items)} rows) in {time.time() - start_time:.2f}s, skipping vision")
+            return items
+        print(f"[DEBUG] EVAL text model answer rejected ({reason}), falling back to vision")
+    except Exception as e:
+        print(f"[DEBUG] !!! Text-model eval extractor error= {e}")
+    return None
+
+async def cheap_eval(state: State):
+    """(items, tier) from the text-layer table or the text model; (None, None) when vision is needed."""
+    items = await text_layer_eval(state)
+    if items is not None:
+        return items, TIER_TEXT_LAYER
+    items = await text_llm_eval(state)
+    if items is not None:
+        return items, TIER_TEXT_LLM
+    return None, None
+
+def eval_tier(tier, elapsed):
+    """State keys recording which tier answered EVAL, for the per-handout cascade report."""
+    return {"eval_tier": tier, "eval_saved": latency_saved(tier, elapsed)}
+
+@timed("eval_extractor")
+async def eval_extractor_node(state: State, before_vision=None, cheap_elapsed=None):
+    """Reads the evaluation table from the text layer (or the text model) when it can, and asks the vision model otherwise.
+
+    `cheap_elapsed` means the caller already ran (and rejected) the cheaper tiers in that many seconds.
+    """
+    items = None
+    if cheap_elapsed is None:
+        start_time = time.time()
+        items, tier = await cheap_eval(state)
+        elapsed = time.time() - start_time
+    else:
+        elapsed = cheap_elapsed
+    if items is not None:
+        emit_rows(state, "eval", items)
+        return {"eval_data": items, **eval_tier(tier, elapsed)}
+    if before_vision is not None:
+        before_vision()
+    result = await vision_eval_extractor_node(state)
+    return {**result, **eval_tier(TIER_VISION, elapsed)}
+
+@timed("vision_fused_extractor")
+async def vision_fused_extractor_node(state: State, categories):
+    """One vision call for a page that needs several extractions (EVAL + REFERENCES, plus SYLLABUS when enabled).
+
+    Returns the same keys as the separate extractors, or None if the call failed
+    so the orchestrator can fall back to one call per category.
+    """
+    with_syllabus = SYLLABUS_ENABLED and "SYLLABUS" in categories
+    spec = PROMPTS["fused_syllabus" if with_syllabus else "fused"]
+
+    image = await get_page_image(state)
+    if image is None or not vision_llm:
+        return None
+
+    try:
+        start_time = time.time()
+        print(f"[DEBUG] >>> Sending FUSED Vision LLM request for {sorted(categories)}...")
+        response = await call_vision_llm([spec.vision_message(image)], spec=spec, on_chunk=row_streamer(state, spec))
+        print(f"[DEBUG] <<< Received FUSED Vision LLM response in {time.time() - start_time:.2f}s!")
+        result = spec.parser.invoke(response)
+    except Exception as e:
+        print(f"[DEBUG] !!! Fused extractor error= {e}, falling back to separate calls")
+        return None
+
+    fused = {
+        "eval_data": [item.model_dump() for item in result.evaluations],
+        "reference_data": [item.model_dump() for item in result.references],
+    }
+    if with_syllabus:
+        fused["syllabus_data"] = [item.model_dump() for item in result.syllabus]
+    return fused
+
 def aggregator_node(state: State):
     eval_data = state.get("eval_data", [])
     title = state.get("known_course_title", "Unknown").strip()
@@ -287,58 +655,37 @@ def aggregator_node(state: State):
 
     return {"final_schedule": final_schedule}
 
+@timed("vision_syllabus_extractor")
 async def vision_syllabus_extractor_node(state: State):
-    parser = PydanticOutputParser(pydantic_object=SyllabusList)
-    
-    system_text = f'''
-    Extract the Course Syllabus / Lecture Plan from the provided image.
+    spec = PROMPTS["syllabus"]
     
-    EXTRACTION RULES:
-    1. Extract 'module_name' (the name of the topic or unit).
-    2. Extract 'number_of_lectures' (the number of lectures allocated to this topic, e.g., '6', '12').
-    3. If lecture counts are not present, estimate or put 'N/A'.
+    image = await get_page_image(state)
+    if image is None or not vision_llm: return {"syllabus_data": []}
     
-    {parser.get_format_instructions()}
-    '''
-    
-    image_b64 = state.get("page_image_b64", "")
-    if not image_b64 or not vision_llm: return {"syllabus_data": []}
-    
-    message = HumanMessage(content=[{"type": "text", "text": system_text}, {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{image_b64}"}}])
     try:
         start_time = time.time()
         print(f"[DEBUG] >>> Sending SYLLABUS Vision LLM request...")
-        response = await vision_llm.ainvoke([message])
+        response = await call_vision_llm([spec.vision_message(image)], spec=spec)
         print(f"[DEBUG] <<< Received SYLLABUS Vision LLM response in {time.time() - start_time:.2f}s!")
-        result = parser.invoke(response)
+        result = spec.parser.invoke(response)
         return {"syllabus_data": [item.model_dump() for item in result.items]}
     except Exception as e:
         print(f"[DEBUG] !!! Syllabus extractor error= {e}")
         return {"syllabus_data": []}
 
+@timed("vision_reference_extractor")
 async def vision_reference_extractor_node(state: State):
-    parser = PydanticOutputParser(pydantic_object=ReferenceList)
-    
-    system_text = f'''
-    Extract the Textbooks and Reference Books from the provided image.
+    spec = PROMPTS["references"]
     
-    EXTRACTION RULES:
-    1. Extract the 'title' of the book.
-    2. Extract the 'author' of the book.
+    image = await get_page_image(state)
+    if image is None or not vision_llm: return {"reference_data": []}
     
-    {parser.get_format_instructions()}
-    '''
-    
-    image_b64 = state.get("page_image_b64", "")
-    if not image_b64 or not vision_llm: return {"reference_data": []}
-    
-    message = HumanMessage(content=[{"type": "text", "text": system_text}, {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{image_b64}"}}])
     try:
         start_time = time.time()
         print(f"[DEBUG] >>> Sending REFERENCES Vision LLM request...")
-        response = await vision_llm.ainvoke([message])
+        response = await call_vision_llm([spec.vision_message(image)], spec=spec, on_chunk=row_streamer(state, spec))
         print(f"[DEBUG] <<< Received REFERENCES Vision LLM response in {time.time() - start_time:.2f}s!")
-        result = parser.invoke(response)
+        result = spec.parser.invoke(response)
         return {"reference_data": [item.model_dump() for item in result.items]}
     except Exception as e:
         print(f"[DEBUG] !!! Reference extractor error= {e}")
@@ -356,10 +703,42 @@ async def vision_orchestrator_node(state: State):
     if not categories or "SKIP" in categories:
         return results
     
+    # A speculative extraction the router confirmed already has (or is fetching) the EVAL rows
+    eval_items = None
+    speculation = state.get("speculative_eval")
+    if speculation is not None and "EVAL" in categories:
+        try:
+            speculated = await speculation.result() # Cancelling the orchestrator cancels the speculation too
+            eval_items = speculated.get("eval_data", [])
+            emit_rows(state, "eval", eval_items)
+            results.update({key: speculated[key] for key in ("eval_tier", "eval_saved") if key in speculated})
+        except Exception as e:
+            print(f"Orchestrator error in speculative EVAL: {e}")
+
+    # Pages that need several vision extractions get one fused call (one image upload).
+    # If the text layer (or the text model) already answered EVAL, only REFERENCES is left for vision.
+    cheap_elapsed = None
+    if eval_items is None and VISION_FUSED and "EVAL" in categories and "REFERENCES" in categories:
+        start_time = time.time()
+        eval_items, tier = await cheap_eval(state)
+        elapsed = time.time() - start_time
+        if eval_items is not None:
+            emit_rows(state, "eval", eval_items)
+            results.update(eval_tier(tier, elapsed))
+        else:
+            cheap_elapsed = elapsed # Don't ask the text model again if the fused call fails
+            fused = await vision_fused_extractor_node(state, categories)
+            if fused is not None:
+                results.update(fused)
+                results.update(eval_tier(TIER_VISION, elapsed))
+                return results
+    
     # Build async tasks for true concurrent fan-out (no threads needed)
     tasks = {}
-    if "EVAL" in categories:
-        tasks["EVAL"] = vision_eval_extractor_node(state)
+    if eval_items is not None:
+        results["eval_data"] = eval_items
+    elif "EVAL" in categories:
+        tasks["EVAL"] = eval_extractor_node(state, cheap_elapsed=cheap_elapsed)
     # DISABLED: Syllabus extraction commented out for cost/speed optimization.
     # Uncomment below (+ router prompt category) to re-enable when syllabus feature is ready.
     # if "SYLLABUS" in categories:
@@ -377,6 +756,7 @@ async def vision_orchestrator_node(state: State):
                 continue
             if cat == "EVAL":
                 results["eval_data"] = res.get("eval_data", [])
+                results.update({key: res[key] for key in ("eval_tier", "eval_saved") if key in res})
             # elif cat == "SYLLABUS":
             #     results["syllabus_data"] = res.get("syllabus_data", [])
             elif cat == "REFERENCES":
@@ -404,10 +784,12 @@ async def post_process_node(state: State):
 # GRAPH NOW
 workflow = StateGraph(State)
 
-workflow.add_node("router", router_node)
-workflow.add_node("vision_orchestrator", vision_orchestrator_node)
-workflow.add_node("aggregator", aggregator_node)
-workflow.add_node("post_process", post_process_node)
+# Nodes are timed here, not where they're defined: aggregator_node also runs outside the
+# graph (streamed rows, cached pages, re-titling) and those calls aren't node runs.
+workflow.add_node("router", timed("router")(router_node))
+workflow.add_node("vision_orchestrator", timed("vision_orchestrator")(vision_orchestrator_node))
+workflow.add_node("aggregator", timed("aggregator")(aggregator_node))
+workflow.add_node("post_process", timed("post_process")(post_process_node))
 
 workflow.add_edge(START, "router")
 workflow.add_conditional_edges(
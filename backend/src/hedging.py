@@ -0,0 +1,130 @@
+import time
+import asyncio
+from collections import deque
+
+from src.config import HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES, HEDGE_WINDOW
+
+# ==============================================================================
+# HEDGED REQUESTS
+# A handful of slow model calls decide how long a whole upload takes. With
+# hedging on, a call that hasn't returned after the HEDGE_PERCENTILE of that
+# node's recent latencies gets a duplicate (to the same model, or to a second
+# one when configured); the first response that parses wins and the other is
+# cancelled. Until a node has HEDGE_MIN_SAMPLES latencies nothing is hedged.
+# The clock (for the threshold and the latencies alike) starts when the first
+# attempt gets its scheduler slot: a call waiting in the queue isn't slow, and
+# a duplicate would only queue behind it.
+# Per node, the stats keep the latency of the first attempt alone ("before")
+# next to what callers actually waited ("after"), and the extra calls it cost.
+# ==============================================================================
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of `samples` (None when empty)."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+class NodeLatency:
+    def __init__(self, window=HEDGE_WINDOW):
+        self.first_attempt = deque(maxlen=window)
+        self.observed = deque(maxlen=window)
+        self.calls = 0
+        self.hedges = 0
+        self.extra_calls = 0
+        self.hedge_wins = 0
+
+    def threshold(self, pct, min_samples):
+        if len(self.observed) < min_samples:
+            return None
+        return percentile(self.observed, pct)
+
+    def summary(self):
+        def pcts(samples):
+            return {f"p{p}": round(percentile(samples, p) or 0.0, 3) for p in (50, 95, 99)}
+        return {
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "extra_calls": self.extra_calls,
+            "first_attempt": pcts(self.first_attempt),
+            "observed": pcts(self.observed),
+        }
+
+_latencies = {}
+
+def node_latency(node):
+    if node not in _latencies:
+        _latencies[node] = NodeLatency()
+    return _latencies[node]
+
+def hedging_stats():
+    """{node: summary} for every node that has made a call."""
+    return {node: latency.summary() for node, latency in _latencies.items()}
+
+async def hedged(call, messages, node, validate, hedge_call=None, pct=None, started=None, hedge_started=None):
+    """`await call(messages)`, duplicated through `hedge_call` (default: `call`) if it runs past the node's percentile.
+
+    `validate(response)` must raise for a response the node would reject; an invalid
+    first answer doesn't win while the other attempt is still running. If no attempt is
+    valid, the last response is returned (the node's parser reports it as before).
+    `started`, an asyncio.Event the first attempt sets once it is actually sent, starts
+    the clock; without it the clock starts right away. `hedge_started`, the duplicate's
+    event, decides whether a hedge counts as an extra call: one cancelled while it was
+    still queued never reached the provider.
+    """
+    latency = node_latency(node)
+    latency.calls += 1
+    delay = latency.threshold(HEDGE_PERCENTILE if pct is None else pct, HEDGE_MIN_SAMPLES)
+
+    primary = asyncio.create_task(call(messages))
+    attempts = {primary}
+    last_response, last_error = None, None
+    waiting = hedge = None
+    start = time.monotonic()
+    try:
+        if started is not None:
+            waiting = asyncio.create_task(started.wait())
+            await asyncio.wait({primary, waiting}, return_when=asyncio.FIRST_COMPLETED)
+        start = time.monotonic()
+        if delay is not None and not primary.done():
+            done, _ = await asyncio.wait(attempts, timeout=delay)
+            if not done:
+                latency.hedges += 1
+                hedge = asyncio.create_task((hedge_call or call)(messages))
+                attempts.add(hedge)
+
+        while attempts:
+            done, attempts = await asyncio.wait(attempts, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task is primary:
+                    latency.first_attempt.append(time.monotonic() - start)
+                try:
+                    response = task.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                try:
+                    validate(response)
+                except Exception:
+                    last_response = response
+                    continue
+                if task is not primary:
+                    latency.hedge_wins += 1
+                latency.observed.append(time.monotonic() - start)
+                return response
+        if last_response is not None:
+            latency.observed.append(time.monotonic() - start)
+            return last_response
+        raise last_error
+    finally:
+        if waiting is not None:
+            waiting.cancel()
+        for task in attempts:
+            task.cancel()
+        if hedge is not None and (hedge_started is None or hedge_started.is_set()):
+            latency.extra_calls += 1
+        if not primary.done():
+            # Cancelled by a faster hedge: its latency is at least this long
+            latency.first_attempt.append(time.monotonic() - start)
@@ -0,0 +1,180 @@
+import os
+import asyncio
+import hashlib
+import tempfile
+
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from src.config import UPLOAD_CHUNK_BYTES, UPLOAD_SPILL_BYTES
+
+# ==============================================================================
+# UPLOAD INGEST
+# /generate parses its multipart body itself (ingest_form) instead of through
+# FastAPI's File()/Form(): Starlette would first receive the whole upload into
+# its own spool file (on disk past 1 MB), so nothing could be hashed on receipt
+# and big uploads were written to disk twice. Here the PDF is hashed as its
+# bytes arrive (hashlib releases the GIL for large updates, so hashing runs in
+# a worker thread, off the event loop). Small PDFs stay in one in-memory buffer
+# that is handed straight to fitz.open(stream=...); only uploads above
+# UPLOAD_SPILL_BYTES spill to a unique temp file, so same-named uploads never
+# collide.
+# ==============================================================================
+
+# Plain form fields (date_format, force_refresh) are tiny; anything bigger is refused
+MAX_FIELD_BYTES = 64 * 1024
+
+class IngestedPdf:
+    def __init__(self, filename, sha256, size, data=None, path=None):
+        self.filename = filename
+        self.sha256 = sha256
+        self.size = size
+        self.data = data
+        self.path = path
+
+    @property
+    def source(self):
+        """What to hand to fitz: the in-memory buffer, or the spill file path."""
+        return self.data if self.data is not None else self.path
+
+    def cleanup(self):
+        self.data = None
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+        self.path = None
+
+class UploadSink:
+    """Hashes one upload's bytes as they arrive, buffering them in memory until they pass the spill threshold."""
+
+    def __init__(self, filename, spill_dir=None, spill_threshold=UPLOAD_SPILL_BYTES):
+        self.filename = filename
+        self.spill_dir = spill_dir
+        self.spill_threshold = spill_threshold
+        self.hasher = hashlib.sha256()
+        self.buffer = bytearray()
+        self.handle = None
+        self.path = None
+        self.size = 0
+
+    async def write(self, chunk):
+        self.size += len(chunk)
+        await asyncio.to_thread(self.hasher.update, chunk)
+
+        if self.handle is None and self.size > self.spill_threshold:
+            if self.spill_dir:
+                os.makedirs(self.spill_dir, exist_ok=True)
+            fd, self.path = tempfile.mkstemp(suffix=".pdf", dir=self.spill_dir)
+            self.handle = os.fdopen(fd, "wb")
+            await asyncio.to_thread(self.handle.write, self.buffer)
+            self.buffer = None
+
+        if self.handle is not None:
+            await asyncio.to_thread(self.handle.write, chunk)
+        else:
+            self.buffer.extend(chunk)
+
+    async def finish(self):
+        if self.handle is not None:
+            await asyncio.to_thread(self.handle.close)
+            return IngestedPdf(self.filename, self.hasher.hexdigest(), self.size, path=self.path)
+        return IngestedPdf(self.filename, self.hasher.hexdigest(), self.size, data=self.buffer)
+
+    def discard(self):
+        if self.handle is not None:
+            self.handle.close()
+            os.remove(self.path)
+        self.buffer = self.handle = self.path = None
+
+async def ingest_upload(upload, spill_dir=None, spill_threshold=UPLOAD_SPILL_BYTES, chunk_size=UPLOAD_CHUNK_BYTES):
+    """Reads an UploadFile in chunks, hashing incrementally. Returns an IngestedPdf."""
+    sink = UploadSink(upload.filename, spill_dir, spill_threshold)
+    try:
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            await sink.write(chunk)
+    except BaseException:
+        sink.discard()
+        raise
+    return await sink.finish()
+
+async def ingest_form(request, file_field="file", spill_dir=None, spill_threshold=UPLOAD_SPILL_BYTES, chunk_size=UPLOAD_CHUNK_BYTES):
+    """Parses a multipart/form-data request body while it is being received.
+
+    The `file_field` part goes through an UploadSink, so it is hashed and buffered (or
+    spilled) as the client sends it; other files are dropped and plain fields come back
+    as strings. Returns (IngestedPdf or None if no file was sent, {field: value}).
+    Raises ValueError for a body that isn't a well-formed form.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise ValueError("expected a multipart/form-data body")
+
+    fields = {}
+    sink = None
+    pending = [] # File bytes the parser produced since the last write to the sink
+    part = {}
+    header = {"name": b"", "value": b""}
+
+    def on_part_begin():
+        part.clear()
+        part.update(headers={}, data=bytearray(), target=None)
+
+    def on_header_field(data, start, end):
+        header["name"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        header["value"] += data[start:end]
+
+    def on_header_end():
+        part["headers"][header["name"].lower()] = header["value"]
+        header["name"] = header["value"] = b""
+
+    def on_headers_finished():
+        nonlocal sink
+        _, options = parse_options_header(part["headers"].get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        if b"filename" not in options:
+            part["target"] = name
+        elif name == file_field and sink is None:
+            sink = UploadSink(options[b"filename"].decode("utf-8", "replace"), spill_dir, spill_threshold)
+            part["target"] = sink
+
+    def on_part_data(data, start, end):
+        if part["target"] is sink and sink is not None:
+            pending.append(data[start:end])
+        elif isinstance(part["target"], str):
+            part["data"] += data[start:end]
+            if len(part["data"]) > MAX_FIELD_BYTES:
+                raise ValueError(f"form field {part['target']!r} is too large")
+
+    def on_part_end():
+        if isinstance(part["target"], str):
+            fields[part["target"]] = part["data"].decode("utf-8", "replace")
+
+    parser = MultipartParser(params[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            # Network chunks are small; hand the sink (and its hashing thread) bigger pieces
+            if pending and sum(map(len, pending)) >= chunk_size:
+                await sink.write(b"".join(pending))
+                pending.clear()
+        parser.finalize()
+        if sink is None:
+            return None, fields
+        if pending:
+            await sink.write(b"".join(pending))
+    except BaseException:
+        if sink is not None:
+            sink.discard()
+        raise
+    return await sink.finish(), fields
@@ -0,0 +1,94 @@
+import math
+
+import fitz # PyMuPDF
+
+# ==============================================================================
+# PAGE LAYOUT ANALYSIS
+# Uses PyMuPDF's own layout data (text blocks from get_text("dict") and
+# find_tables) to locate the Evaluation Scheme on a page, so the vision model
+# can be sent just that region instead of the whole page. Scanned pages have no
+# text layer, find nothing here and fall back to the full page.
+# ==============================================================================
+
+EVAL_ANCHORS = (
+    "evaluation scheme",
+    "evaluation component",
+    "evaluation plan",
+    "assessment scheme",
+    "grading scheme",
+    "exam schedule",
+    "weightage",
+)
+
+EVAL_TABLE_KEYWORDS = (
+    "component", "weightage", "weight", "marks", "date", "time", "duration",
+    "nature", "evaluation", "exam", "quiz", "mid", "compre", "%",
+)
+
+# A heading this close above a table is treated as that table's title
+ANCHOR_GAP = 60
+REGION_PADDING = 12
+# If the "region" is most of the page anyway, just send the page
+MAX_REGION_FRACTION = 0.8
+
+def find_anchor_rects(page, anchors=EVAL_ANCHORS):
+    """Bounding boxes of text lines that mention an evaluation-scheme keyword."""
+    rects = []
+    for block in page.get_text("dict").get("blocks", []):
+        for line in block.get("lines", []):
+            text = "".join(span.get("text", "") for span in line.get("spans", [])).lower()
+            if any(anchor in text for anchor in anchors):
+                rects.append(fitz.Rect(line["bbox"]))
+    return sorted(rects, key=lambda r: (r.y0, r.x0))
+
+def find_tables(page):
+    try:
+        return list(page.find_tables().tables)
+    except Exception as e:
+        print(f"Table detection error= {e}")
+        return []
+
+def table_rows(table):
+    return [[(cell or "").strip() for cell in row] for row in table.extract()]
+
+def eval_table_score(rows):
+    """How many evaluation keywords appear in the first two rows (the header)."""
+    header = " ".join(" ".join(row) for row in rows[:2]).lower()
+    return sum(1 for keyword in EVAL_TABLE_KEYWORDS if keyword in header)
+
+def find_eval_region(page):
+    """Returns the fitz.Rect of the evaluation table (plus its heading), or None for "use the full page"."""
+    anchors = find_anchor_rects(page)
+    region = None
+
+    for table in find_tables(page):
+        bbox = fitz.Rect(table.bbox)
+        titled = any(0 <= bbox.y0 - a.y1 <= ANCHOR_GAP for a in anchors)
+        if titled or eval_table_score(table_rows(table)) >= 3:
+            region = bbox if region is None else region | bbox
+
+    if region is not None:
+        for anchor in anchors:
+            if 0 <= region.y0 - anchor.y1 <= ANCHOR_GAP:
+                region |= anchor
+    elif anchors:
+        # No ruled table found: keep everything from the heading down
+        region = fitz.Rect(page.rect.x0, anchors[0].y0, page.rect.x1, page.rect.y1)
+    else:
+        return None
+
+    region = fitz.Rect(
+        region.x0 - REGION_PADDING, region.y0 - REGION_PADDING,
+        region.x1 + REGION_PADDING, region.y1 + REGION_PADDING,
+    ) & page.rect
+
+    if region.is_empty or region.get_area() > page.rect.get_area() * MAX_REGION_FRACTION:
+        return None
+    return region
+
+def region_dpi(page_rect, region, base_dpi, max_dpi):
+    """Raises the DPI for small regions while keeping the pixel count at or below a full page at `base_dpi`."""
+    if region is None or region.get_area() <= 0:
+        return base_dpi
+    scale = math.sqrt(page_rect.get_area() / region.get_area())
+    return int(min(base_dpi * scale, max(base_dpi, max_dpi)))
@@ -0,0 +1,151 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+
+from src.config import LLM_CACHE, LLM_CACHE_PATH, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL
+
+# ==============================================================================
+# LLM RESPONSE CACHE
+# Boilerplate pages (the department's evaluation-scheme template, library and
+# make-up policy pages) are byte-identical across many handouts, and used to be
+# sent to the model every time. Responses are cached below the nodes, keyed by
+# model name + prompt version (PromptSpec.version) + a hash of the exact input
+# messages, text and image alike.
+# The local tier is a SQLite file (works offline, shared by every worker on the
+# machine) with a TTL and least-recently-used eviction past LLM_CACHE_MAX_ENTRIES;
+# Redis, when configured, is a second tier shared across machines.
+# Only responses that parse under their prompt's schema are stored. SQLite work
+# runs in a worker thread so a slow disk never stalls the event loop.
+# ==============================================================================
+
+# Eviction runs every this many writes rather than on each one
+PRUNE_EVERY = 64
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_llm_cache():
+    """The process-wide LLMCache, or None when LLM_CACHE is off."""
+    global _cache
+    if not LLM_CACHE:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache(LLM_CACHE_PATH, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL)
+    return _cache
+
+def message_payload(messages):
+    """Model-independent serialization of the input messages (image data included)."""
+    if hasattr(messages, "to_messages"):
+        messages = messages.to_messages()
+    return [{"role": message.type, "content": message.content} for message in messages]
+
+class LLMCache:
+    def __init__(self, path, max_entries=LLM_CACHE_MAX_ENTRIES, ttl=LLM_CACHE_TTL, redis=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.redis = redis
+        self.stats_counts = {"hits": 0, "misses": 0, "local_hits": 0, "redis_hits": 0, "writes": 0}
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, content TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+
+    @staticmethod
+    def key(model_name, prompt_version, messages):
+        payload = json.dumps(message_payload(messages), sort_keys=True, ensure_ascii=False)
+        input_hash = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        return f"llm:{model_name}:{prompt_version}:{input_hash}"
+
+    def _local_get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT content, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def _local_put(self, key, content, ttl):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, content, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, content, now + ttl, now),
+            )
+            self.stats_counts["writes"] += 1
+            if self.stats_counts["writes"] % PRUNE_EVERY == 0:
+                self._prune(now)
+
+    def _prune(self, now):
+        self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        count = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if count > self.max_entries:
+            # Least recently used first, down to 90% so eviction doesn't run on every write
+            excess = count - int(self.max_entries * 0.9)
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+
+    async def get(self, key):
+        """The cached response text, or None on a miss."""
+        try:
+            content = await asyncio.to_thread(self._local_get, key)
+        except sqlite3.Error as e:
+            print(f"⚠️ LLM cache read failed: {e}")
+            content = None
+        if content is not None:
+            self.stats_counts["hits"] += 1
+            self.stats_counts["local_hits"] += 1
+            return content
+
+        if self.redis:
+            try:
+                content = await self.redis.get(key)
+                if content:
+                    content = content if isinstance(content, str) else json.dumps(content)
+                    await asyncio.to_thread(self._local_put, key, content, self.ttl)
+                    self.stats_counts["hits"] += 1
+                    self.stats_counts["redis_hits"] += 1
+                    return content
+            except Exception as e:
+                print(f"⚠️ LLM cache Redis read failed: {e}")
+
+        self.stats_counts["misses"] += 1
+        return None
+
+    async def put(self, key, content):
+        try:
+            await asyncio.to_thread(self._local_put, key, content, self.ttl)
+        except sqlite3.Error as e:
+            print(f"⚠️ LLM cache write failed: {e}")
+        if self.redis:
+            try:
+                await self.redis.set(key, content, ex=self.ttl)
+            except Exception as e:
+                print(f"⚠️ LLM cache Redis write failed: {e}")
+
+    def stats(self):
+        counts = dict(self.stats_counts)
+        lookups = counts["hits"] + counts["misses"]
+        counts["hit_rate"] = counts["hits"] / lookups if lookups else 0.0
+        return counts
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
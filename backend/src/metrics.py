@@ -0,0 +1,216 @@
+import time
+import asyncio
+import functools
+from bisect import bisect_left
+from collections import defaultdict
+
+from src.scheduler import estimate_tokens, schedulers
+
+from src.config import LLM_PRICES
+
+# ==============================================================================
+# METRICS
+# Counters, gauges and histograms for every graph node and LLM call, rendered
+# in the Prometheus text format by the /metrics endpoint (api.py). Kept
+# dependency-free: a handful of labelled series don't need prometheus_client.
+#   - node requests / errors / latency (router, extractors, aggregator, ...),
+#   - LLM calls per node and model: tokens in and out (LangChain usage
+#     metadata, estimated when the provider doesn't report it), estimated cost
+#     from LLM_PRICES, errors by type (429s included), response-cache hits,
+#   - LLM calls in flight, and the scheduler queues (depth, concurrency limit).
+# ==============================================================================
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in labels) + "}"
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.values = defaultdict(float)
+
+    def key(self, labels):
+        return tuple((name, labels.get(name, "")) for name in self.labels)
+
+    def inc(self, amount=1.0, **labels):
+        self.values[self.key(labels)] += amount
+
+    def set_total(self, value, **labels):
+        """For totals kept elsewhere (the schedulers' stats), copied in by a collector."""
+        self.values[self.key(labels)] = float(value)
+
+    def value(self, **labels):
+        return self.values.get(self.key(labels), 0.0)
+
+    def samples(self):
+        for key, value in sorted(self.values.items()):
+            yield self.name, key, value
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        self.values[self.key(labels)] = float(value)
+
+    def dec(self, amount=1.0, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram(Counter):
+    kind = "histogram"
+
+    def __init__(self, name, description, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(buckets)
+        self.counts = defaultdict(lambda: [0] * (len(self.buckets) + 1))
+        self.sums = defaultdict(float)
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        self.counts[key][bisect_left(self.buckets, value)] += 1
+        self.sums[key] += value
+
+    def count(self, **labels):
+        return sum(self.counts.get(self.key(labels), ()))
+
+    def samples(self):
+        for key in sorted(self.counts):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), self.counts[key]):
+                cumulative += count
+                yield f"{self.name}_bucket", key + (("le", format_value(bound)),), cumulative
+            yield f"{self.name}_sum", key, self.sums[key]
+            yield f"{self.name}_count", key, cumulative
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, description, labels=()):
+        return self.add(Counter(name, description, labels))
+
+    def gauge(self, name, description, labels=()):
+        return self.add(Gauge(name, description, labels))
+
+    def histogram(self, name, description, labels=(), buckets=LATENCY_BUCKETS):
+        return self.add(Histogram(name, description, labels, buckets))
+
+    def collector(self, fn):
+        """Registers `fn()`, called before each render to refresh gauges read from elsewhere."""
+        self.collectors.append(fn)
+        return fn
+
+    def render(self):
+        for collect in self.collectors:
+            try:
+                collect()
+            except Exception as e:
+                print(f"⚠️ Metrics collector error: {e}")
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+NODE_REQUESTS = REGISTRY.counter("handout_node_requests_total", "Graph node runs.", ("node",))
+NODE_ERRORS = REGISTRY.counter("handout_node_errors_total", "Graph node runs that raised.", ("node", "error"))
+NODE_LATENCY = REGISTRY.histogram("handout_node_latency_seconds", "Graph node run time.", ("node",))
+PAGE_LATENCY = REGISTRY.histogram("handout_page_latency_seconds", "Time from a page's slot to its result.", ("cached",))
+
+LLM_REQUESTS = REGISTRY.counter("handout_llm_requests_total", "Model calls (response-cache hits excluded).", ("node", "model"))
+LLM_LATENCY = REGISTRY.histogram("handout_llm_latency_seconds", "Model call time, scheduler queueing included.", ("node", "model"))
+LLM_TOKENS = REGISTRY.counter("handout_llm_tokens_total", "Model tokens, from usage metadata or estimated.", ("node", "model", "direction"))
+LLM_COST = REGISTRY.counter("handout_llm_cost_usd_total", "Estimated model cost from LLM_PRICES.", ("node", "model"))
+LLM_ERRORS = REGISTRY.counter("handout_llm_errors_total", "Model calls that failed, by error type.", ("node", "model", "error"))
+LLM_CACHE_HITS = REGISTRY.counter("handout_llm_cache_hits_total", "Model calls answered by the response cache.", ("node",))
+LLM_IN_FLIGHT = REGISTRY.gauge("handout_llm_in_flight", "Model calls currently waiting or running.", ("node",))
+
+QUEUE_DEPTH = REGISTRY.gauge("handout_llm_queue_depth", "Model calls waiting in the provider's scheduler queue.", ("provider",))
+SCHEDULER_IN_FLIGHT = REGISTRY.gauge("handout_llm_scheduler_in_flight", "Model calls the scheduler has released.", ("provider",))
+CONCURRENCY_LIMIT = REGISTRY.gauge("handout_llm_concurrency_limit", "The scheduler's adaptive concurrency limit.", ("provider",))
+SCHEDULER_EVENTS = REGISTRY.counter("handout_llm_scheduler_events_total", "Scheduler calls, retries, 429s and timeouts.", ("provider", "event"))
+
+@REGISTRY.collector
+def collect_schedulers():
+    for provider, scheduler in schedulers().items():
+        QUEUE_DEPTH.set(scheduler.queue_depth, provider=provider)
+        SCHEDULER_IN_FLIGHT.set(scheduler.in_flight, provider=provider)
+        CONCURRENCY_LIMIT.set(int(scheduler.limit), provider=provider)
+        for event in ("calls", "retries", "rate_limited", "timeouts"):
+            SCHEDULER_EVENTS.set_total(scheduler.stats[event], provider=provider, event=event)
+
+def usage_tokens(response, messages):
+    """(input, output) tokens: the provider's usage metadata when present, else estimated like the scheduler does."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    if usage.get("input_tokens") or usage.get("output_tokens"):
+        return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    content = getattr(response, "content", response)
+    return estimate_tokens(messages), len(content) // 4 if isinstance(content, str) else 0
+
+def estimate_cost(model, input_tokens, output_tokens):
+    """USD for a call at LLM_PRICES (per million input / output tokens); 0 for unpriced models."""
+    prices = LLM_PRICES.get(model)
+    if not prices:
+        return 0.0
+    return (input_tokens * prices[0] + output_tokens * prices[1]) / 1_000_000
+
+def record_llm_call(node, model, messages, response, seconds):
+    input_tokens, output_tokens = usage_tokens(response, messages)
+    LLM_REQUESTS.inc(node=node, model=model)
+    LLM_LATENCY.observe(seconds, node=node, model=model)
+    LLM_TOKENS.inc(input_tokens, node=node, model=model, direction="input")
+    LLM_TOKENS.inc(output_tokens, node=node, model=model, direction="output")
+    LLM_COST.inc(estimate_cost(model, input_tokens, output_tokens), node=node, model=model)
+
+def timed(node):
+    """Decorator counting runs, errors and latency of a (sync or async) graph node function."""
+    def decorate(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def run(*args, **kwargs):
+                NODE_REQUESTS.inc(node=node)
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                except Exception as e:
+                    NODE_ERRORS.inc(node=node, error=type(e).__name__)
+                    raise
+                finally:
+                    NODE_LATENCY.observe(time.perf_counter() - start, node=node)
+        else:
+            @functools.wraps(fn)
+            def run(*args, **kwargs):
+                NODE_REQUESTS.inc(node=node)
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                except Exception as e:
+                    NODE_ERRORS.inc(node=node, error=type(e).__name__)
+                    raise
+                finally:
+                    NODE_LATENCY.observe(time.perf_counter() - start, node=node)
+        return run
+    return decorate
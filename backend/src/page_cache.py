@@ -0,0 +1,104 @@
+import json
+import time
+from collections import OrderedDict
+
+from src.graph import aggregator_node
+from src.prompts import registry_version
+from src.config import PAGE_CACHE_VERSION, PAGE_CACHE_MAX_ENTRIES, PAGE_CACHE_TTL, PAGE_CACHE_SKIP_TTL
+
+# ==============================================================================
+# PER-PAGE RESULT CACHE
+# api.py caches whole PDFs by file hash, so a handout re-issued with one corrected
+# page used to miss and pay for every page again. This caches each page's graph
+# output by its content fingerprint (LazyPage.fingerprint) instead.
+# Only the title/date-format independent parts are stored (router classification
+# and raw extractions); the aggregator is re-run on a hit, so the same page can
+# be reused under a different course title or date format.
+# An in-process LRU sits in front of Redis (when configured).
+# ==============================================================================
+
+CACHED_FIELDS = ("classification", "eval_data", "syllabus_data", "reference_data")
+
+def page_entry(result):
+    """The cacheable part of a graph result, with its TTL; (None, 0) if it shouldn't be cached."""
+    entry = {field: result.get(field) or [] for field in CACHED_FIELDS}
+    categories = entry["classification"]
+    found_data = entry["eval_data"] or entry["syllabus_data"] or entry["reference_data"]
+
+    if found_data:
+        return entry, PAGE_CACHE_TTL
+    if categories and "SKIP" in categories:
+        return entry, PAGE_CACHE_SKIP_TTL
+    # Classified as relevant but nothing came out: most likely a failed LLM call, so retry next time
+    return None, 0
+
+def replay_page(entry, course_title, user_date_format="DMY"):
+    """Rebuilds a full graph result from a cached entry for this request's title and date format."""
+    result = dict(entry)
+    if entry["eval_data"]:
+        result.update(aggregator_node({
+            "eval_data": entry["eval_data"],
+            "known_course_title": course_title,
+            "user_date_format": user_date_format,
+        }))
+    else:
+        result["final_schedule"] = []
+    return result
+
+class PageCache:
+    def __init__(self, redis=None, max_entries=PAGE_CACHE_MAX_ENTRIES, version=None):
+        self.redis = redis
+        self.max_entries = max_entries
+        # Any prompt or schema edit changes the registry hash, which retires every cached page
+        self.version = version or f"{PAGE_CACHE_VERSION}-{registry_version()}"
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def key(self, fingerprint):
+        return f"page:v{self.version}:{fingerprint}"
+
+    async def get(self, fingerprint):
+        key = self.key(fingerprint)
+        local = self._entries.get(key)
+        if local is not None:
+            expires_at, entry = local
+            if expires_at > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            del self._entries[key]
+
+        if self.redis:
+            try:
+                cached = await self.redis.get(key)
+                if cached:
+                    entry = json.loads(cached) if isinstance(cached, str) else cached
+                    # Redis keeps the real TTL; the local copy only needs to outlive this burst of requests
+                    self._remember(key, entry, PAGE_CACHE_SKIP_TTL)
+                    self.hits += 1
+                    return entry
+            except Exception as e:
+                print(f"⚠️ Page cache read error: {e}")
+
+        self.misses += 1
+        return None
+
+    async def put(self, fingerprint, result):
+        entry, ttl = page_entry(result)
+        if entry is None:
+            return False
+        key = self.key(fingerprint)
+        self._remember(key, entry, ttl)
+        if self.redis:
+            try:
+                await self.redis.set(key, json.dumps(entry), ex=ttl)
+            except Exception as e:
+                print(f"⚠️ Page cache write error: {e}")
+        return True
+
+    def _remember(self, key, entry, ttl):
+        self._entries[key] = (time.time() + ttl, entry)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
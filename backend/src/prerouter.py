@@ -0,0 +1,85 @@
+import re
+
+from src.eval_table import DATE_PATTERN
+
+# ==============================================================================
+# LOCAL PRE-ROUTER
+# Cover pages, course descriptions and policy pages are plainly irrelevant, yet
+# each one used to cost an LLM round-trip in router_node. This scores keyword
+# features on the text layer (CPU only, microseconds) and decides a page locally
+# only when every category is either clearly present or clearly absent.
+# Anything in between is "uncertain" and goes to the LLM router as before.
+# SYLLABUS is not routed anywhere right now, so course plans count as SKIP.
+# ==============================================================================
+
+EXAM_TERMS = re.compile(
+    r"\b(mid[\s-]*sem(ester)?|compre(hensive)?|quiz(zes)?|exam(ination)?s?|tests?|"
+    r"evaluation (scheme|components?|plan)|assessment|viva|lab exam|project)\b",
+    re.IGNORECASE,
+)
+WEIGHT_TERMS = re.compile(r"\d+\s*%|\bweigh?tage\b|\bmarks\b", re.IGNORECASE)
+BOOK_HEADINGS = re.compile(r"\b(text[\s-]*books?|reference[\s-]*books?|reading materials?)\b", re.IGNORECASE)
+BOOK_DETAILS = re.compile(
+    r"\b([TR]\d+\s*[.:)]|\d+(st|nd|rd|th) edition|edition|pearson|mcgraw|wiley|springer|elsevier|"
+    r"prentice|oxford|cambridge|addison|o'reilly|publisher)\b|\"[^\"]{4,}\"|\bby [A-Z][a-z]+",
+    re.IGNORECASE,
+)
+BOOK_TERMS = re.compile(r"\b(books?|references?|reading)\b", re.IGNORECASE)
+# "Open Book" / "Closed Book" is an exam format, not a reading list
+EXAM_FORMATS = re.compile(r"\b(open|closed)[\s-]*book\b", re.IGNORECASE)
+
+# Below this much text the page is probably scanned: leave it to the vision router
+MIN_TEXT_CHARS = 50
+
+def eval_signal(text):
+    """"strong" for exam terms with both a date and a weightage, "none" with no exam or weightage terms at all."""
+    has_exam = bool(EXAM_TERMS.search(text))
+    has_weight = bool(WEIGHT_TERMS.search(text))
+    has_date = bool(DATE_PATTERN.search(text))
+    if has_exam and has_weight and has_date:
+        return "strong"
+    if not has_exam and not has_weight:
+        return "none"
+    return "weak"
+
+def likely_eval(text, min_rows=2):
+    """Cheap guess that a page holds an evaluation table, for speculative extraction.
+
+    A strong signal, or exam/weightage terms with a table's worth of dates or percentages.
+    """
+    signal = eval_signal(text)
+    if signal == "strong":
+        return True
+    if signal == "none":
+        return False
+    rows = max(len(DATE_PATTERN.findall(text)), len(re.findall(r"\d+\s*%", text)))
+    return bool(EXAM_TERMS.search(text)) and rows >= min_rows
+
+def reference_signal(text):
+    """"strong" for a textbook heading with bibliographic details, "none" when books aren't mentioned at all."""
+    text = EXAM_FORMATS.sub("", text)
+    has_heading = bool(BOOK_HEADINGS.search(text))
+    if has_heading and BOOK_DETAILS.search(text):
+        return "strong"
+    if not has_heading and not BOOK_TERMS.search(text):
+        return "none"
+    return "weak"
+
+def preroute(text):
+    """Classifies a page from its text layer. Returns (categories, confidence).
+
+    Confidence is high only when the decision is unambiguous; callers should
+    fall back to the LLM router below PREROUTER_MIN_CONFIDENCE.
+    """
+    text = (text or "").strip()
+    if len(text) < MIN_TEXT_CHARS:
+        return ["SKIP"], 0.0
+
+    signals = {"EVAL": eval_signal(text), "REFERENCES": reference_signal(text)}
+    categories = [category for category, signal in signals.items() if signal == "strong"] or ["SKIP"]
+
+    if "weak" in signals.values():
+        return categories, 0.5
+    if categories == ["SKIP"]:
+        return categories, 0.95
+    return categories, 0.9
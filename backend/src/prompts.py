@@ -0,0 +1,190 @@
+import hashlib
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.messages import SystemMessage, HumanMessage
+
+from src.schema import RouteDecision, DocumentRouteDecision, CourseTitle, EvalList, SyllabusList, ReferenceList
+from src.schema import FusedExtraction, FusedExtractionWithSyllabus
+
+# ==============================================================================
+# PROMPT REGISTRY
+# Every node used to build a PydanticOutputParser, serialize its JSON schema with
+# get_format_instructions() and format its prompt on every call. All of that is
+# done once here at import. Each entry carries a content hash of its final
+# prompt text (schema included), which caching layers use as a version key:
+# editing a prompt or a schema invalidates exactly the entries that depend on it.
+# ==============================================================================
+
+TITLE_PROMPT = '''
+    Analyze the text to identify the Main Subject or Course Name of this document.
+
+    CONTEXT: This is a university course handout.
+
+    INSTRUCTIONS:
+    1. Find the descriptive English name (e.g. "Digital Design", "Microprocessors", "General Biology").
+    2. Ignore alphanumeric codes (like "CS F215", "EEE F111") if a descriptive name is present.
+    3. Ignore labels like "Course Title:", "Course No:", "Part II" - just extract the name itself.
+
+    Examples:
+    - Text: "EEE F211 Electrical Machines" -> Output: "Electrical Machines"
+    - Text: "BITS PILANI ... GENERAL BIOLOGY" -> Output: "General Biology"
+
+    {format_instructions}
+    '''
+
+# - 'SYLLABUS': Contains Course Plan, Topics, Lectures, Learning Objectives. (DISABLED: Uncomment when syllabus feature is needed)
+ROUTER_CATEGORIES = '''
+    Categories:
+    - 'EVAL': MUST contain an actual Evaluation Scheme, Exam Schedule, list of Quizzes, Mid-Sem dates, Comprehensive exam dates, or Weightage tables. Do NOT classify general grading notices or make-up policies as EVAL unless actual dates or weightages are present. Do NOT classify Course Plans, Lecture Schedules, or lists of academic topics as EVAL.
+    - 'REFERENCES': Contains Textbooks, Reference Books, required reading materials.
+    - 'SKIP': General introduction, textbook lists without schedules, or completely irrelevant.
+'''
+
+ROUTER_PROMPT = '''
+    You are a document classifier for university handouts.
+    Analyze the text and categorize it. It may belong to multiple categories.
+    ''' + ROUTER_CATEGORIES + '''
+    Return a list of the applicable categories. If none apply, return ['SKIP'].
+
+    {format_instructions}
+    '''
+
+ROUTER_BATCH_PROMPT = '''
+    You are a document classifier for university handouts.
+    You will receive several pages of ONE handout, each starting with a '=== PAGE n ===' marker.
+    Classify EVERY page independently. Each page may belong to multiple categories.
+    ''' + ROUTER_CATEGORIES + '''
+    Return one entry per page with its page number and its list of categories. If none apply to a page, return ['SKIP'] for it.
+
+    {format_instructions}
+    '''
+
+EVAL_PROMPT = '''
+    Extract Exam Dates, Times, Format, and Weightage from the provided image of a university syllabus.
+
+    CRITICAL INSTRUCTION:
+    1. You are analyzing an image from an INDIAN UNIVERSITY.
+    2. Dates are strictly DD/MM/YYYY.
+    3. ONLY extract items from the official Evaluation/Grading Scheme table. IGNORE weekly lecture schedules and class plans.
+
+    EXTRACTION RULES:
+    1. Extract 'event_name' (e.g. "Quiz 1", "Mid-Sem Exam", "Comprehensive Exam").
+    2. Output 'date_raw' exactly as it is written in the document. Do not reformat.
+    3. If an event has multiple dates, create TWO separate items in the list.
+    4. Extract 'time_raw'. Output exactly what is written (e.g. '4-5:30 PM', 'FN', 'AN').
+    5. Extract 'format'. Look for 'OB' or 'CB'. If missing, return 'TBA'.
+    6. Extract 'weightage'. If missing, return 'N/A'.
+
+    {format_instructions}
+    '''
+
+EVAL_TEXT_PROMPT = '''
+    Extract Exam Dates, Times, Format, and Weightage from the text of a university syllabus page.
+
+    CRITICAL INSTRUCTION:
+    1. The text comes from a handout of an INDIAN UNIVERSITY. Table cells may be split across lines.
+    2. Dates are strictly DD/MM/YYYY.
+    3. ONLY extract items from the official Evaluation/Grading Scheme table. IGNORE weekly lecture schedules and class plans.
+
+    EXTRACTION RULES:
+    1. Extract 'event_name' (e.g. "Quiz 1", "Mid-Sem Exam", "Comprehensive Exam").
+    2. Output 'date_raw' exactly as it is written in the document. Do not reformat.
+    3. If an event has multiple dates, create TWO separate items in the list.
+    4. Extract 'time_raw'. Output exactly what is written (e.g. '4-5:30 PM', 'FN', 'AN').
+    5. Extract 'format'. Look for 'OB' or 'CB'. If missing, return 'TBA'.
+    6. Extract 'weightage'. If missing, return 'N/A'.
+
+    {format_instructions}
+    '''
+
+SYLLABUS_PROMPT = '''
+    Extract the Course Syllabus / Lecture Plan from the provided image.
+
+    EXTRACTION RULES:
+    1. Extract 'module_name' (the name of the topic or unit).
+    2. Extract 'number_of_lectures' (the number of lectures allocated to this topic, e.g., '6', '12').
+    3. If lecture counts are not present, estimate or put 'N/A'.
+
+    {format_instructions}
+    '''
+
+REFERENCES_PROMPT = '''
+    Extract the Textbooks and Reference Books from the provided image.
+
+    EXTRACTION RULES:
+    1. Extract the 'title' of the book.
+    2. Extract the 'author' of the book.
+
+    {format_instructions}
+    '''
+
+FUSED_PROMPT = '''
+    Extract the following sections from the provided image of a university syllabus. A section that is not on the page is an empty list.
+
+    CRITICAL INSTRUCTION:
+    1. You are analyzing an image from an INDIAN UNIVERSITY.
+    2. Dates are strictly DD/MM/YYYY.
+
+    EVALUATIONS ('evaluations'):
+    1. ONLY extract items from the official Evaluation/Grading Scheme table. IGNORE weekly lecture schedules and class plans.
+    2. Extract 'event_name' (e.g. "Quiz 1", "Mid-Sem Exam", "Comprehensive Exam").
+    3. Output 'date_raw' exactly as it is written in the document. Do not reformat.
+    4. If an event has multiple dates, create TWO separate items in the list.
+    5. Extract 'time_raw'. Output exactly what is written (e.g. '4-5:30 PM', 'FN', 'AN').
+    6. Extract 'format'. Look for 'OB' or 'CB'. If missing, return 'TBA'.
+    7. Extract 'weightage'. If missing, return 'N/A'.
+
+    REFERENCES ('references'):
+    1. Extract the 'title' and the 'author' of every textbook and reference book.
+    {syllabus_rules}
+    {format_instructions}
+    '''
+
+FUSED_SYLLABUS_RULES = '''
+    SYLLABUS ('syllabus'):
+    1. Extract 'module_name' (the name of the topic or unit) and 'number_of_lectures' (e.g., '6', '12'; 'N/A' if absent).
+    '''
+
+class PromptSpec:
+    """One node's prompt, compiled once: parser, final system text, chat template and version hash."""
+
+    def __init__(self, name, schema, template, **fields):
+        self.name = name
+        self.schema = schema
+        self.parser = PydanticOutputParser(pydantic_object=schema)
+        for field, value in fields.items():
+            template = template.replace("{" + field + "}", value)
+        self.system = template.replace("{format_instructions}", self.parser.get_format_instructions())
+        self.version = hashlib.sha256(f"{name}\n{self.system}".encode("utf-8")).hexdigest()[:16]
+        # Text nodes: the page text is the only variable. The system text is a message
+        # object, so the JSON braces in the format instructions are not template fields.
+        self.chat_template = ChatPromptTemplate.from_messages([
+            SystemMessage(content=self.system),
+            ("human", "{text}"),
+        ])
+
+    def vision_message(self, image):
+        """The single multimodal message the vision nodes send: instructions + page image."""
+        return HumanMessage(content=[{"type": "text", "text": self.system}, image.content_part])
+
+PROMPTS = {
+    spec.name: spec
+    for spec in (
+        PromptSpec("course_title", CourseTitle, TITLE_PROMPT),
+        PromptSpec("router", RouteDecision, ROUTER_PROMPT),
+        PromptSpec("router_batch", DocumentRouteDecision, ROUTER_BATCH_PROMPT),
+        PromptSpec("eval", EvalList, EVAL_PROMPT),
+        PromptSpec("eval_text", EvalList, EVAL_TEXT_PROMPT),
+        PromptSpec("syllabus", SyllabusList, SYLLABUS_PROMPT),
+        PromptSpec("references", ReferenceList, REFERENCES_PROMPT),
+        PromptSpec("fused", FusedExtraction, FUSED_PROMPT, syllabus_rules=""),
+        PromptSpec("fused_syllabus", FusedExtractionWithSyllabus, FUSED_PROMPT, syllabus_rules=FUSED_SYLLABUS_RULES),
+    )
+}
+
+def registry_version(names=None):
+    """Combined hash of the given prompts (all by default), for caches that depend on several nodes."""
+    names = sorted(names or PROMPTS)
+    joined = ",".join(f"{name}={PROMPTS[name].version}" for name in names)
+    return hashlib.sha256(joined.encode("utf-8")).hexdigest()[:16]
@@ -0,0 +1,467 @@
+import os
+import base64
+import hashlib
+import atexit
+import asyncio
+import threading
+from functools import cached_property
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory, resource_tracker
+
+import fitz # PyMuPDF
+
+from src.config import RENDER_WORKERS, RENDER_POOL_MIN_PAGES, RENDER_LAZY, VISION_DPI, EVAL_CROP, EVAL_CROP_MAX_DPI
+from src.config import VISION_IMAGE_FORMAT, VISION_IMAGE_MAX_BYTES
+from src.encode import encode_page, resolve_format, MIME_TYPES
+from src.render_cache import get_render_cache, hash_source
+from src.layout import find_eval_region, region_dpi
+from src.eval_table import extract_eval_table
+
+# ==============================================================================
+# PDF RASTERIZATION
+# Rendering + PNG encoding is pure CPU work that holds the GIL, so large scanned
+# handouts are split into page ranges and rendered in worker processes. Each
+# worker opens its own fitz document (fitz objects can't cross processes) and
+# writes the encoded images into one shared memory block, so only small
+# (offset, length) tuples are pickled back instead of multi-MB strings.
+# ==============================================================================
+
+_pool = None
+
+def open_fitz(source):
+    """Opens a PDF from a file path or an in-memory buffer (bytes / bytearray)."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+def get_render_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=RENDER_WORKERS)
+        atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+    return _pool
+
+def split_page_ranges(total_pages, workers):
+    """Splits [0, total_pages) into at most `workers` contiguous (start, stop) ranges."""
+    workers = max(1, min(workers, total_pages))
+    size, extra = divmod(total_pages, workers)
+    ranges = []
+    start = 0
+    for i in range(workers):
+        stop = start + size + (1 if i < extra else 0)
+        if stop > start:
+            ranges.append((start, stop))
+        start = stop
+    return ranges
+
+def _open_worker_source(pdf_source):
+    """Workers get either a file path or ("shm", name, size) for an in-memory upload."""
+    if isinstance(pdf_source, tuple):
+        _, name, size = pdf_source
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            return fitz.open(stream=bytes(shm.buf[:size]), filetype="pdf")
+        finally:
+            shm.close()
+            resource_tracker.unregister(shm._name, "shared_memory") # The parent owns it
+    return fitz.open(pdf_source)
+
+def _render_range_to_shm(pdf_source, start, stop, dpi):
+    """Worker entrypoint: renders pages [start, stop) into a new shared memory block.
+
+    Returns (shm_name, [(page_index, text, offset, length, mime), ...]). The parent
+    owns the block from then on and is responsible for unlinking it.
+    """
+    doc = _open_worker_source(pdf_source)
+    try:
+        texts = []
+        images = []
+        mimes = []
+        for i in range(start, stop):
+            page = doc[i]
+            texts.append(page.get_text())
+            img_bytes, mime = encode_page(page, dpi)
+            images.append(img_bytes)
+            mimes.append(mime)
+    finally:
+        doc.close()
+
+    total = sum(len(img) for img in images)
+    shm = shared_memory.SharedMemory(create=True, size=max(total, 1))
+    layout = []
+    offset = 0
+    for i, (text, img, mime) in enumerate(zip(texts, images, mimes)):
+        shm.buf[offset:offset + len(img)] = img
+        layout.append((start + i, text, offset, len(img), mime))
+        offset += len(img)
+    name = shm.name
+    shm.close()
+    # Hand ownership to the parent: otherwise this worker's resource tracker would
+    # also try to unlink the block (and warn about a "leak") when the pool shuts down.
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return name, layout
+
+def _collect_from_shm(name, layout):
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        pages = []
+        for page_index, text, offset, length, mime in layout:
+            pages.append((page_index + 1, text, PageImage(bytes(shm.buf[offset:offset + length]), mime)))
+        return pages
+    finally:
+        shm.close()
+        shm.unlink()
+
+def render_pages_in_process(pdf_source, dpi):
+    """Single-process renderer. Returns [(page_num, text, PageImage), ...]."""
+    pages = []
+    doc = open_fitz(pdf_source)
+    try:
+        for i in range(len(doc)):
+            page = doc[i]
+            text = page.get_text()
+            pages.append((i + 1, text, PageImage(*encode_page(page, dpi))))
+    finally:
+        doc.close() # Crucial: Release file lock so Windows can delete it later
+    return pages
+
+def render_pages(pdf_source, dpi=VISION_DPI, workers=None, pool=None):
+    """Renders every page of a PDF (path or in-memory buffer), fanning out to the
+    process pool for large documents.
+
+    Blocking; call it through asyncio.to_thread from async code.
+    Returns [(page_num, text, PageImage), ...] in page order.
+    """
+    workers = RENDER_WORKERS if workers is None else workers
+
+    doc = open_fitz(pdf_source)
+    total_pages = len(doc)
+    doc.close()
+
+    if workers <= 1 or total_pages < RENDER_POOL_MIN_PAGES:
+        return render_pages_in_process(pdf_source, dpi)
+
+    source_shm = None
+    if isinstance(pdf_source, (bytes, bytearray, memoryview)):
+        # Share the upload with the workers once instead of pickling it per page range
+        source_shm = shared_memory.SharedMemory(create=True, size=max(len(pdf_source), 1))
+        source_shm.buf[:len(pdf_source)] = pdf_source
+        worker_source = ("shm", source_shm.name, len(pdf_source))
+    else:
+        worker_source = os.path.abspath(pdf_source)
+
+    pool = pool or get_render_pool()
+    try:
+        futures = [
+            pool.submit(_render_range_to_shm, worker_source, start, stop, dpi)
+            for start, stop in split_page_ranges(total_pages, workers)
+        ]
+
+        pages = []
+        error = None
+        # Drain every future even after a failure so no shared memory block is leaked
+        for future in futures:
+            try:
+                name, layout = future.result()
+                pages.extend(_collect_from_shm(name, layout))
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            raise error
+        return pages
+    finally:
+        if source_shm is not None:
+            source_shm.close()
+            source_shm.unlink()
+
+class PageImage:
+    """One encoded page image, shared by every vision node that looks at the page.
+
+    The encoded bytes are held once; the base64 data URL and the message content
+    part are built on first use and then reused, so the eval/reference/router
+    fan-out doesn't each build its own multi-hundred-KB copy.
+    """
+
+    def __init__(self, data, mime="image/png"):
+        self.data = data
+        self.mime = mime
+
+    @classmethod
+    def from_b64(cls, image_b64, mime="image/png"):
+        image = cls(base64.b64decode(image_b64), mime)
+        image.__dict__["b64"] = image_b64 # Already encoded; don't encode it again
+        return image
+
+    def __len__(self):
+        return len(self.data)
+
+    @cached_property
+    def b64(self):
+        return base64.b64encode(self.data).decode("ascii")
+
+    @cached_property
+    def data_url(self):
+        url = f"data:{self.mime};base64,{self.b64}"
+        # The data URL embeds the base64 text; drop the standalone copy
+        self.__dict__.pop("b64", None)
+        return url
+
+    @cached_property
+    def content_part(self):
+        """The HumanMessage content entry for this image."""
+        return {"type": "image_url", "image_url": {"url": self.data_url}}
+
+# ==============================================================================
+# LAZY PAGES
+# Most pages are classified SKIP from their text layer alone, so by default the
+# document stays open for the life of the request and a page is rasterized only
+# when a vision node actually asks for its image. The result is memoized on the
+# page, so the eval/reference fan-out renders it once.
+# ==============================================================================
+
+def fingerprint_page(page):
+    """SHA-256 of everything that decides how a fitz page looks: its text, its content
+    stream, its size/rotation and the raw streams of the images it draws.
+    Identical pages hash the same across different PDFs without being rasterized.
+    """
+    hasher = hashlib.sha256()
+    hasher.update(page.get_text().encode("utf-8"))
+    hasher.update(f"{tuple(page.rect)}:{page.rotation}".encode())
+    hasher.update(page.read_contents())
+    for image in page.get_images(full=True):
+        hasher.update(page.parent.xref_stream_raw(image[0]) or b"")
+    return hasher.hexdigest()
+
+def render_key(cache, doc_hash, index, dpi, variant=""):
+    """Render cache key for page `index` of a document, shared by the lazy and eager paths."""
+    encoding = f"{resolve_format(VISION_IMAGE_FORMAT)}:{VISION_IMAGE_MAX_BYTES}{variant}"
+    return cache.key(doc_hash, index, dpi, encoding)
+
+def render_pages_cached(pdf_source, dpi=VISION_DPI, cache=None, source_hash=None):
+    """`render_pages` through the render cache. A document whose pages are all cached
+    is not rasterized at all; otherwise every page is rendered (in the process pool for
+    large documents) and the missing images are stored.
+    """
+    cache = cache if cache is not None else get_render_cache()
+    if not cache:
+        return render_pages(pdf_source, dpi)
+
+    doc_hash = source_hash or hash_source(pdf_source)
+    doc = open_fitz(pdf_source)
+    try:
+        texts = [doc[i].get_text() for i in range(len(doc))]
+    finally:
+        doc.close()
+    keys = [render_key(cache, doc_hash, i, dpi) for i in range(len(texts))]
+    cached = [cache.get(key) for key in keys]
+    if all(cached):
+        mime = MIME_TYPES[resolve_format(VISION_IMAGE_FORMAT)]
+        return [(i + 1, text, PageImage(data, mime)) for i, (text, data) in enumerate(zip(texts, cached))]
+
+    pages = render_pages(pdf_source, dpi)
+    for (_, _, image), key, data in zip(pages, keys, cached):
+        if not data:
+            cache.put(key, image.data)
+    return pages
+
+class OpenDocument:
+    """A fitz document shared by every page of one request.
+
+    fitz documents are not thread-safe, so all renders go through one lock.
+    `source_hash` is the PDF's SHA-256 when the caller already has it (uploads are
+    hashed as they arrive); otherwise the source is hashed on the first cache lookup.
+    """
+
+    def __init__(self, source, cache=None, source_hash=None):
+        self.source = source
+        self.doc = open_fitz(source)
+        self.cache = cache if cache is not None else get_render_cache()
+        self.renders = 0
+        self.cache_hits = 0
+        self._doc_hash = source_hash
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.doc)
+
+    def _cache_key(self, index, dpi, variant=""):
+        """Render cache key for this page. Call with the lock held."""
+        if self._doc_hash is None:
+            self._doc_hash = hash_source(self.source)
+        return render_key(self.cache, self._doc_hash, index, dpi, variant)
+
+    def _cached(self, key):
+        data = self.cache.get(key)
+        if data is not None:
+            self.cache_hits += 1
+        return data
+
+    def render(self, index, dpi):
+        """Returns (image_bytes, mime) encoded per VISION_IMAGE_FORMAT / VISION_IMAGE_MAX_BYTES."""
+        with self._lock:
+            key = self._cache_key(index, dpi) if self.cache else None
+            if key:
+                data = self._cached(key)
+                if data:
+                    return data, MIME_TYPES[resolve_format(VISION_IMAGE_FORMAT)]
+
+            self.renders += 1
+            data, mime = encode_page(self.doc[index], dpi)
+            if key:
+                self.cache.put(key, data)
+            return data, mime
+
+    def render_eval_region(self, index, dpi):
+        """Renders only the detected evaluation table region (at up to EVAL_CROP_MAX_DPI).
+
+        Returns (image_bytes, mime), or None when no region was found.
+        """
+        with self._lock:
+            # An empty cache entry records "no region on this page", which skips table detection too
+            key = self._cache_key(index, dpi, f":eval:{EVAL_CROP_MAX_DPI}") if self.cache else None
+            if key:
+                data = self._cached(key)
+                if data is not None:
+                    return (data, MIME_TYPES[resolve_format(VISION_IMAGE_FORMAT)]) if data else None
+
+            page = self.doc[index]
+            region = find_eval_region(page)
+            if region is None:
+                if key:
+                    self.cache.put(key, b"")
+                return None
+            self.renders += 1
+            data, mime = encode_page(page, region_dpi(page.rect, region, dpi, EVAL_CROP_MAX_DPI), clip=region)
+            if key:
+                self.cache.put(key, data)
+            return data, mime
+
+    def fingerprint(self, index):
+        with self._lock:
+            return fingerprint_page(self.doc[index])
+
+    def extract_eval_table(self, index):
+        """Reads the evaluation table from the page's text layer. Returns (items, confidence)."""
+        with self._lock:
+            return extract_eval_table(self.doc[index])
+
+    def title_hints(self, index):
+        """The PDF's metadata title and page `index`'s text lines as [(largest font size, text), ...]."""
+        with self._lock:
+            lines = []
+            for block in self.doc[index].get_text("dict")["blocks"]:
+                for line in block.get("lines", []):
+                    text = "".join(span["text"] for span in line["spans"]).strip()
+                    if text:
+                        lines.append((max(span["size"] for span in line["spans"]), text))
+            return (self.doc.metadata or {}).get("title", ""), lines
+
+    def close(self):
+        with self._lock:
+            self.doc.close() # Crucial: Release file lock so Windows can delete it later
+
+class LazyPage:
+    def __init__(self, page_num, text, document=None, dpi=VISION_DPI, image=None):
+        self.page_num = page_num
+        self.text = text
+        self.document = document
+        self.dpi = dpi
+        self._image = image
+        self._eval_image = None
+        self._eval_checked = False
+        self._fingerprint = None
+        self._eval_rows = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_rendered(self):
+        return self._image is not None
+
+    def image(self):
+        """Blocking render (memoized). Concurrent callers wait for the first render.
+
+        Returns a PageImage, or None if there is nothing to render from.
+        """
+        with self._lock:
+            if self._image is None and self.document is not None:
+                self._image = PageImage(*self.document.render(self.page_num - 1, self.dpi))
+            return self._image
+
+    async def aimage(self):
+        if self._image is not None:
+            return self._image
+        return await asyncio.to_thread(self.image)
+
+    def eval_image(self):
+        """The evaluation-table crop of this page (memoized), falling back to the full page image."""
+        with self._lock:
+            if not self._eval_checked and EVAL_CROP and self.document is not None:
+                rendered = self.document.render_eval_region(self.page_num - 1, self.dpi)
+                if rendered is not None:
+                    self._eval_image = PageImage(*rendered)
+            self._eval_checked = True
+        return self._eval_image or self.image()
+
+    async def aeval_image(self):
+        if self._eval_image is not None:
+            return self._eval_image
+        return await asyncio.to_thread(self.eval_image)
+
+    def fingerprint(self):
+        """Content hash for the per-page result cache (memoized).
+
+        Uses the PDF page itself when the document is open; eagerly rendered pages
+        hash their text and image instead.
+        """
+        if self._fingerprint is None:
+            if self.document is not None:
+                self._fingerprint = self.document.fingerprint(self.page_num - 1)
+            else:
+                hasher = hashlib.sha256(self.text.encode("utf-8"))
+                if self._image is not None:
+                    hasher.update(self._image.data)
+                self._fingerprint = hasher.hexdigest()
+        return self._fingerprint
+
+    def eval_rows(self):
+        """Evaluation rows read from the text layer as (items, confidence) (memoized); ([], 0.0) without a document."""
+        if self.document is None:
+            return [], 0.0
+        if self._eval_rows is None:
+            self._eval_rows = self.document.extract_eval_table(self.page_num - 1)
+        return self._eval_rows
+
+    def title_hints(self):
+        """(metadata title, [(font size, line), ...]) for local title extraction; ("", []) without a document."""
+        if self.document is None:
+            return "", []
+        return self.document.title_hints(self.page_num - 1)
+
+def open_pages(pdf_source, dpi=VISION_DPI, lazy=RENDER_LAZY, source_hash=None):
+    """Opens a PDF (path or in-memory buffer) and returns (document, [LazyPage, ...]).
+
+    Lazy mode reads only the text layers and keeps the document open; the caller
+    must close it when the request ends. Eager mode renders everything up front
+    through `render_pages_cached` (render cache, then the process pool for large
+    documents) and returns no document.
+    `source_hash` (the PDF's SHA-256, if known) saves hashing it again for the render cache.
+    Blocking; call it through asyncio.to_thread from async code.
+    """
+    if not lazy:
+        pages = [
+            LazyPage(page_num, text, dpi=dpi, image=image)
+            for page_num, text, image in render_pages_cached(pdf_source, dpi, source_hash=source_hash)
+        ]
+        return None, pages
+
+    document = OpenDocument(pdf_source, source_hash=source_hash)
+    try:
+        with document._lock:
+            pages = [
+                LazyPage(i + 1, document.doc[i].get_text(), document, dpi)
+                for i in range(len(document.doc))
+            ]
+    except Exception:
+        document.close()
+        raise
+    return document, pages
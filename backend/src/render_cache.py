@@ -0,0 +1,129 @@
+import os
+import hashlib
+import tempfile
+import threading
+
+from src.config import RENDER_CACHE, RENDER_CACHE_DIR, RENDER_CACHE_MAX_BYTES
+
+# ==============================================================================
+# ON-DISK RENDER CACHE
+# Rasterizing + encoding a page costs far more than reading it back, and retries,
+# force_refresh requests and CLI reruns render the same pages again. Encoded
+# images are stored one file per (document hash, page, DPI, encoding) key.
+# A hit bumps the file's mtime, so evicting the oldest mtimes first once the
+# directory grows past RENDER_CACHE_MAX_BYTES gives LRU order that survives
+# restarts and is shared by every worker process on the machine.
+# ==============================================================================
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_render_cache():
+    """The process-wide RenderCache, or None when RENDER_CACHE is off."""
+    global _cache
+    if not RENDER_CACHE:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = RenderCache(RENDER_CACHE_DIR, RENDER_CACHE_MAX_BYTES)
+    return _cache
+
+def hash_source(source, chunk_size=1024 * 1024):
+    """SHA-256 of a PDF given as a file path or an in-memory buffer."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(source).hexdigest()
+    hasher = hashlib.sha256()
+    with open(source, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+class RenderCache:
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._size = None
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(doc_hash, index, dpi, encoding):
+        """`encoding` is anything else that changes the bytes (format, byte budget, crop...)."""
+        raw = f"{doc_hash}:{index}:{dpi}:{encoding}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        """Returns the cached bytes (b"" is a valid entry), or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key, data):
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write-then-rename, so a concurrent reader never sees half a file
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            with self._lock:
+                # Two renders of one page can race to store it: count only what the replace adds
+                try:
+                    replaced = os.path.getsize(path)
+                except OSError:
+                    replaced = 0
+                os.replace(tmp_path, path)
+                if self._size is not None:
+                    self._size += len(data) - replaced
+        except OSError as e:
+            print(f"⚠️ Render cache write error: {e}")
+            return
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield stat.st_mtime, stat.st_size, path
+
+    def _evict(self):
+        """Drops least recently used files until the cache is back under 90% of its budget."""
+        entries = sorted(self._entries())
+        self._size = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if self._size <= target:
+                break
+            try:
+                os.remove(path)
+                self._size -= size
+            except OSError:
+                pass
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
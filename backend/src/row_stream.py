@@ -0,0 +1,69 @@
+import json
+
+# ==============================================================================
+# STREAMED ROWS
+# The vision extractors used to wait for the whole completion before parsing it,
+# so the client saw nothing but a page_done count. With STREAM_ROWS, the model
+# output is read as it is generated: this scanner follows the JSON and hands
+# over each row (an object inside a top-level list such as "items",
+# "evaluations" or "references") the moment its closing brace arrives. The
+# full response is still parsed as before; streamed rows are a preview.
+# ==============================================================================
+
+class PartialRows:
+    """Incremental scanner for {"<key>": [{...}, {...}], ...} that may be wrapped in prose or a ```json fence."""
+
+    def __init__(self):
+        self.text = ""
+        self.pos = 0
+        self.stack = []
+        self.in_string = False
+        self.escape = False
+        self.string_start = 0
+        self.last_string = None
+        self.key = None
+        self.row_start = None
+        self.finished = False
+
+    def feed(self, chunk):
+        """Adds generated text; returns [(key, row dict), ...] for the rows completed by it."""
+        self.text += chunk
+        rows = []
+        text = self.text
+        while self.pos < len(text) and not self.finished:
+            char = text[self.pos]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.stack == ["{"]:
+                        self.last_string = text[self.string_start:self.pos + 1]
+            elif char == '"' and self.stack:
+                self.in_string = True
+                self.string_start = self.pos
+            elif char == ":" and self.stack == ["{"] and self.last_string:
+                try:
+                    self.key = json.loads(self.last_string)
+                except ValueError:
+                    self.key = None
+            elif char in "{[":
+                if char == "{" and self.stack == ["{", "["]:
+                    self.row_start = self.pos
+                self.stack.append(char)
+            elif char in "}]" and self.stack:
+                self.stack.pop()
+                if char == "}" and self.stack == ["{", "["] and self.row_start is not None:
+                    try:
+                        row = json.loads(text[self.row_start:self.pos + 1])
+                        if isinstance(row, dict):
+                            rows.append((self.key, row))
+                    except ValueError:
+                        pass
+                    self.row_start = None
+                if not self.stack:
+                    self.finished = True
+            self.pos += 1
+        return rows
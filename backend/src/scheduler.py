@@ -0,0 +1,261 @@
+import re
+import time
+import heapq
+import random
+import asyncio
+import itertools
+
+import openai
+
+from src.config import LLM_RPM, LLM_TPM, LLM_MAX_CONCURRENCY, LLM_MIN_CONCURRENCY, LLM_MAX_RETRIES, LLM_IMAGE_TOKENS
+
+# ==============================================================================
+# LLM SCHEDULER
+# One scheduler per provider, shared by every request in the process. Calls
+# wait in a priority queue (course title > router > extraction) and are released
+# when three limits allow it:
+#   - token buckets for requests/min and tokens/min (estimated from the messages),
+#   - an AIMD concurrency limit: +1 per window of successes, halved on a 429 or
+#     timeout, so the in-flight count settles just under what the provider accepts,
+#   - a pause until the provider's reset time when its rate-limit headers (or a
+#     Retry-After) say the quota is used up.
+# Retries live here rather than in ChatOpenAI's max_retries, so a 429 backs the
+# whole process off instead of every caller hammering the provider on its own.
+# ==============================================================================
+
+PRIORITY_TITLE = 0
+PRIORITY_ROUTER = 1
+PRIORITY_EXTRACTION = 2
+
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError)
+# Errors that mean "too much load": these shrink the concurrency limit
+BACKOFF_ERRORS = (openai.RateLimitError, openai.APITimeoutError, asyncio.TimeoutError)
+# Other retryable errors (5xx, dropped connections) wait RETRY_BASE_DELAY * 2^attempt seconds
+# (jittered, at most 30) or the provider's Retry-After before the next attempt
+RETRY_BASE_DELAY = 1.0
+
+_schedulers = {}
+
+def get_scheduler(provider):
+    """The process-wide scheduler for a provider (e.g. the model's API base URL)."""
+    if provider not in _schedulers:
+        _schedulers[provider] = LLMScheduler(provider)
+    return _schedulers[provider]
+
+def schedulers():
+    """Every scheduler created so far, by provider (for logging)."""
+    return dict(_schedulers)
+
+def parse_reset(value):
+    """Seconds until a rate-limit reset: "1s", "6m0s", "250ms", "20" (Retry-After) -> float."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    seconds = 0.0
+    for amount, unit in re.findall(r"([\d.]+)(ms|h|m|s)", value):
+        seconds += float(amount) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+    return seconds or None
+
+def estimate_tokens(messages):
+    """Rough prompt size for the TPM bucket: ~4 characters per token, LLM_IMAGE_TOKENS per image."""
+    if hasattr(messages, "to_messages"):
+        messages = messages.to_messages()
+    if isinstance(messages, str):
+        return len(messages) // 4
+    chars, images = 0, 0
+    for message in messages:
+        content = message.content if hasattr(message, "content") else message
+        if isinstance(content, str):
+            chars += len(content)
+            continue
+        for part in content:
+            if isinstance(part, dict) and part.get("type") == "image_url":
+                images += 1
+            elif isinstance(part, dict):
+                chars += len(part.get("text", ""))
+    return chars // 4 + images * LLM_IMAGE_TOKENS
+
+class TokenBucket:
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        """Seconds until `amount` is available (0 if it is now). 0 capacity means unlimited."""
+        if not self.capacity:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount):
+        if self.capacity:
+            self._refill()
+            self.tokens -= min(amount, self.capacity)
+
+    def cap(self, remaining):
+        """The provider says only `remaining` is left in this window."""
+        if self.capacity:
+            self._refill()
+            self.tokens = min(self.tokens, float(remaining))
+
+class LLMScheduler:
+    def __init__(self, name, rpm=LLM_RPM, tpm=LLM_TPM, max_concurrency=LLM_MAX_CONCURRENCY,
+                 min_concurrency=LLM_MIN_CONCURRENCY, max_retries=LLM_MAX_RETRIES):
+        self.name = name
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = max(1, min_concurrency)
+        self.limit = float(max(self.min_concurrency, min(4, max_concurrency)))
+        self.max_retries = max_retries
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.stats = {"calls": 0, "retries": 0, "rate_limited": 0, "timeouts": 0, "peak_in_flight": 0}
+        self._queue = []
+        self._seq = itertools.count()
+        self._loop = None
+        self._wakeup = None
+
+    def _bind_loop(self):
+        # asyncio primitives belong to one event loop; tests and the CLI start several
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._queue = []
+            self.in_flight = 0
+
+    def _notify(self):
+        self._wakeup.set()
+
+    def _wait_time(self, tokens):
+        """0 if the head of the queue may start now, else how long until something could change."""
+        if self.in_flight >= int(self.limit):
+            return None # Woken up by a finishing call
+        return max(self.paused_until - time.monotonic(), self.requests.wait_time(1), self.tokens.wait_time(tokens))
+
+    async def _acquire(self, priority, tokens):
+        entry = (priority, next(self._seq), tokens)
+        heapq.heappush(self._queue, entry)
+        try:
+            while True:
+                wait = self._wait_time(tokens) if self._queue[0] is entry else None
+                if wait == 0:
+                    heapq.heappop(self._queue)
+                    break
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            if entry in self._queue:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+            self._notify()
+            raise
+
+        self.requests.take(1)
+        self.tokens.take(tokens)
+        self.in_flight += 1
+        self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.in_flight)
+        self._notify() # The next caller in line may be able to start as well
+
+    def _release(self):
+        self.in_flight -= 1
+        self._notify()
+
+    def _on_success(self):
+        # Additive increase: about +1 once a full window of calls has succeeded
+        self.limit = min(self.max_concurrency, self.limit + 1.0 / max(self.limit, 1.0))
+
+    def _on_overload(self, retry_after=None):
+        # Multiplicative decrease
+        self.limit = max(self.min_concurrency, self.limit / 2)
+        if retry_after:
+            self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+
+    def observe_headers(self, headers):
+        """Applies x-ratelimit-* / retry-after headers from a provider response."""
+        if not headers:
+            return
+        headers = {k.lower(): v for k, v in dict(headers).items()}
+        for kind, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            if remaining is None:
+                continue
+            try:
+                remaining = float(remaining)
+            except ValueError:
+                continue
+            bucket.cap(remaining)
+            if remaining <= 0:
+                reset = parse_reset(headers.get(f"x-ratelimit-reset-{kind}"))
+                if reset:
+                    self.paused_until = max(self.paused_until, time.monotonic() + reset)
+        retry_after = parse_reset(headers.get("retry-after"))
+        if retry_after:
+            self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+
+    @property
+    def queue_depth(self):
+        """Calls waiting for a slot."""
+        return len(self._queue)
+
+    async def run(self, call, messages, priority=PRIORITY_EXTRACTION, on_acquire=None):
+        """Runs `await call(messages)` under the limits, retrying overload errors with backoff.
+
+        `on_acquire()`, if given, is called each time the call gets a slot and is about to be sent.
+        """
+        self._bind_loop()
+        tokens = estimate_tokens(messages)
+        attempt = 0
+        while True:
+            await self._acquire(priority, tokens)
+            if on_acquire is not None:
+                on_acquire()
+            try:
+                response = await call(messages)
+            except RETRYABLE_ERRORS + (asyncio.TimeoutError,) as e:
+                self._release()
+                response_headers = getattr(getattr(e, "response", None), "headers", None)
+                self.observe_headers(response_headers)
+                retry_after = parse_reset((response_headers or {}).get("retry-after"))
+                overloaded = isinstance(e, BACKOFF_ERRORS)
+                if overloaded:
+                    key = "rate_limited" if isinstance(e, openai.RateLimitError) else "timeouts"
+                    self.stats[key] += 1
+                    self._on_overload(retry_after or min(30.0, 2.0 ** attempt))
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                self.stats["retries"] += 1
+                print(f"⏳ [{self.name}] {type(e).__name__}, retry {attempt}/{self.max_retries} "
+                      f"(concurrency limit now {int(self.limit)})")
+                if not overloaded:
+                    # Overload errors wait out the scheduler-wide pause in _acquire; the rest back off here
+                    await asyncio.sleep(retry_after or min(30.0, RETRY_BASE_DELAY * 2.0 ** (attempt - 1)) * random.uniform(0.5, 1.0))
+                continue
+            except BaseException:
+                self._release()
+                raise
+
+            self._release()
+            self.stats["calls"] += 1
+            self.observe_headers(getattr(response, "response_metadata", {}).get("headers"))
+            self._on_success()
+            return response
@@ -1,4 +1,4 @@
-from typing import List, TypedDict
+from typing import Any, List, TypedDict
 from pydantic import BaseModel, Field
 
 class TimeEntry(TypedDict):
@@ -14,6 +14,7 @@ class DetailsEntry(TypedDict):
 class State(TypedDict):
     raw_text: str
     page_image_b64: str  # Added for Vision Extractor
+    page: Any  # src.render.LazyPage: renders page_image_b64 on demand when it isn't supplied
     classification: List[str]
     known_course_title: str
     eval_data: List[dict] # Replaces time_data and details_data
@@ -21,11 +22,25 @@ class State(TypedDict):
     reference_data: List[dict] # New for Issue 8
     final_schedule: List[dict]
     user_date_format: str
+    speculative_eval: Any  # src.graph.Speculation started by router_node (SPECULATIVE_EVAL)
+    eval_tier: str  # Which tier answered EVAL: text_layer | text_llm | vision (src/cascade.py)
+    eval_saved: Any  # Seconds of vision latency that tier saved (None before any vision call)
+    on_row: Any  # on_row(kind, data) callback for streamed rows (src/row_stream.py), or None
 class RouteDecision(BaseModel):
     categories: List[str] = Field(
         description="A list of categories this page belongs to. Can be multiple. Choose from: ['EVAL', 'SYLLABUS', 'REFERENCES', 'SKIP']. Return 'EVAL' if it contains exam/evaluation details. Return 'SYLLABUS' if it contains course plan or lecture counts. Return 'REFERENCES' if it lists textbooks. Return 'SKIP' if irrelevant."
     )
 
+class PageRoute(BaseModel):
+    page: int = Field(description="The page number, exactly as given in the '=== PAGE n ===' marker")
+    categories: List[str] = Field(
+        description="The categories this page belongs to. Can be multiple. Choose from: ['EVAL', 'SYLLABUS', 'REFERENCES', 'SKIP']."
+    )
+
+# Batched router: one decision per page of the document
+class DocumentRouteDecision(BaseModel):
+    pages: List[PageRoute]
+
 class CourseTitle(BaseModel):
     title: str = Field(
         description="The descriptive Course Title"
@@ -69,3 +84,11 @@ class ReferenceExtraction(BaseModel):
 
 class ReferenceList(BaseModel):
     items: List[ReferenceExtraction]
+
+# Fused schema: one vision call for pages that need several extractions
+class FusedExtraction(BaseModel):
+    evaluations: List[EvalExtraction] = Field(description="Items of the Evaluation/Grading Scheme table. Empty list if there is none.")
+    references: List[ReferenceExtraction] = Field(description="Textbooks and reference books. Empty list if there are none.")
+
+class FusedExtractionWithSyllabus(FusedExtraction):
+    syllabus: List[SyllabusExtraction] = Field(description="Modules/topics of the course plan. Empty list if there is none.")
@@ -0,0 +1,76 @@
+import asyncio
+
+# ==============================================================================
+# SINGLE-FLIGHT STREAMS
+# At semester start the same handful of handouts is uploaded hundreds of times
+# within minutes, and the whole-PDF Redis cache is only written at the "done"
+# event, so every upload that arrives while the first one is still running used
+# to run the full pipeline again. A Flight runs one NDJSON stream in a background
+# task and records every chunk; later requests for the same key attach to it,
+# get the chunks emitted so far replayed, then follow the live stream.
+# The pipeline is cancelled only when its last subscriber disconnects.
+# ==============================================================================
+
+class Flight:
+    def __init__(self, key, stream_factory):
+        self.key = key
+        self.chunks = []
+        self.finished = False
+        self.subscribers = 0
+        self._changed = asyncio.Condition()
+        self.task = asyncio.create_task(self._run(stream_factory))
+
+    async def _run(self, stream_factory):
+        try:
+            async for chunk in stream_factory():
+                async with self._changed:
+                    self.chunks.append(chunk)
+                    self._changed.notify_all()
+        except Exception as e:
+            print(f"⚠️ [SINGLE-FLIGHT] Stream for {self.key} failed: {e}")
+        finally:
+            self.finished = True
+            async with self._changed:
+                self._changed.notify_all()
+
+    async def subscribe(self):
+        """Every chunk of the stream from the beginning: replayed, then live."""
+        self.subscribers += 1
+        index = 0
+        try:
+            while True:
+                async with self._changed:
+                    await self._changed.wait_for(lambda: index < len(self.chunks) or self.finished)
+                    pending = self.chunks[index:]
+                if not pending and self.finished:
+                    return
+                for chunk in pending:
+                    yield chunk
+                index += len(pending)
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.finished:
+                # Nobody is listening any more; stop paying for the pipeline
+                self.task.cancel()
+
+class SingleFlight:
+    def __init__(self):
+        self.flights = {}
+        self.joined = 0
+
+    def join(self, key, stream_factory):
+        """Returns (flight, started): the in-flight stream for `key`, started from `stream_factory` if there is none."""
+        flight = self.flights.get(key)
+        if flight is not None and not flight.finished:
+            self.joined += 1
+            return flight, False
+
+        flight = Flight(key, stream_factory)
+        self.flights[key] = flight
+        flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        return flight, True
+
+    def _forget(self, key, flight):
+        # Finished results come from the Redis cache from here on
+        if self.flights.get(key) is flight:
+            del self.flights[key]
@@ -0,0 +1,110 @@
+import re
+
+# ==============================================================================
+# LOCAL COURSE TITLE
+# extract_course_title spent an LLM (or vision) round-trip on every upload before
+# any page could start. Most handouts state the title outright, so it is read
+# locally first, from (in order of trust):
+#   - a "Course Title: ..." / "Course Name: ..." line,
+#   - a course-code line in the BITS shape ("EEE F211 Electrical Machines"), or a
+#     plain code ("MATH 101 Calculus") under a "Course No" label,
+#   - the PDF's metadata title, unless it is a file name or an editor default,
+#   - a plain code line without a label ("ROOM 2204 Lecture Hall" looks the same),
+#   - the largest-font line on page 1 that isn't the institute's letterhead.
+# Each source carries a confidence; below TITLE_LOCAL_MIN_CONFIDENCE the LLM decides.
+# ==============================================================================
+
+LABELLED_TITLE = re.compile(r"course\s*(?:title|name)\s*[:\-–]\s*(?P<title>[^\n]+)", re.IGNORECASE)
+COURSE_CODE = re.compile(
+    r"^\s*(?P<code>(?P<dept>[A-Z]{2,5})\s+(?P<letter>[A-Z]\s?)?(?P<number>\d{3,4})[A-Z]?)\s*[:\-–]?\s*(?P<title>[A-Za-z][^\n]{2,80})$",
+    re.MULTILINE,
+)
+# "JULY 2025 - NOV 2025", "MAY 2024 Batch": dates, not course codes
+MONTH_PREFIX = re.compile(r"^(JAN|FEB|MAR|APR|MAY|JUN|JUL|AUG|SEP|OCT|NOV|DEC)", re.IGNORECASE)
+YEAR = re.compile(r"^(19|20)\d\d$")
+COURSE_NO_LABEL = re.compile(r"course\s*(no\.?|number|code)", re.IGNORECASE)
+# Labels that often follow the title on the same line of a two-column header
+TRAILING_LABELS = re.compile(
+    r"\s+(course\s*no\.?|course\s*code|instructor[\s-]*in[\s-]*charge|credits?|l\s*t\s*p|semester)\b.*$",
+    re.IGNORECASE,
+)
+# Letterhead, document-type and section lines are never the course title
+NOT_A_TITLE = re.compile(
+    r"\b(birla|institute|university|college|pilani|goa|hyderabad|dubai|campus|division|department|"
+    r"semester|handout|part\s*(i|ii|1|2)\b|date|instructor|course\s*(no|code|title|name))",
+    re.IGNORECASE,
+)
+GENERIC_METADATA = re.compile(r"(microsoft|word\s*-|untitled|\.docx?$|\.pdf$|^document\d*$|handout)", re.IGNORECASE)
+
+LABELLED_CONFIDENCE = 0.95
+CODE_LINE_CONFIDENCE = 0.85
+METADATA_CONFIDENCE = 0.7
+BARE_CODE_CONFIDENCE = 0.6
+FONT_CONFIDENCE = 0.6
+
+def clean_title(raw):
+    """Strips labels, codes and punctuation around a candidate; "" if nothing title-like is left."""
+    title = TRAILING_LABELS.sub("", raw or "").strip(" \t:-–|,.")
+    title = re.sub(r"\s{2,}", " ", title)
+    if len(title) < 3 or not re.search(r"[A-Za-z]{3}", title) or NOT_A_TITLE.search(title):
+        return ""
+    return title
+
+def labelled_title(text):
+    for match in LABELLED_TITLE.finditer(text or ""):
+        title = clean_title(match.group("title"))
+        if title:
+            return title
+    return ""
+
+def code_lines(text):
+    """Yields (title, trusted) for course-code lines; trusted means the BITS "CS F215" shape or a "Course No" label
+    on the line or the two before it."""
+    text = text or ""
+    for match in COURSE_CODE.finditer(text):
+        if MONTH_PREFIX.match(match.group("dept")) or YEAR.match(match.group("number")):
+            continue
+        title = clean_title(match.group("title"))
+        if not title:
+            continue
+        preceding = text[:match.start()].splitlines()[-2:]
+        labelled = any(COURSE_NO_LABEL.search(line) for line in preceding + [match.group(0)])
+        yield title, bool(match.group("letter")) or labelled
+
+def code_line_title(text):
+    for title, trusted in code_lines(text):
+        if trusted:
+            return title
+    return ""
+
+def bare_code_title(text):
+    for title, _ in code_lines(text):
+        return title
+    return ""
+
+def metadata_title(title):
+    if not title or GENERIC_METADATA.search(title):
+        return ""
+    return clean_title(title)
+
+def largest_font_title(spans):
+    """`spans` is [(font size, line text), ...] from page 1."""
+    for size, line in sorted(spans, key=lambda span: -span[0]):
+        title = clean_title(line)
+        if title:
+            return title
+    return ""
+
+def local_course_title(text, metadata=None, spans=()):
+    """Returns (title, confidence) from the first page; ("", 0.0) when nothing usable is found."""
+    for finder, source, confidence in (
+        (labelled_title, text, LABELLED_CONFIDENCE),
+        (code_line_title, text, CODE_LINE_CONFIDENCE),
+        (metadata_title, metadata, METADATA_CONFIDENCE),
+        (bare_code_title, text, BARE_CODE_CONFIDENCE),
+        (largest_font_title, spans, FONT_CONFIDENCE),
+    ):
+        title = finder(source)
+        if title:
+            return title, confidence
+    return "", 0.0
@@ -0,0 +1,17 @@
+import os
+
+# `src/__init__.py` compiles the graph, which builds the ChatOpenAI clients at import time.
+# Offline tests never reach the provider, but the client refuses to construct without a key.
+os.environ.setdefault("AICREDITS_API_KEY", "offline-test-key")
+
+# The on-disk render cache would carry page images from one test run into the next,
+# so renders would no longer happen where the tests expect them. Cache tests opt in explicitly.
+os.environ.setdefault("RENDER_CACHE", "false")
+
+# Same for the LLM response cache: a fake model's answer from one test would be replayed in another.
+os.environ.setdefault("LLM_CACHE", "false")
+
+# Leases and rate-limit counters live in a SQLite file shared by workers; give each test
+# run its own, so counters from a previous run can't rate-limit this one.
+import tempfile
+os.environ.setdefault("COORDINATION_PATH", os.path.join(tempfile.mkdtemp(prefix="coordination-"), "coordination.sqlite3"))
@@ -0,0 +1,99 @@
+import os
+import re
+import sys
+import json
+import asyncio
+from unittest.mock import patch
+
+from langchain_core.runnables import RunnableLambda
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+import src.graph as graph
+from src.render import LazyPage
+
+PAGE_TEXTS = {
+    1: "Course Handout Part II. Course No: CS F215. Course Title: Digital Design. Instructor in charge.",
+    2: "Evaluation Scheme: Mid-Sem Exam 30% on 11/10/2025, Comprehensive Exam 40% on 16/12/2025 FN.",
+    3: "Text Books: T1. Morris Mano, Digital Design, Pearson. Reference Books: R1. Wakerly.",
+    4: "Make-up Policy: make-up will be granted only for genuine reasons with prior permission.",
+}
+
+# These tests cover batching on its own; the local pre-router is tested in test_prerouter.py
+class FakeRouterLLM:
+    """Answers batched router prompts by looking for keywords in each '=== PAGE n ===' section."""
+
+    def __init__(self, drop_pages=()):
+        self.calls = 0
+        self.drop_pages = set(drop_pages)
+
+    def __call__(self, prompt_value):
+        self.calls += 1
+        text = prompt_value.to_messages()[-1].content
+        pages = []
+        for page_num, body in re.findall(r"=== PAGE (\d+) ===\n(.*?)(?=\n\n=== PAGE|\Z)", text, re.S):
+            if int(page_num) in self.drop_pages:
+                continue
+            categories = ["EVAL"] if "Evaluation" in body else ["REFERENCES"] if "Books" in body else ["SKIP"]
+            pages.append({"page": int(page_num), "categories": categories})
+        return json.dumps({"pages": pages})
+
+def test_one_call_classifies_every_page():
+    print("🚀 Testing batched document router...\n")
+    fake = FakeRouterLLM()
+    with patch.object(graph, "PREROUTER", False), patch.object(graph, "llm", RunnableLambda(fake)):
+        routes = asyncio.run(graph.route_pages(PAGE_TEXTS))
+
+    print(f"   Routes: {routes} in {fake.calls} call(s)")
+    assert fake.calls == 1
+    assert routes == {1: ["SKIP"], 2: ["EVAL"], 3: ["REFERENCES"], 4: ["SKIP"]}
+    print("   ✅ PASSED")
+
+def test_batches_split_by_character_budget():
+    texts = {n: "x" * 1000 + f" page {n}" for n in range(1, 16)}
+    batches = graph.split_router_batches(texts, max_chars=4500)
+    assert [len(b) for b in batches] == [4, 4, 4, 3]
+    assert [n for b in batches for n in b] == list(range(1, 16)), "Page order must be preserved"
+
+    # Each page is truncated exactly like the per-page router
+    long = graph.split_router_batches({1: "y" * 10000})
+    assert len(long[0][1]) == graph.ROUTER_PAGE_CHARS
+
+def test_missing_pages_fall_back_to_page_router():
+    fake = FakeRouterLLM(drop_pages={3})
+    texts = {**PAGE_TEXTS, 5: "scan"} # Too little text: needs the vision router
+    with patch.object(graph, "PREROUTER", False), patch.object(graph, "llm", RunnableLambda(fake)):
+        routes = asyncio.run(graph.route_pages(texts))
+    assert 3 not in routes and 5 not in routes
+    assert routes[2] == ["EVAL"]
+
+    # router_node passes a batched classification straight through
+    result = asyncio.run(graph.router_node({"raw_text": PAGE_TEXTS[2], "classification": ["EVAL"]}))
+    assert result == {"classification": ["EVAL"]}
+
+def test_pipeline_presets_classification():
+    seen = {}
+
+    class FakeGraph:
+        async def ainvoke(self, state):
+            seen[int(state["page"].page_num)] = state.get("classification")
+            return {"final_schedule": [], "syllabus_data": [], "reference_data": []}
+
+    async def drain():
+        pages = [LazyPage(n, text) for n, text in PAGE_TEXTS.items()]
+        async for _ in main.run_pages_concurrently(pages, "Digital Design", router_mode="document"):
+            pass
+
+    fake = FakeRouterLLM(drop_pages={4})
+    with patch.object(graph, "PREROUTER", False), patch.object(graph, "llm", RunnableLambda(fake)), patch.object(main, "app", FakeGraph()):
+        asyncio.run(drain())
+
+    assert fake.calls == 1
+    assert seen == {1: ["SKIP"], 2: ["EVAL"], 3: ["REFERENCES"], 4: None}
+
+if __name__ == "__main__":
+    test_one_call_classifies_every_page()
+    test_batches_split_by_character_budget()
+    test_missing_pages_fall_back_to_page_router()
+    test_pipeline_presets_classification()
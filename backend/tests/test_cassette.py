@@ -0,0 +1,109 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import tempfile
+from unittest.mock import patch
+
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.graph as graph
+from src.cassette import Cassette, CassetteMiss
+from src.render import PageImage
+
+MIDSEM = {"event_name": "Mid-Sem Exam", "date_raw": "11/10/2025", "time_raw": "4-5:30 PM", "format": "CB", "weightage": "30%"}
+LATENCY = 0.2
+
+class LiveModel:
+    """Stands in for the provider: slow, and counts every call that reaches it."""
+    model_name = "qwen/qwen3-vl-8b-instruct"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        await asyncio.sleep(LATENCY)
+        return AIMessage(content=json.dumps({"items": [dict(MIDSEM, event_name=f"Quiz {self.calls}")]}),
+                         usage_metadata={"input_tokens": 900, "output_tokens": 30, "total_tokens": 930})
+
+    async def astream(self, messages):
+        self.calls += 1
+        text = json.dumps({"items": [MIDSEM]})
+        for start in range(0, len(text), 10):
+            await asyncio.sleep(LATENCY / 10)
+            yield AIMessageChunk(content=text[start:start + 10])
+
+class OfflineModel:
+    model_name = LiveModel.model_name
+
+    async def ainvoke(self, messages):
+        raise AssertionError("Replay must not reach the provider")
+
+    async def astream(self, messages):
+        raise AssertionError("Replay must not reach the provider")
+        yield
+
+def run_eval_node(model, on_row=None):
+    state = {"page_image_b64": PageImage(b"png").b64, "known_course_title": "Digital Design"}
+    if on_row is not None:
+        state["on_row"] = on_row
+    with patch.object(graph, "vision_llm", model):
+        start = time.perf_counter()
+        result = asyncio.run(graph.vision_eval_extractor_node(state))
+        return result, time.perf_counter() - start
+
+def test_record_then_replay_offline():
+    print("🚀 Testing LLM cassettes...\n")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cassettes", "eval.json")
+        live = LiveModel()
+        recorded, live_seconds = run_eval_node(Cassette(path, "record").wrap(live))
+        assert live.calls == 1 and os.path.exists(path)
+
+        replayed, replay_seconds = run_eval_node(Cassette(path, "replay").wrap(OfflineModel()))
+        print(f"   Live {live_seconds:.2f}s, replay {replay_seconds:.3f}s")
+        assert replayed == recorded
+        assert replay_seconds < LATENCY / 2
+
+        _, timed_seconds = run_eval_node(Cassette(path, "replay", replay_latency=True).wrap(OfflineModel()))
+        assert timed_seconds >= LATENCY * 0.9, "The recorded latency is replayed on request"
+    print("   ✅ PASSED")
+
+def test_streamed_calls_replay_as_streams():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "stream.json")
+        live_rows, replay_rows = [], []
+        recorded, _ = run_eval_node(Cassette(path, "record").wrap(LiveModel()), lambda kind, data: live_rows.append(data))
+        replayed, _ = run_eval_node(Cassette(path, "replay").wrap(OfflineModel()), lambda kind, data: replay_rows.append(data))
+    assert replayed == recorded and replay_rows == live_rows and len(replay_rows) == 1
+
+def test_repeats_replay_in_order_and_misses_fail():
+    messages = [HumanMessage(content="same request")]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "repeat.json")
+        recorder = Cassette(path, "record").wrap(LiveModel())
+        first = asyncio.run(recorder.ainvoke(messages)).content
+        second = asyncio.run(recorder.ainvoke(messages)).content
+        assert first != second
+
+        player = Cassette(path, "replay").wrap(OfflineModel())
+        assert [asyncio.run(player.ainvoke(messages)).content for _ in range(3)] == [first, second, second]
+        assert asyncio.run(player.ainvoke(messages)).usage_metadata["input_tokens"] == 900
+        with pytest.raises(CassetteMiss):
+            asyncio.run(player.ainvoke([HumanMessage(content="never recorded")]))
+
+        live = LiveModel()
+        auto = Cassette(path, "auto")
+        asyncio.run(auto.wrap(live).ainvoke([HumanMessage(content="new request")]))
+        asyncio.run(auto.wrap(live).ainvoke(messages))
+        assert live.calls == 1 and auto.stats == {"recorded": 1, "replayed": 1}
+
+if __name__ == "__main__":
+    test_record_then_replay_offline()
+    test_streamed_calls_replay_as_streams()
+    test_repeats_replay_in_order_and_misses_fail()
@@ -0,0 +1,142 @@
+import os
+import sys
+import json
+import hashlib
+import asyncio
+import tempfile
+from unittest.mock import patch
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import api
+from src.coordination import Coordinator, LocalCoordinator, Lease
+
+PDF_BYTES = b"%PDF-1.4 shared handout"
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+def test_leases_are_exclusive_across_workers():
+    print("🚀 Testing cross-worker coordination...\n")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "coordination.sqlite3")
+        # Two coordinators on one file behave like two worker processes
+        worker_a, worker_b = LocalCoordinator(path), LocalCoordinator(path)
+
+        async def run():
+            assert await worker_a.acquire("doc", "a", ttl=30)
+            assert not await worker_b.acquire("doc", "b", ttl=30)
+            assert not await worker_b.renew("doc", "b", ttl=30)
+            assert await worker_a.renew("doc", "a", ttl=30)
+
+            await worker_b.release("doc", "b") # Not b's lease: no effect
+            assert not await worker_b.acquire("doc", "b", ttl=30)
+            await worker_a.release("doc", "a")
+            assert await worker_b.acquire("doc", "b", ttl=30)
+
+            # A crashed holder's lease runs out
+            assert await worker_a.acquire("crashed", "a", ttl=-1)
+            assert await worker_b.acquire("crashed", "b", ttl=30)
+
+        asyncio.run(run())
+    print("   ✅ PASSED")
+
+def test_counters_are_shared_across_workers():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "coordination.sqlite3")
+        worker_a, worker_b = LocalCoordinator(path), LocalCoordinator(path)
+
+        async def run():
+            hits = [await worker.hit("ratelimit:ip", limit=3, window=3600) for worker in (worker_a, worker_b, worker_a, worker_b)]
+            return hits, await worker_a.incr("other", window=3600)
+
+        hits, other = asyncio.run(run())
+        assert hits == [True, True, True, False] and other == 1
+
+def test_lease_wait_returns_once_the_holder_releases():
+    with tempfile.TemporaryDirectory() as tmp:
+        coordinator = LocalCoordinator(os.path.join(tmp, "coordination.sqlite3"))
+
+        async def run():
+            holder, waiter = Lease(coordinator, "doc", ttl=30), Lease(coordinator, "doc", ttl=30)
+            assert await holder.try_acquire() and not await waiter.try_acquire()
+            asyncio.get_running_loop().call_later(0.05, lambda: asyncio.ensure_future(holder.release()))
+            acquired = await waiter.wait(timeout=2, poll=0.01)
+            await waiter.release()
+            return acquired
+
+        assert asyncio.run(run())
+
+def test_api_waits_for_the_worker_holding_the_document():
+    redis = FakeRedis()
+    pdf_hash = hashlib.sha256(PDF_BYTES).hexdigest()
+    calls = []
+
+    async def fake_process_pdf_stream(source, date_format, filename=None, page_cache=None, source_hash=None):
+        calls.append(filename)
+        yield json.dumps({"type": "done", "data": {}}) + "\n"
+
+    async def run():
+        # Another worker (a second coordinator on the same file) is already running this handout
+        other_worker = Lease(LocalCoordinator(api.coordinator.path), f"lease:{pdf_hash}:DMY:cached")
+        assert await other_worker.try_acquire()
+
+        async def finish_other_worker():
+            await asyncio.sleep(0.1)
+            await redis.set(pdf_hash, json.dumps({"course_title": "Digital Design"}))
+            await other_worker.release()
+
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            files = {"file": ("handout.pdf", PDF_BYTES, "application/pdf")}
+            response, _ = await asyncio.gather(
+                client.post("/generate", files=files, data={"date_format": "DMY"}),
+                finish_other_worker(),
+            )
+        return [json.loads(line) for line in response.text.splitlines()]
+
+    with patch.object(api, "redis_client", redis), patch.object(api, "process_pdf_stream", fake_process_pdf_stream):
+        events = asyncio.run(run())
+
+    assert not calls, "This worker must not run its own pipeline"
+    assert events[0]["type"] == "progress" and events[-1] == {"type": "done", "data": {"course_title": "Digital Design"}}
+
+@patch.dict(os.environ, {"ENVIRONMENT": "production"})
+def test_rate_limit_counts_requests_from_every_worker():
+    other_worker = LocalCoordinator(api.coordinator.path)
+    with patch.object(api, "GENERATE_RATE_LIMIT", 2):
+        asyncio.run(other_worker.incr("ratelimit:generate:testclient", api.GENERATE_RATE_WINDOW))
+        asyncio.run(other_worker.incr("ratelimit:generate:testclient", api.GENERATE_RATE_WINDOW))
+        response = TestClient(api.app).post(
+            "/generate",
+            files={"file": ("handout.pdf", PDF_BYTES, "application/pdf")},
+            data={"date_format": "DMY"},
+        )
+    assert response.status_code == 429
+
+def test_incomplete_backend_fails_when_built():
+    class CountersOnly(Coordinator):
+        async def incr(self, key, window):
+            return 1
+
+    with pytest.raises(TypeError):
+        CountersOnly()
+
+if __name__ == "__main__":
+    test_leases_are_exclusive_across_workers()
+    test_counters_are_shared_across_workers()
+    test_lease_wait_returns_once_the_holder_releases()
+    test_api_waits_for_the_worker_holding_the_document()
+    test_rate_limit_counts_requests_from_every_worker()
+    test_incomplete_backend_fails_when_built()
@@ -0,0 +1,114 @@
+import os
+import sys
+import json
+import asyncio
+import tempfile
+from unittest.mock import patch
+
+import fitz # PyMuPDF
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from src.title import local_course_title
+from src.render import LazyPage, open_pages
+
+HANDOUT_HEADER = """BIRLA INSTITUTE OF TECHNOLOGY AND SCIENCE, Pilani
+Pilani Campus
+FIRST SEMESTER 2025-2026
+Course Handout (Part II)
+Date: 01-08-2025
+Course No. : EEE F211
+Course Title : Electrical Machines
+Instructor-in-Charge : Dr. A. Kumar
+"""
+EVAL_ITEM = {"event_name": "Mid-Sem Exam", "date_raw": "11/10/2025", "time_raw": "4-5:30 PM", "format": "CB", "weightage": "30%"}
+
+def test_titles_stated_on_page_one_are_read_locally():
+    print("🚀 Testing local course title extraction...\n")
+    assert local_course_title(HANDOUT_HEADER) == ("Electrical Machines", 0.95)
+    assert local_course_title("BITS Pilani\nCS F215 Digital Design\nSemester I")[0] == "Digital Design"
+    assert local_course_title("Course Title: Digital Signal Processing   Course No.: EEE F434")[0] == "Digital Signal Processing"
+
+    # Weaker sources stay below the default threshold, so the LLM still decides
+    title, confidence = local_course_title("Instructor: X", metadata="General Biology")
+    assert title == "General Biology" and confidence < 0.8
+    assert local_course_title("Instructor: X", metadata="Microsoft Word - handout_v3.docx") == ("", 0.0)
+    assert local_course_title("", spans=[(18.0, "BIRLA INSTITUTE OF TECHNOLOGY AND SCIENCE"), (14.0, "Microprocessors"), (10.0, "Date: 1/8")])[0] == "Microprocessors"
+    print("   ✅ PASSED")
+
+def test_lines_that_only_look_like_codes_defer_to_the_llm():
+    for line in ("JULY 2025 - NOV 2025", "ROOM 2204 Lecture Hall", "LT 2204 Mon Wed Fri", "MAY 2024 Batch"):
+        title, confidence = local_course_title(f"BITS Pilani\n{line}\nInstructor: X")
+        assert confidence < 0.8, f"{line!r} was read as the course title {title!r}"
+
+    # A plain code is trusted under a "Course No" label, and "IC" inside a title is not a label
+    assert local_course_title("Course No.\nMATH 101 Calculus") == ("Calculus", 0.85)
+    assert local_course_title("Course Title: Advanced IC Engines") == ("Advanced IC Engines", 0.95)
+
+def test_title_hints_come_from_the_pdf():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "handout.pdf")
+        doc = fitz.open()
+        page = doc.new_page()
+        page.insert_text((72, 80), "BITS Pilani, Instruction Division", fontsize=10)
+        page.insert_text((72, 120), "Power Electronics", fontsize=20)
+        doc.set_metadata({"title": "Power Electronics Handout"})
+        doc.save(path)
+        doc.close()
+
+        document, pages = open_pages(path, lazy=True)
+        try:
+            metadata, lines = pages[0].title_hints()
+        finally:
+            document.close()
+    assert metadata == "Power Electronics Handout"
+    assert max(lines)[1] == "Power Electronics"
+    assert LazyPage(1, "").title_hints() == ("", [])
+
+class FakeGraph:
+    def __init__(self):
+        self.titles = []
+
+    async def ainvoke(self, state):
+        self.titles.append(state["known_course_title"])
+        return main.retitle({"classification": ["EVAL"], "eval_data": [EVAL_ITEM]}, state["known_course_title"], state["user_date_format"])
+
+def run_stream(pages, title_delay):
+    llm_titles = []
+
+    async def slow_title(text, image_b64="", page=None, local=True):
+        llm_titles.append(text)
+        await asyncio.sleep(title_delay)
+        return "Digital Design"
+
+    async def collect():
+        return [json.loads(chunk) async for chunk in main.stream_pages("handout.pdf", pages)]
+
+    fake = FakeGraph()
+    with patch.object(main, "app", fake), patch.object(main, "extract_course_title", slow_title):
+        return asyncio.run(collect()), fake.titles, llm_titles
+
+def test_pages_start_before_the_llm_title_and_get_patched():
+    pages = [LazyPage(1, "Some scanned-looking cover without a title line"), LazyPage(2, "Evaluation page")]
+    events, graph_titles, llm_titles = run_stream(pages, title_delay=0.2)
+
+    types = [event["type"] for event in events]
+    assert len(llm_titles) == 1 and graph_titles == ["", ""], "Pages ran without waiting for the title"
+    assert types.index("page_done") < [e.get("message", "") for e in events].index("Extracted Title: Digital Design")
+    schedule = events[-1]["data"]["evaluation_scheme"]
+    assert [item["Subject"] for item in schedule] == ["Digital Design + Mid-Sem Exam"] * 2
+    assert events[-1]["data"]["course_title"] == "Digital Design"
+
+def test_local_title_skips_the_llm():
+    pages = [LazyPage(1, HANDOUT_HEADER), LazyPage(2, "Evaluation page")]
+    events, graph_titles, llm_titles = run_stream(pages, title_delay=0)
+    assert not llm_titles and graph_titles == ["Electrical Machines"] * 2
+    assert events[-1]["data"]["evaluation_scheme"][0]["Subject"] == "Electrical Machines + Mid-Sem Exam"
+
+if __name__ == "__main__":
+    test_titles_stated_on_page_one_are_read_locally()
+    test_lines_that_only_look_like_codes_defer_to_the_llm()
+    test_title_hints_come_from_the_pdf()
+    test_pages_start_before_the_llm_title_and_get_patched()
+    test_local_title_skips_the_llm()
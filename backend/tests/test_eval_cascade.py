@@ -0,0 +1,114 @@
+import os
+import sys
+import json
+import asyncio
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.graph as graph
+import src.cascade as cascade
+from src.cascade import check_eval_items, CascadeReport
+from src.render import LazyPage, PageImage
+
+MIDSEM = {"event_name": "Mid-Sem Exam", "date_raw": "11/10/2025", "time_raw": "4-5:30 PM", "format": "CB", "weightage": "30%"}
+QUIZ_1 = {"event_name": "Quiz", "date_raw": "02/09/2025", "time_raw": "5 PM", "format": "CB", "weightage": "15%"}
+QUIZ_2 = {"event_name": "Quiz", "date_raw": "07/10/2025", "time_raw": "5 PM", "format": "CB", "weightage": "15%"}
+COMPRE = {"event_name": "Comprehensive Exam", "date_raw": "05/12/2025", "time_raw": "FN", "format": "OB", "weightage": "40%"}
+ASSIGNMENT = {"event_name": "Assignment", "date_raw": "TBA", "time_raw": "", "format": "TBA", "weightage": "15%"}
+GOOD_ROWS = [MIDSEM, QUIZ_1, QUIZ_2, COMPRE, ASSIGNMENT]
+
+# Free-text evaluation scheme: no table for the text-layer reader, but plenty of text
+EVAL_PAGE = (
+    "Evaluation Scheme. The mid-semester test (30%, closed book) will be held on 11/10/2025 from 4 to 5:30 PM. "
+    "Two quizzes of 15% each are scheduled on 02/09/2025 and 07/10/2025 at 5 PM. "
+    "The comprehensive examination (40%, open book) is on 05/12/2025 in the forenoon session. "
+    "Assignments carry 15% and their dates will be announced in class. Make-up requests must reach the "
+    "instructor-in-charge before the test."
+)
+
+class FakeVisionLLM:
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        return AIMessage(content=json.dumps({"items": [MIDSEM]}))
+
+def fake_text_llm(rows):
+    def answer(prompt_value):
+        return json.dumps({"items": rows})
+    return RunnableLambda(answer)
+
+def run_eval_page(rows, enabled=True):
+    state = {"raw_text": EVAL_PAGE, "page": LazyPage(1, EVAL_PAGE, image=PageImage(b"png")),
+             "classification": ["EVAL"], "user_date_format": "DMY"}
+    vision = FakeVisionLLM()
+    with patch.object(graph, "EVAL_CASCADE", enabled), patch.object(graph, "llm", fake_text_llm(rows)), \
+            patch.object(graph, "vision_llm", vision):
+        result = asyncio.run(graph.vision_orchestrator_node(state))
+    return result, vision.calls
+
+def test_checks_accept_a_complete_scheme():
+    print("🚀 Testing the EVAL model cascade...\n")
+    assert check_eval_items(GOOD_ROWS) == (True, "")
+
+    ok, reason = check_eval_items([MIDSEM, COMPRE])
+    print(f"   Partial scheme rejected: {reason}")
+    assert not ok and "70" in reason
+    assert not check_eval_items([dict(MIDSEM, date_raw="after the second quiz")] + GOOD_ROWS[1:])[0]
+    assert not check_eval_items([dict(MIDSEM, event_name="")])[0]
+    assert not check_eval_items([])[0]
+    print("   ✅ PASSED")
+
+def test_valid_text_answer_skips_vision():
+    result, vision_calls = run_eval_page(GOOD_ROWS)
+    assert vision_calls == 0
+    assert result["eval_data"] == GOOD_ROWS and result["eval_tier"] == cascade.TIER_TEXT_LLM
+
+def test_implausible_text_answer_falls_back_to_vision():
+    result, vision_calls = run_eval_page([MIDSEM, COMPRE])
+    assert vision_calls == 1
+    assert result["eval_data"] == [MIDSEM] and result["eval_tier"] == cascade.TIER_VISION
+    assert result["eval_saved"] <= 0
+
+    result, vision_calls = run_eval_page(GOOD_ROWS, enabled=False)
+    assert vision_calls == 1 and result["eval_tier"] == cascade.TIER_VISION
+
+def test_failed_fused_call_does_not_ask_the_text_model_again():
+    text_calls = []
+    def answer(prompt_value):
+        text_calls.append(prompt_value)
+        return json.dumps({"items": [MIDSEM, COMPRE]})
+
+    state = {"raw_text": EVAL_PAGE, "page": LazyPage(1, EVAL_PAGE, image=PageImage(b"png")),
+             "classification": ["EVAL", "REFERENCES"], "user_date_format": "DMY"}
+    vision = FakeVisionLLM()  # Its answer doesn't parse as a fused response, so the orchestrator falls back
+    with patch.object(graph, "EVAL_CASCADE", True), patch.object(graph, "VISION_FUSED", True), \
+            patch.object(graph, "llm", RunnableLambda(answer)), patch.object(graph, "vision_llm", vision):
+        result = asyncio.run(graph.vision_orchestrator_node(state))
+    assert len(text_calls) == 1
+    assert vision.calls == 3, "fused, then EVAL and REFERENCES separately"
+    assert result["eval_data"] == [MIDSEM] and result["eval_tier"] == cascade.TIER_VISION
+
+def test_report_counts_tiers_per_handout():
+    with patch.object(cascade, "VISION_LATENCY", [4.0, 6.0]):
+        saved = cascade.latency_saved(cascade.TIER_TEXT_LLM, 1.0)
+    assert saved == 4.0
+
+    report = CascadeReport()
+    for result in ({"eval_tier": "text_llm", "eval_saved": saved}, {"eval_tier": "vision", "eval_saved": -1.0},
+                   {"eval_tier": "text_layer", "eval_saved": None}, {"reference_data": []}):
+        report.add(result)
+    assert report.tiers == {"text_llm": 1, "vision": 1, "text_layer": 1}
+    assert report.summary() == "text_layer 1, text_llm 1, vision 1; ~3.0s of vision latency saved"
+
+if __name__ == "__main__":
+    test_checks_accept_a_complete_scheme()
+    test_valid_text_answer_skips_vision()
+    test_implausible_text_answer_falls_back_to_vision()
+    test_failed_fused_call_does_not_ask_the_text_model_again()
+    test_report_counts_tiers_per_handout()
@@ -0,0 +1,87 @@
+import os
+import sys
+import asyncio
+import tempfile
+
+import fitz # PyMuPDF
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.graph import get_eval_image
+from src.layout import find_eval_region, region_dpi
+from src.render import open_pages
+
+COLUMNS = [72, 200, 280, 360, 460, 540]
+TABLE = [
+    ["Component", "Duration", "Weightage", "Date & Time", "Nature"],
+    ["Mid-Sem Exam", "90 min", "30%", "11/10/2025 4-5:30 PM", "CB"],
+    ["Quiz", "30 min", "10%", "05/09/2025", "OB"],
+    ["Comprehensive Exam", "3 hrs", "40%", "16/12/2025 FN", "CB"],
+]
+
+def add_eval_page(doc):
+    page = doc.new_page()
+    page.insert_textbox(fitz.Rect(72, 72, 520, 400), "Course Description: " + "Lorem ipsum dolor sit amet. " * 40, fontsize=10)
+    page.insert_text((72, 450), "6. Evaluation Scheme:", fontsize=12)
+    for r, row in enumerate(TABLE):
+        y = 470 + r * 22
+        for c, cell in enumerate(row):
+            page.draw_rect(fitz.Rect(COLUMNS[c], y, COLUMNS[c + 1], y + 22), color=(0, 0, 0))
+            page.insert_text((COLUMNS[c] + 3, y + 15), cell, fontsize=7)
+    return page
+
+def test_region_covers_heading_and_table():
+    print("🚀 Testing evaluation table region detection...\n")
+    doc = fitz.open()
+    page = add_eval_page(doc)
+    region = find_eval_region(page)
+    print(f"   Region: {region} on page {page.rect}")
+
+    assert region is not None
+    assert region.contains(fitz.Rect(72, 470, 540, 558)), "Table must be inside the region"
+    assert region.y0 < 450, "Heading above the table must be included"
+    assert region.y0 > 400, "Course description must be cropped out"
+    assert region.get_area() < page.rect.get_area() * 0.3
+    print("   ✅ PASSED")
+
+def test_no_region_without_evaluation_content():
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_textbox(fitz.Rect(72, 72, 520, 700), "Textbooks and reference books. " * 30, fontsize=10)
+    assert find_eval_region(page) is None
+
+    scanned = doc.new_page()
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 200, 280), False)
+    pix.set_rect(pix.irect, (250, 250, 250))
+    scanned.insert_image(scanned.rect, pixmap=pix)
+    assert find_eval_region(scanned) is None, "Scanned pages must fall back to the full page"
+
+def test_region_dpi_is_bounded():
+    page_rect = fitz.Rect(0, 0, 595, 842)
+    assert region_dpi(page_rect, None, 81, 150) == 81
+    assert region_dpi(page_rect, fitz.Rect(0, 0, 595, 421), 81, 150) == 114
+    assert region_dpi(page_rect, fitz.Rect(0, 0, 100, 100), 81, 150) == 150
+
+def test_eval_node_image_is_cropped():
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "handout.pdf")
+        doc = fitz.open()
+        add_eval_page(doc)
+        doc.save(pdf_path)
+        doc.close()
+
+        document, pages = open_pages(pdf_path, dpi=81, lazy=True)
+        try:
+            cropped = asyncio.run(get_eval_image({"page": pages[0]}))
+            full = pages[0].image()
+            print(f"   Eval payload: {len(full)}B full page -> {len(cropped)}B cropped")
+            assert cropped is not full
+            assert len(cropped) < len(full)
+        finally:
+            document.close()
+
+if __name__ == "__main__":
+    test_region_covers_heading_and_table()
+    test_no_region_without_evaluation_content()
+    test_region_dpi_is_bounded()
+    test_eval_node_image_is_cropped()
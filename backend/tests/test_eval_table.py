@@ -0,0 +1,110 @@
+import os
+import sys
+import asyncio
+import tempfile
+from unittest.mock import patch
+
+import fitz # PyMuPDF
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.graph as graph
+from src.eval_table import extract_eval_table, extract_from_rows, split_date_time
+from src.render import open_pages
+
+COLUMNS = [72, 190, 250, 320, 470, 540]
+TABLE = [
+    ["Evaluation Component", "Duration", "Weightage (%)", "Date & Time", "Nature of Component"],
+    ["Mid-Semester Test", "90 min", "30", "11/10/2025 4-5:30 PM", "Closed Book"],
+    ["Quizzes", "30 min", "10", "05/09/2025 & 12/10/2025 (FN)", "OB"],
+    ["Comprehensive Exam", "3 hrs", "40", "16/12/2025 FN", "CB"],
+    ["Total", "", "100", "", ""],
+]
+
+def make_handout(path, table=True):
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 80), "Course Handout Part II", fontsize=12)
+    if table:
+        page.insert_text((72, 300), "Evaluation Scheme:", fontsize=12)
+        for r, row in enumerate(TABLE):
+            y = 320 + r * 22
+            for c, cell in enumerate(row):
+                page.draw_rect(fitz.Rect(COLUMNS[c], y, COLUMNS[c + 1], y + 22), color=(0, 0, 0))
+                page.insert_text((COLUMNS[c] + 3, y + 15), cell, fontsize=6)
+    else:
+        page.insert_textbox(fitz.Rect(72, 300, 520, 500), "Mid-semester test on 11/10/2025 carries 30% weightage.", fontsize=10)
+    doc.save(path)
+    doc.close()
+
+def test_reads_evaluation_table_from_text_layer():
+    print("🚀 Testing text-layer evaluation table extraction...\n")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "handout.pdf")
+        make_handout(path)
+        doc = fitz.open(path)
+        items, confidence = extract_eval_table(doc[0])
+        doc.close()
+
+    for item in items:
+        print(f"   {item}")
+    print(f"   Confidence: {confidence}")
+
+    assert confidence >= 0.8
+    assert [i["event_name"] for i in items] == ["Mid-Semester Test", "Quizzes", "Quizzes", "Comprehensive Exam"]
+    assert items[0]["date_raw"] == "11/10/2025" and items[0]["time_raw"] == "4-5:30 PM"
+    assert [i["date_raw"] for i in items[1:3]] == ["05/09/2025", "12/10/2025"]
+    assert items[2]["time_raw"] == "FN", "A trailing shared time applies to every date in the cell"
+    assert [i["format"] for i in items] == ["CB", "OB", "OB", "CB"]
+    assert items[3]["weightage"] == "40"
+    print("   ✅ PASSED")
+
+def test_date_time_cells():
+    assert split_date_time("Sept 15, 2025 2-3 PM") == [("Sept 15, 2025", "2-3 PM")]
+    assert split_date_time("11.10.25 10.30-12 AM") == [("11.10.25", "10.30-12 AM")]
+    assert split_date_time("TBA") == [("TBA", "")]
+
+def test_low_confidence_for_non_evaluation_tables():
+    # Lecture plans have no date column, so they never look like an evaluation header
+    items, confidence = extract_from_rows([["Lecture No.", "Topic", "Chapter"], ["1-3", "Introduction", "1"]])
+    assert items == [] and confidence == 0.0
+
+    # Dates that can't be read lower the score
+    items, confidence = extract_from_rows([
+        ["Component", "Weightage", "Date"],
+        ["Assignment", "20%", "Continuous"],
+        ["Project", "20%", "Continuous"],
+    ])
+    assert len(items) == 2 and confidence < 0.8
+
+def test_vision_is_only_called_when_confidence_is_low():
+    print("🚀 Testing vision fallback for the EVAL branch...\n")
+    calls = []
+
+    async def fake_vision(state):
+        calls.append(state["page"].page_num)
+        return {"eval_data": [{"event_name": "from vision"}]}
+
+    with tempfile.TemporaryDirectory() as tmp, patch.object(graph, "vision_eval_extractor_node", fake_vision):
+        for has_table in (True, False):
+            path = os.path.join(tmp, f"handout_{has_table}.pdf")
+            make_handout(path, table=has_table)
+            document, pages = open_pages(path, lazy=True)
+            try:
+                result = asyncio.run(graph.eval_extractor_node({"page": pages[0]}))
+            finally:
+                document.close()
+
+            if has_table:
+                assert len(result["eval_data"]) == 4 and not calls, "Confident text extraction must skip vision"
+                assert document.renders == 0, "No page image should be rendered"
+            else:
+                assert result["eval_data"] == [{"event_name": "from vision"}] and calls == [1]
+
+    print("   ✅ PASSED")
+
+if __name__ == "__main__":
+    test_reads_evaluation_table_from_text_layer()
+    test_date_time_cells()
+    test_low_confidence_for_non_evaluation_tables()
+    test_vision_is_only_called_when_confidence_is_low()
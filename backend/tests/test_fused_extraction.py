@@ -0,0 +1,82 @@
+import os
+import sys
+import json
+import asyncio
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.graph as graph
+from src.render import LazyPage, PageImage
+
+EVAL_ITEM = {"event_name": "Mid-Sem Exam", "date_raw": "11/10/2025", "time_raw": "4-5:30 PM", "format": "CB", "weightage": "30%"}
+BOOK = {"title": "Digital Design", "author": "M. Morris Mano"}
+
+class FakeVisionLLM:
+    """Answers fused, eval-only and reference-only prompts; can be told to fail the fused one."""
+
+    def __init__(self, fail_fused=False):
+        self.prompts = []
+        self.fail_fused = fail_fused
+
+    async def ainvoke(self, messages):
+        prompt = messages[0].content[0]["text"]
+        if "EVALUATIONS ('evaluations')" in prompt:
+            self.prompts.append("fused")
+            if self.fail_fused:
+                raise RuntimeError("provider rejected the request")
+            return AIMessage(content=json.dumps({"evaluations": [EVAL_ITEM], "references": [BOOK]}))
+        if "Exam Dates" in prompt:
+            self.prompts.append("eval")
+            return AIMessage(content=json.dumps({"items": [EVAL_ITEM]}))
+        self.prompts.append("references")
+        return AIMessage(content=json.dumps({"items": [BOOK]}))
+
+class TextLayerPage(LazyPage):
+    def eval_rows(self):
+        return [dict(EVAL_ITEM, event_name="Quiz 1")], 1.0
+
+def make_state(page):
+    return {"page": page, "raw_text": "", "classification": ["EVAL", "REFERENCES"]}
+
+def run_orchestrator(page, fake):
+    with patch.object(graph, "vision_llm", fake):
+        return asyncio.run(graph.vision_orchestrator_node(make_state(page)))
+
+def test_multi_category_page_uses_one_vision_call():
+    print("🚀 Testing fused vision extraction...\n")
+    fake = FakeVisionLLM()
+    result = run_orchestrator(LazyPage(1, "", image=PageImage(b"png")), fake)
+
+    print(f"   Vision calls: {fake.prompts}")
+    assert fake.prompts == ["fused"]
+    assert result["eval_data"] == [EVAL_ITEM] and result["reference_data"] == [BOOK]
+    print("   ✅ PASSED")
+
+def test_failed_fused_call_falls_back_to_separate_calls():
+    fake = FakeVisionLLM(fail_fused=True)
+    result = run_orchestrator(LazyPage(1, "", image=PageImage(b"png")), fake)
+
+    assert fake.prompts[0] == "fused" and sorted(fake.prompts[1:]) == ["eval", "references"]
+    assert result["eval_data"] == [EVAL_ITEM] and result["reference_data"] == [BOOK]
+
+def test_text_layer_eval_leaves_only_references_for_vision():
+    fake = FakeVisionLLM()
+    result = run_orchestrator(TextLayerPage(1, "", image=PageImage(b"png")), fake)
+
+    assert fake.prompts == ["references"]
+    assert result["eval_data"][0]["event_name"] == "Quiz 1" and result["reference_data"] == [BOOK]
+
+def test_single_category_pages_are_unchanged():
+    fake = FakeVisionLLM()
+    with patch.object(graph, "vision_llm", fake):
+        asyncio.run(graph.vision_orchestrator_node({"page": LazyPage(1, "", image=PageImage(b"png")), "classification": ["REFERENCES"]}))
+    assert fake.prompts == ["references"]
+
+if __name__ == "__main__":
+    test_multi_category_page_uses_one_vision_call()
+    test_failed_fused_call_falls_back_to_separate_calls()
+    test_text_layer_eval_leaves_only_references_for_vision()
+    test_single_category_pages_are_unchanged()
@@ -0,0 +1,123 @@
+import os
+import sys
+import json
+import asyncio
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.graph as graph
+import src.hedging as hedging
+from src.hedging import hedged, node_latency, percentile
+from src.render import PageImage
+
+BOOKS = json.dumps({"items": [{"title": "Digital Design", "author": "Mano"}]})
+
+def warm_up(node, seconds, samples=20):
+    hedging._latencies.pop(node, None)
+    latency = node_latency(node)
+    latency.observed.extend([seconds] * samples)
+    return latency
+
+def delayed(seconds, content="ok", log=None, name=None):
+    async def call(messages):
+        try:
+            await asyncio.sleep(seconds)
+        except asyncio.CancelledError:
+            if log is not None:
+                log.append(f"{name} cancelled")
+            raise
+        return content
+    return call
+
+def accept(response):
+    pass
+
+def test_slow_call_is_hedged_and_loser_cancelled():
+    print("🚀 Testing hedged requests...\n")
+    latency = warm_up("test-node", 0.02)
+    log = []
+
+    response = asyncio.run(hedged(delayed(1.0, "slow", log, "primary"), [], "test-node", accept,
+                                  hedge_call=delayed(0.01, "fast")))
+    stats = latency.summary()
+    print(f"   Stats: {stats}")
+    assert response == "fast" and log == ["primary cancelled"]
+    assert stats["hedges"] == 1 and stats["hedge_wins"] == 1 and stats["extra_calls"] == 1
+    assert stats["observed"]["p99"] < 0.5
+    print("   ✅ PASSED")
+
+def test_fast_calls_and_cold_nodes_are_not_hedged():
+    latency = warm_up("warm", 0.5)
+    assert asyncio.run(hedged(delayed(0.01, "primary"), [], "warm", accept)) == "primary"
+    assert latency.hedges == 0
+
+    hedging._latencies.pop("cold", None)
+    assert asyncio.run(hedged(delayed(0.05, "primary"), [], "cold", accept)) == "primary"
+    assert node_latency("cold").hedges == 0, "Nothing is hedged before HEDGE_MIN_SAMPLES latencies"
+
+def test_queue_time_does_not_trigger_a_hedge():
+    latency = warm_up("queued", 0.05)
+    sent = asyncio.Event()
+    hedges = []
+
+    async def queued_then_fast(messages):
+        await asyncio.sleep(0.3) # Waiting for a scheduler slot
+        sent.set()
+        await asyncio.sleep(0.01)
+        return "primary"
+
+    response = asyncio.run(hedged(queued_then_fast, [], "queued", accept,
+                                  hedge_call=lambda m: hedges.append(m) or delayed(0.01, "hedge")(m), started=sent))
+    assert response == "primary" and hedges == [] and latency.hedges == 0
+    assert latency.observed[-1] < 0.2, "Latency is measured from the slot, not the queue"
+
+def test_hedges_cancelled_in_the_queue_are_not_extra_calls():
+    latency = warm_up("queued-hedge", 0.02)
+    hedge_sent = asyncio.Event()
+
+    async def stuck_in_queue(messages):
+        await asyncio.sleep(1.0) # Cancelled before a slot frees up; would then set hedge_sent
+        hedge_sent.set()
+
+    response = asyncio.run(hedged(delayed(0.1, "primary"), [], "queued-hedge", accept,
+                                  hedge_call=stuck_in_queue, hedge_started=hedge_sent))
+    assert response == "primary"
+    assert latency.summary()["hedges"] == 1 and latency.summary()["extra_calls"] == 0
+
+def test_invalid_answer_does_not_win():
+    warm_up("validated", 0.01)
+
+    def must_be_json(response):
+        json.loads(response)
+
+    response = asyncio.run(hedged(delayed(0.1, BOOKS), [], "validated", must_be_json,
+                                  hedge_call=delayed(0.02, "Sorry, the image is unreadable")))
+    assert response == BOOKS
+
+def test_vision_node_hedges_through_call_model():
+    warm_up("references", 0.02)
+
+    class SlowThenFast:
+        def __init__(self):
+            self.delays = [1.0, 0.01]
+
+        async def ainvoke(self, messages):
+            await asyncio.sleep(self.delays.pop(0))
+            return AIMessage(content=BOOKS)
+
+    with patch.object(graph, "HEDGING", True), patch.object(graph, "vision_llm", SlowThenFast()):
+        result = asyncio.run(graph.vision_reference_extractor_node({"page_image_b64": PageImage(b"png").b64}))
+    assert result["reference_data"][0]["title"] == "Digital Design"
+    assert node_latency("references").hedge_wins == 1
+    assert percentile([3, 1, 2, 4], 50) == 2 and percentile([], 95) is None
+
+if __name__ == "__main__":
+    test_slow_call_is_hedged_and_loser_cancelled()
+    test_fast_calls_and_cold_nodes_are_not_hedged()
+    test_queue_time_does_not_trigger_a_hedge()
+    test_hedges_cancelled_in_the_queue_are_not_extra_calls()
+    test_invalid_answer_does_not_win()
+    test_vision_node_hedges_through_call_model()
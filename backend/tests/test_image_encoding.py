@@ -0,0 +1,68 @@
+import os
+import sys
+
+import fitz # PyMuPDF
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import encode
+from src.encode import encode_page, resolve_format
+
+def make_page():
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "EVALUATION SCHEME", fontsize=16)
+    for row in range(12):
+        y = 110 + row * 24
+        page.draw_rect(fitz.Rect(72, y, 520, y + 24), color=(0, 0, 0), fill=(1, 0.9 - row * 0.05, 0.8))
+        page.insert_text((80, y + 16), f"Quiz {row + 1}   {row + 1:02d}/09/2025   4-5 PM   CB   10%", fontsize=10)
+    return doc, page
+
+def test_formats_and_mime_types():
+    doc, page = make_page()
+    png, png_mime = encode_page(page, 81, fmt="png", max_bytes=0)
+    gray, gray_mime = encode_page(page, 81, fmt="gray", max_bytes=0)
+    jpeg, jpeg_mime = encode_page(page, 81, fmt="jpeg", max_bytes=0)
+    doc.close()
+
+    print(f"   png={len(png)}B gray={len(gray)}B jpeg={len(jpeg)}B")
+    assert png.startswith(b"\x89PNG") and png_mime == "image/png"
+    assert gray.startswith(b"\x89PNG") and gray_mime == "image/png"
+    assert jpeg.startswith(b"\xff\xd8") and jpeg_mime == "image/jpeg"
+    assert len(gray) < len(png), "Grayscale should be smaller than full colour"
+
+def test_byte_budget_is_met_or_best_effort():
+    print("🚀 Testing per-page byte budget...\n")
+    doc, page = make_page()
+    unbounded, _ = encode_page(page, 150, fmt="jpeg", max_bytes=0)
+    budget = len(unbounded) // 3
+    bounded, _ = encode_page(page, 150, fmt="jpeg", max_bytes=budget)
+    impossible, _ = encode_page(page, 150, fmt="png", max_bytes=100)
+    floor, _ = encode_page(page, encode.MIN_DPI, fmt="png", max_bytes=0)
+    doc.close()
+
+    print(f"   jpeg: {len(unbounded)}B -> {len(bounded)}B (budget {budget}B)")
+    assert len(bounded) <= budget
+    # Can't get a page under 100 bytes: return the smallest attempt (MIN_DPI) instead of failing
+    assert impossible == floor
+    print("   ✅ PASSED")
+
+def test_pillow_formats_fall_back_without_pillow():
+    original = encode.Image
+    try:
+        encode.Image = None
+        assert resolve_format("palette") == "gray"
+        assert resolve_format("webp") == "jpeg"
+    finally:
+        encode.Image = original
+    assert resolve_format("JPG") == "jpeg"
+    try:
+        resolve_format("tiff")
+        assert False, "Unknown formats must be rejected"
+    except ValueError:
+        pass
+
+if __name__ == "__main__":
+    test_formats_and_mime_types()
+    test_byte_budget_is_met_or_best_effort()
+    test_pillow_formats_fall_back_without_pillow()
@@ -0,0 +1,125 @@
+import os
+import sys
+import asyncio
+import hashlib
+import tempfile
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import api
+from src.ingest import UploadSink, ingest_upload, ingest_form
+
+class FakeUpload:
+    def __init__(self, data, filename="handout.pdf"):
+        self.filename = filename
+        self._stream = BytesIO(data)
+
+    async def read(self, size=-1):
+        return self._stream.read(size)
+
+PAYLOAD = b"%PDF-1.4\n" + os.urandom(50_000)
+
+def test_small_upload_stays_in_memory():
+    upload = asyncio.run(ingest_upload(FakeUpload(PAYLOAD), spill_threshold=1_000_000, chunk_size=4096))
+    assert upload.sha256 == hashlib.sha256(PAYLOAD).hexdigest()
+    assert upload.size == len(PAYLOAD)
+    assert upload.path is None and bytes(upload.source) == PAYLOAD
+    upload.cleanup()
+    assert upload.source is None
+
+def test_large_upload_spills_to_unique_file():
+    print("🚀 Testing upload spill to disk...\n")
+    with tempfile.TemporaryDirectory() as tmp:
+        first = asyncio.run(ingest_upload(FakeUpload(PAYLOAD), spill_dir=tmp, spill_threshold=10_000, chunk_size=4096))
+        second = asyncio.run(ingest_upload(FakeUpload(PAYLOAD), spill_dir=tmp, spill_threshold=10_000, chunk_size=4096))
+
+        assert first.data is None and os.path.isfile(first.path)
+        assert first.path != second.path, "Same-named uploads must not collide"
+        with open(first.path, "rb") as f:
+            assert f.read() == PAYLOAD
+        assert first.sha256 == second.sha256 == hashlib.sha256(PAYLOAD).hexdigest()
+
+        first.cleanup()
+        second.cleanup()
+        assert os.listdir(tmp) == [], "Spill files must be removed on cleanup"
+    print("   ✅ PASSED")
+
+def test_generate_hands_buffer_to_stream():
+    received = {}
+
+    async def fake_stream(pdf_file, date_format, filename=None, page_cache=None, source_hash=None):
+        received["source"] = bytes(pdf_file)
+        received["filename"] = filename
+        received["source_hash"] = source_hash
+        yield '{"type": "init", "total_pages": 1}\n'
+
+    with patch.object(api, "process_pdf_stream", fake_stream), patch.object(api, "redis_client", None):
+        response = TestClient(api.app).post(
+            "/generate",
+            files={"file": ("syllabus.pdf", BytesIO(PAYLOAD), "application/pdf")},
+            data={"date_format": "DMY"},
+        )
+
+    assert response.status_code == 200
+    assert received == {"source": PAYLOAD, "filename": "syllabus.pdf", "source_hash": hashlib.sha256(PAYLOAD).hexdigest()}
+
+class FakeRequest:
+    """A multipart body delivered in small network-sized chunks."""
+
+    def __init__(self, body, content_type, chunk_size=1024):
+        self.headers = {"content-type": content_type}
+        self.body = body
+        self.chunk_size = chunk_size
+        self.received = 0
+
+    async def stream(self):
+        for start in range(0, len(self.body), self.chunk_size):
+            self.received = start + self.chunk_size
+            yield self.body[start:start + self.chunk_size]
+
+def multipart_body(fields, boundary="handoutboundary"):
+    parts = []
+    for name, value in fields.items():
+        if isinstance(value, tuple):
+            filename, data = value
+            parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                         f"Content-Type: application/pdf\r\n\r\n".encode() + data + b"\r\n")
+        else:
+            parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    return b"".join(parts) + f"--{boundary}--\r\n".encode(), f"multipart/form-data; boundary={boundary}"
+
+def test_form_is_hashed_and_spilled_while_it_arrives():
+    body, content_type = multipart_body({"date_format": "MDY", "file": ("handout.pdf", PAYLOAD), "force_refresh": "true"})
+    request = FakeRequest(body, content_type)
+    spilled_at = []
+    real_write = UploadSink.write
+
+    async def write(sink, chunk):
+        await real_write(sink, chunk)
+        if sink.path and not spilled_at:
+            spilled_at.append(request.received)
+
+    with tempfile.TemporaryDirectory() as tmp, patch.object(UploadSink, "write", write):
+        upload, form = asyncio.run(ingest_form(request, spill_dir=tmp, spill_threshold=10_000, chunk_size=4096))
+        assert spilled_at and spilled_at[0] < len(body) / 2, "The spill file is written before the body has all arrived"
+        assert form == {"date_format": "MDY", "force_refresh": "true"}
+        assert upload.filename == "handout.pdf" and upload.sha256 == hashlib.sha256(PAYLOAD).hexdigest()
+        with open(upload.path, "rb") as f:
+            assert f.read() == PAYLOAD
+        upload.cleanup()
+
+    upload, form = asyncio.run(ingest_form(FakeRequest(*multipart_body({"date_format": "DMY"}))))
+    assert upload is None and form == {"date_format": "DMY"}
+    with pytest.raises(ValueError):
+        asyncio.run(ingest_form(FakeRequest(b"date_format=DMY", "application/x-www-form-urlencoded")))
+
+if __name__ == "__main__":
+    test_small_upload_stays_in_memory()
+    test_large_upload_spills_to_unique_file()
+    test_form_is_hashed_and_spilled_while_it_arrives()
+    test_generate_hands_buffer_to_stream()
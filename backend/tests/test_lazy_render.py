@@ -0,0 +1,60 @@
+import os
+import sys
+import asyncio
+import tempfile
+
+import fitz # PyMuPDF
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.graph import get_page_image
+from src.render import open_pages
+
+def make_pdf(path):
+    doc = fitz.open()
+    for n in range(1, 4):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Page {n}: Course Plan and Evaluation Scheme details", fontsize=12)
+    doc.save(path)
+    doc.close()
+
+def test_pages_render_only_on_demand():
+    print("🚀 Testing lazy, memoized page rendering...\n")
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "handout.pdf")
+        make_pdf(pdf_path)
+
+        document, pages = open_pages(pdf_path, dpi=81, lazy=True)
+        try:
+            assert [p.page_num for p in pages] == [1, 2, 3]
+            assert "Evaluation Scheme" in pages[1].text
+            assert document.renders == 0, "Opening a document must not rasterize anything"
+
+            async def fan_out():
+                # Two vision nodes asking for the same page at once (eval + references)
+                state = {"raw_text": pages[1].text, "page": pages[1]}
+                return await asyncio.gather(get_page_image(state), get_page_image(state))
+
+            first, second = asyncio.run(fan_out())
+            assert first is second, "Both nodes must share one PageImage"
+            assert first.data.startswith(b"\x89PNG")
+            assert first.content_part is second.content_part
+            assert first.data_url.startswith(f"data:{first.mime};base64,")
+            assert document.renders == 1, f"Expected a single memoized render, got {document.renders}"
+            assert not pages[0].is_rendered and not pages[2].is_rendered
+        finally:
+            document.close()
+
+    print(f"   Rendered {document.renders}/{len(pages)} pages")
+    print("   ✅ PASSED")
+
+def test_explicit_image_skips_render():
+    state = {"page_image_b64": "iVBORw0K", "page": None}
+    image = asyncio.run(get_page_image(state))
+    assert image.data_url == "data:image/png;base64,iVBORw0K"
+    assert image.data.startswith(b"\x89PNG")
+    assert asyncio.run(get_page_image({"raw_text": ""})) is None
+
+if __name__ == "__main__":
+    test_pages_render_only_on_demand()
+    test_explicit_image_skips_render()
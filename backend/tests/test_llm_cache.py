@@ -0,0 +1,137 @@
+import os
+import sys
+import json
+import asyncio
+import tempfile
+import threading
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.graph as graph
+from src.llm_cache import LLMCache
+from src.prompts import PROMPTS
+from src.render import LazyPage, PageImage
+
+BOOK = {"title": "Digital Design", "author": "M. Morris Mano"}
+
+class FakeVisionLLM:
+    model_name = "fake-vision"
+
+    def __init__(self, content=None):
+        self.calls = 0
+        self.content = content or json.dumps({"items": [BOOK]})
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        return AIMessage(content=self.content)
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+def extract_references(cache, fake, image=b"png"):
+    state = {"page": LazyPage(1, "", image=PageImage(image))}
+    with patch.object(graph, "get_llm_cache", lambda: cache), patch.object(graph, "vision_llm", fake):
+        return asyncio.run(graph.vision_reference_extractor_node(state))
+
+def test_identical_pages_reach_the_model_once():
+    print("🚀 Testing LLM response cache...\n")
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMCache(os.path.join(tmp, "llm.sqlite3"))
+        fake = FakeVisionLLM()
+
+        first = extract_references(cache, fake)
+        second = extract_references(cache, fake)
+        assert fake.calls == 1 and first == second == {"reference_data": [BOOK]}
+
+        # A different page image is a different input
+        extract_references(cache, fake, image=b"other png")
+        assert fake.calls == 2
+
+        # The cache is persistent: a new process (new LLMCache on the same file) still hits
+        restarted = LLMCache(os.path.join(tmp, "llm.sqlite3"))
+        extract_references(restarted, fake)
+        assert fake.calls == 2
+
+        stats = cache.stats()
+        print(f"   Model calls: {fake.calls}, stats: {stats}")
+        assert stats["hits"] == 1 and stats["misses"] == 2 and round(stats["hit_rate"], 2) == 0.33
+    print("   ✅ PASSED")
+
+def test_unparseable_responses_are_not_cached():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMCache(os.path.join(tmp, "llm.sqlite3"))
+        fake = FakeVisionLLM(content="Sorry, I can't read this image.")
+        extract_references(cache, fake)
+        extract_references(cache, fake)
+        assert fake.calls == 2
+
+def test_key_depends_on_model_prompt_and_input():
+    messages = [HumanMessage(content="Evaluation Scheme")]
+    key = LLMCache.key("model-a", PROMPTS["router"].version, messages)
+    assert key == LLMCache.key("model-a", PROMPTS["router"].version, [HumanMessage(content="Evaluation Scheme")])
+    assert key != LLMCache.key("model-b", PROMPTS["router"].version, messages)
+    assert key != LLMCache.key("model-a", PROMPTS["eval"].version, messages)
+    assert key != LLMCache.key("model-a", PROMPTS["router"].version, [HumanMessage(content="Evaluation Scheme ")])
+
+def test_ttl_lru_eviction_and_redis_tier():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMCache(os.path.join(tmp, "llm.sqlite3"), max_entries=10, ttl=60)
+
+        async def fill():
+            for i in range(64):
+                await cache.put(f"k{i}", f"v{i}")
+            return await cache.get("k63"), await cache.get("k0")
+
+        newest, oldest = asyncio.run(fill())
+        assert newest == "v63" and oldest is None
+        assert cache._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] <= 10
+
+        expired = LLMCache(os.path.join(tmp, "expired.sqlite3"), ttl=-1)
+        asyncio.run(expired.put("k", "v"))
+        assert asyncio.run(expired.get("k")) is None
+
+        # Another machine's entry comes from Redis and is then kept locally
+        redis = FakeRedis()
+        redis.data["shared"] = "from redis"
+        tiered = LLMCache(os.path.join(tmp, "tiered.sqlite3"), redis=redis)
+        assert asyncio.run(tiered.get("shared")) == "from redis"
+        tiered.redis = None
+        assert asyncio.run(tiered.get("shared")) == "from redis"
+        assert tiered.stats()["redis_hits"] == 1 and tiered.stats()["local_hits"] == 1
+
+def test_sqlite_runs_off_the_event_loop():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMCache(os.path.join(tmp, "llm.sqlite3"))
+        loop_thread, sqlite_threads = threading.get_ident(), []
+        local_get, local_put = cache._local_get, cache._local_put
+
+        def record(fn):
+            def run(*args):
+                sqlite_threads.append(threading.get_ident())
+                return fn(*args)
+            return run
+
+        async def round_trip():
+            await cache.put("k", "v")
+            return await cache.get("k")
+
+        with patch.object(cache, "_local_get", record(local_get)), patch.object(cache, "_local_put", record(local_put)):
+            assert asyncio.run(round_trip()) == "v"
+        assert len(sqlite_threads) == 2 and loop_thread not in sqlite_threads
+
+if __name__ == "__main__":
+    test_identical_pages_reach_the_model_once()
+    test_unparseable_responses_are_not_cached()
+    test_key_depends_on_model_prompt_and_input()
+    test_ttl_lru_eviction_and_redis_tier()
+    test_sqlite_runs_off_the_event_loop()
@@ -0,0 +1,112 @@
+import os
+import sys
+import json
+import asyncio
+from unittest.mock import patch
+
+import httpx
+from langchain_core.messages import AIMessage
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import api
+import src.graph as graph
+from src import metrics
+from src.metrics import Registry, estimate_cost
+from src.render import PageImage
+
+BOOKS = json.dumps({"items": [{"title": "Digital Design", "author": "Mano"}]})
+VISION_MODEL = "qwen/qwen3-vl-8b-instruct"
+
+class MeteredVisionLLM:
+    model_name = VISION_MODEL
+
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    async def ainvoke(self, messages):
+        if self.fail:
+            raise RuntimeError("provider unavailable")
+        return AIMessage(content=BOOKS, usage_metadata={"input_tokens": 1200, "output_tokens": 40, "total_tokens": 1240})
+
+class EmptyEvalLLM:
+    async def ainvoke(self, messages):
+        return AIMessage(content=json.dumps({"items": []}))
+
+def test_prometheus_text_format():
+    print("🚀 Testing the metrics registry...\n")
+    registry = Registry()
+    requests = registry.counter("demo_requests_total", "Requests.", ("node",))
+    latency = registry.histogram("demo_latency_seconds", "Latency.", ("node",), buckets=(0.1, 1.0))
+    requests.inc(node='router "text"')
+    for seconds in (0.05, 0.5, 3.0):
+        latency.observe(seconds, node="router")
+
+    text = registry.render()
+    print(text)
+    assert "# TYPE demo_requests_total counter" in text
+    assert 'demo_requests_total{node="router \\"text\\""} 1' in text
+    assert 'demo_latency_seconds_bucket{node="router",le="0.1"} 1' in text
+    assert 'demo_latency_seconds_bucket{node="router",le="1"} 2' in text
+    assert 'demo_latency_seconds_bucket{node="router",le="+Inf"} 3' in text
+    assert 'demo_latency_seconds_count{node="router"} 3' in text
+    print("   ✅ PASSED")
+
+def test_llm_calls_record_tokens_cost_and_errors():
+    node = {"node": "references", "model": VISION_MODEL}
+    before_calls = metrics.LLM_REQUESTS.value(**node)
+    before_tokens = metrics.LLM_TOKENS.value(direction="input", **node)
+    before_cost = metrics.LLM_COST.value(**node)
+    before_runs = metrics.NODE_REQUESTS.value(node="vision_reference_extractor")
+    state = {"page_image_b64": PageImage(b"png").b64}
+
+    with patch.object(graph, "vision_llm", MeteredVisionLLM()):
+        asyncio.run(graph.vision_reference_extractor_node(state))
+    assert metrics.LLM_REQUESTS.value(**node) == before_calls + 1
+    assert metrics.LLM_TOKENS.value(direction="input", **node) == before_tokens + 1200
+    assert metrics.LLM_COST.value(**node) - before_cost == estimate_cost(VISION_MODEL, 1200, 40) > 0
+    assert metrics.NODE_REQUESTS.value(node="vision_reference_extractor") == before_runs + 1
+    assert metrics.LLM_IN_FLIGHT.value(node="references") == 0
+
+    before_errors = metrics.LLM_ERRORS.value(error="RuntimeError", **node)
+    with patch.object(graph, "vision_llm", MeteredVisionLLM(fail=True)):
+        result = asyncio.run(graph.vision_reference_extractor_node(state))
+    assert result == {"reference_data": []}
+    assert metrics.LLM_ERRORS.value(error="RuntimeError", **node) == before_errors + 1
+
+def test_aggregator_is_only_counted_as_a_graph_node():
+    before = metrics.NODE_REQUESTS.value(node="aggregator")
+    rows = []
+    graph.emit_rows({"on_row": lambda kind, row: rows.append(row), "known_course_title": "Digital Design"},
+                    "eval", [{"event_name": "Mid-Sem Exam", "date_raw": "11/10/2025", "time_raw": "4-5:30 PM",
+                              "format": "CB", "weightage": "30%"}])
+    assert len(rows) == 1
+    assert metrics.NODE_REQUESTS.value(node="aggregator") == before
+
+    state = {"raw_text": "", "page_image_b64": PageImage(b"png").b64, "classification": ["EVAL"]}
+    with patch.object(graph, "vision_llm", EmptyEvalLLM()):
+        asyncio.run(graph.app.ainvoke(state))
+    assert metrics.NODE_REQUESTS.value(node="aggregator") == before + 1
+
+def test_metrics_endpoint():
+    async def scrape():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/metrics")
+
+    with patch.object(graph, "vision_llm", MeteredVisionLLM()):
+        asyncio.run(graph.vision_reference_extractor_node({"page_image_b64": PageImage(b"png").b64}))
+    response = asyncio.run(scrape())
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert f'handout_llm_tokens_total{{node="references",model="{VISION_MODEL}",direction="output"}}' in response.text
+    assert 'handout_node_latency_seconds_count{node="vision_reference_extractor"}' in response.text
+
+    with patch.object(api, "METRICS", False):
+        assert asyncio.run(scrape()).status_code == 404
+
+if __name__ == "__main__":
+    test_prometheus_text_format()
+    test_llm_calls_record_tokens_cost_and_errors()
+    test_aggregator_is_only_counted_as_a_graph_node()
+    test_metrics_endpoint()
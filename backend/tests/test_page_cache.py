@@ -0,0 +1,99 @@
+import os
+import sys
+import asyncio
+import tempfile
+from unittest.mock import patch
+
+import fitz # PyMuPDF
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from src.page_cache import PageCache, page_entry
+from src.render import open_pages
+
+class FakeGraph:
+    def __init__(self):
+        self.calls = []
+
+    async def ainvoke(self, state):
+        self.calls.append(state["raw_text"].strip())
+        if "Evaluation" in state["raw_text"]:
+            return {
+                "classification": ["EVAL"],
+                "eval_data": [{"event_name": "Mid-Sem Exam", "date_raw": "11/10/2025", "time_raw": "4-5:30 PM", "format": "CB", "weightage": "30%"}],
+                "syllabus_data": [],
+                "reference_data": [],
+                "final_schedule": [{"Subject": "fresh"}],
+            }
+        return {"classification": ["SKIP"], "eval_data": [], "syllabus_data": [], "reference_data": [], "final_schedule": []}
+
+def make_pdf(path, page_texts):
+    doc = fitz.open()
+    for text in page_texts:
+        doc.new_page().insert_text((72, 100), text, fontsize=11)
+    doc.save(path)
+    doc.close()
+
+async def run_pdf(path, title, cache):
+    document, pages = open_pages(path, lazy=True)
+    try:
+        results = {}
+        async for item in main.run_pages_concurrently(pages, title, "DMY", page_cache=cache):
+            if item[0] == "done":
+                results[item[1]] = item[2]
+        return results
+    finally:
+        document.close()
+
+def test_revised_handout_only_reprocesses_changed_pages():
+    print("🚀 Testing per-page content cache...\n")
+    cache = PageCache()
+    fake = FakeGraph()
+
+    with tempfile.TemporaryDirectory() as tmp, patch.object(main, "app", fake):
+        original = os.path.join(tmp, "handout_v1.pdf")
+        revised = os.path.join(tmp, "handout_v2.pdf")
+        make_pdf(original, ["Course Handout Part II", "Evaluation Scheme: Mid-Sem 11/10/2025", "Textbooks"])
+        make_pdf(revised, ["Course Handout Part II", "Evaluation Scheme: Mid-Sem 11/10/2025", "Textbooks (revised)"])
+
+        asyncio.run(run_pdf(original, "Digital Design", cache))
+        assert len(fake.calls) == 3
+
+        results = asyncio.run(run_pdf(revised, "Dsp", cache))
+
+    print(f"   Graph calls: {len(fake.calls)}, cache hits: {cache.hits}, misses: {cache.misses}")
+    assert fake.calls[3:] == ["Textbooks (revised)"], "Only the changed page should reach the graph"
+    assert results[1]["cached"] and results[2]["cached"] and not results[3].get("cached")
+
+    # The cached page is re-aggregated for this request's course title
+    assert results[2]["final_schedule"][0]["Subject"] == "Dsp + Mid-Sem Exam"
+    print("   ✅ PASSED")
+
+def test_failed_extractions_are_not_cached():
+    entry, ttl = page_entry({"classification": ["EVAL"], "eval_data": []})
+    assert entry is None, "A relevant page with no output is retried next time"
+
+    _, skip_ttl = page_entry({"classification": ["SKIP"]})
+    _, data_ttl = page_entry({"classification": ["REFERENCES"], "reference_data": [{"title": "Book"}]})
+    assert 0 < skip_ttl < data_ttl
+
+def test_fingerprint_is_content_based():
+    with tempfile.TemporaryDirectory() as tmp:
+        a, b = os.path.join(tmp, "a.pdf"), os.path.join(tmp, "b.pdf")
+        make_pdf(a, ["Same page", "Page A"])
+        make_pdf(b, ["Same page", "Page B"])
+        doc_a, pages_a = open_pages(a, lazy=True)
+        doc_b, pages_b = open_pages(b, lazy=True)
+        try:
+            assert pages_a[0].fingerprint() == pages_b[0].fingerprint()
+            assert pages_a[1].fingerprint() != pages_b[1].fingerprint()
+            assert doc_a.renders == 0 and doc_b.renders == 0, "Fingerprinting must not rasterize pages"
+        finally:
+            doc_a.close()
+            doc_b.close()
+
+if __name__ == "__main__":
+    test_revised_handout_only_reprocesses_changed_pages()
+    test_failed_extractions_are_not_cached()
+    test_fingerprint_is_content_based()
@@ -0,0 +1,89 @@
+import os
+import sys
+import time
+import asyncio
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from src.render import LazyPage
+
+# Page 1 is the slowest, so completion order differs from page order
+PAGE_DELAYS = {1: 0.30, 2: 0.05, 3: 0.15, 4: 0.01}
+
+class FakeGraph:
+    def __init__(self):
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def ainvoke(self, state):
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        page_num = int(state["raw_text"])
+        await asyncio.sleep(PAGE_DELAYS[page_num])
+        self.in_flight -= 1
+        if page_num == 3:
+            raise RuntimeError("vision provider exploded")
+        return {
+            "final_schedule": [{"Event_Name": f"Quiz {page_num}"}],
+            "syllabus_data": [],
+            "reference_data": [{"title": f"Book {page_num}"}],
+        }
+
+def make_pages():
+    return [LazyPage(n, str(n)) for n in PAGE_DELAYS]
+
+def test_pages_finish_out_of_order_but_assemble_in_order():
+    print("🚀 Testing concurrent page pipeline ordering...\n")
+    fake = FakeGraph()
+
+    async def collect():
+        items = []
+        async for item in main.run_pages_concurrently(make_pages(), "Test Course", max_in_flight=4):
+            items.append(item)
+        return items
+
+    with patch.object(main, "app", fake):
+        start = time.time()
+        items = asyncio.run(collect())
+        elapsed = time.time() - start
+
+    done = [item for item in items if item[0] == "done"]
+    done_order = [item[1] for item in done]
+    print(f"   Completion order: {done_order} in {elapsed:.2f}s")
+
+    assert sorted(done_order) == [1, 2, 3, 4], "Every page must report exactly once"
+    assert done_order != [1, 2, 3, 4], "Pages should finish in completion order, not page order"
+    assert elapsed < sum(PAGE_DELAYS.values()), "Pages did not overlap"
+
+    failed = [item for item in done if item[3] is not None]
+    assert [item[1] for item in failed] == [3], "Page 3 error should be surfaced, not raised"
+
+    page_results = {
+        item[1]: (item[2]["final_schedule"], item[2]["syllabus_data"], item[2]["reference_data"])
+        for item in done if item[3] is None
+    }
+    events, _, refs = main.assemble_in_page_order(page_results)
+    assert [e["Event_Name"] for e in events] == ["Quiz 1", "Quiz 2", "Quiz 4"]
+    assert [r["title"] for r in refs] == ["Book 1", "Book 2", "Book 4"]
+    print("   ✅ PASSED")
+
+def test_in_flight_limit_is_respected():
+    print("🚀 Testing MAX_CONCURRENT_PAGES limit...\n")
+    fake = FakeGraph()
+
+    async def drain():
+        async for _ in main.run_pages_concurrently(make_pages(), "Test Course", max_in_flight=2):
+            pass
+
+    with patch.object(main, "app", fake):
+        asyncio.run(drain())
+
+    print(f"   Peak pages in flight: {fake.peak_in_flight}")
+    assert fake.peak_in_flight == 2, "Expected exactly 2 pages in flight at peak"
+    print("   ✅ PASSED")
+
+if __name__ == "__main__":
+    test_pages_finish_out_of_order_but_assemble_in_order()
+    test_in_flight_limit_is_respected()
@@ -0,0 +1,70 @@
+import os
+import sys
+import asyncio
+from unittest.mock import patch
+
+from langchain_core.runnables import RunnableLambda
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.graph as graph
+from src.prerouter import preroute
+
+COVER_PAGE = """
+BIRLA INSTITUTE OF TECHNOLOGY AND SCIENCE, Pilani
+Instruction Division, First Semester 2025-2026, Course Handout (Part II)
+Instructor-in-charge: Sarang Dhongdi. Chamber consultation hours: to be announced in class.
+"""
+EVAL_PAGE = """
+Evaluation Scheme:
+Mid-Semester Test | 90 min | 30% | 11/10/2025 4-5:30 PM | Closed Book
+Comprehensive Exam | 3 hrs | 40% | 16/12/2025 FN | Open Book
+"""
+BOOKS_PAGE = """
+Text Books:
+T1. M. Morris Mano, "Digital Design", 5th Edition, Pearson.
+Reference Books:
+R1. John F. Wakerly, "Digital Design: Principles and Practices", Pearson.
+"""
+POLICY_PAGE = """
+Notices: All notices concerning the course will be displayed on the CMS.
+All students are expected to appear for every evaluation component; absence without
+prior consent may be grounds for awarding NC.
+"""
+
+def test_obvious_pages_are_decided_locally():
+    print("🚀 Testing local pre-router...\n")
+    assert preroute(COVER_PAGE) == (["SKIP"], 0.95)
+    assert preroute(EVAL_PAGE)[0] == ["EVAL"], "'Closed Book' is an exam format, not a reading list"
+    assert preroute(BOOKS_PAGE)[0] == ["REFERENCES"]
+    assert preroute(EVAL_PAGE + BOOKS_PAGE)[0] == ["EVAL", "REFERENCES"]
+    print("   ✅ PASSED")
+
+def test_ambiguous_pages_go_to_the_llm():
+    # Mentions evaluation components but has no schedule: exactly the case the LLM prompt warns about
+    assert preroute(POLICY_PAGE)[1] < 0.9
+    # Scanned pages have no usable text layer
+    assert preroute("   ")[1] == 0.0
+
+def test_router_node_skips_llm_only_when_confident():
+    calls = []
+
+    def fake_llm(prompt_value):
+        calls.append(prompt_value)
+        return '{"categories": ["SKIP"]}'
+
+    with patch.object(graph, "llm", RunnableLambda(fake_llm)):
+        local = asyncio.run(graph.router_node({"raw_text": COVER_PAGE}))
+        assert local == {"classification": ["SKIP"]} and not calls
+
+        asyncio.run(graph.router_node({"raw_text": POLICY_PAGE}))
+        assert len(calls) == 1, "Uncertain pages still reach the LLM router"
+
+        with patch.object(graph, "PREROUTER", False):
+            asyncio.run(graph.router_node({"raw_text": COVER_PAGE}))
+        assert len(calls) == 2
+
+if __name__ == "__main__":
+    test_obvious_pages_are_decided_locally()
+    test_ambiguous_pages_go_to_the_llm()
+    test_router_node_skips_llm_only_when_confident()
@@ -0,0 +1,29 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.graph as graph
+from src.prompts import PROMPTS, PromptSpec, ROUTER_PROMPT, registry_version
+from src.schema import RouteDecision
+
+def test_registry_is_compiled_once():
+    print("🚀 Testing prompt registry...\n")
+    for name, spec in PROMPTS.items():
+        assert "{format_instructions}" not in spec.system, f"{name}: format instructions not baked in"
+        assert spec.chat_template.input_variables == ["text"], f"{name}: schema braces leaked into the template"
+        assert len(spec.version) == 16
+    assert graph.CHAINS["router"].first is PROMPTS["router"].chat_template
+    print("   ✅ PASSED")
+
+def test_versions_follow_prompt_content():
+    same = PromptSpec("router", RouteDecision, ROUTER_PROMPT)
+    edited = PromptSpec("router", RouteDecision, ROUTER_PROMPT + "\n    Be concise.")
+    assert same.version == PROMPTS["router"].version
+    assert edited.version != PROMPTS["router"].version
+    assert len({spec.version for spec in PROMPTS.values()}) == len(PROMPTS)
+    assert registry_version(["router"]) != registry_version()
+
+if __name__ == "__main__":
+    test_registry_is_compiled_once()
+    test_versions_follow_prompt_content()
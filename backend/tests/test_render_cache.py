@@ -0,0 +1,110 @@
+import os
+import sys
+import time
+import hashlib
+import tempfile
+from unittest.mock import patch
+
+import fitz # PyMuPDF
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.render as render
+from src.render import OpenDocument, open_pages
+from src.render_cache import RenderCache
+
+def make_pdf_bytes(pages=2):
+    doc = fitz.open()
+    for n in range(pages):
+        doc.new_page().insert_text((72, 100), f"Handout page {n + 1}", fontsize=14)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+def test_rerun_reads_images_from_disk():
+    print("🚀 Testing on-disk render cache...\n")
+    pdf = make_pdf_bytes()
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = RenderCache(tmp, max_bytes=10 * 1024 * 1024)
+
+        first = OpenDocument(pdf, cache=cache)
+        cold = first.render(0, 81)
+        no_region = first.render_eval_region(1, 81)
+        first.close()
+
+        second = OpenDocument(pdf, cache=cache)
+        warm = second.render(0, 81)
+        assert second.render_eval_region(1, 81) is None and no_region is None
+        other_dpi = second.render(0, 100)
+        second.close()
+
+    print(f"   Renders: {first.renders} cold, {second.renders} warm; hits={cache.hits} misses={cache.misses}")
+    assert warm == cold, "Cached image must be byte-identical"
+    assert second.cache_hits == 2, "Page image and the 'no eval region' result both come from disk"
+    assert second.renders == 1, "Only the new DPI should be rasterized"
+    assert other_dpi[0] != cold[0]
+    print("   ✅ PASSED")
+
+def test_evicts_least_recently_used():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = RenderCache(tmp, max_bytes=1000)
+        keys = [cache.key("doc", i, 81, "png") for i in range(3)]
+
+        cache.put(keys[0], b"a" * 400)
+        cache.put(keys[1], b"b" * 400)
+        # Make the ordering explicit instead of relying on filesystem timestamp resolution
+        now = time.time()
+        os.utime(cache._path(keys[0]), (now - 20, now - 20))
+        os.utime(cache._path(keys[1]), (now - 10, now - 10))
+
+        assert cache.get(keys[0]) == b"a" * 400 # bumps key 0 to most recently used
+        cache.put(keys[2], b"c" * 400)
+
+        assert cache.get(keys[1]) is None, "Least recently used entry should be evicted"
+        assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+
+def test_known_hash_is_not_recomputed():
+    pdf = make_pdf_bytes(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = RenderCache(tmp, max_bytes=10 * 1024 * 1024)
+        cold = OpenDocument(pdf, cache=cache)
+        image = cold.render(0, 81)
+        cold.close()
+
+        # An upload's hash (computed while it streamed in) keys the same cache entries
+        with patch.object(render, "hash_source", side_effect=AssertionError("source hashed again")):
+            warm = OpenDocument(pdf, cache=cache, source_hash=hashlib.sha256(pdf).hexdigest())
+            assert warm.render(0, 81) == image and warm.cache_hits == 1
+            warm.close()
+
+def test_overwrites_are_counted_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = RenderCache(tmp, max_bytes=1000)
+        key = cache.key("doc", 0, 81, "png")
+        cache.put(cache.key("doc", 1, 81, "png"), b"a" * 100) # First put sizes the directory
+        for _ in range(5):
+            cache.put(key, b"b" * 300) # Same page stored again, e.g. by two racing renders
+        assert cache._size == 400
+        assert cache.get(key) is not None, "Overwrites must not trigger eviction"
+
+def test_eager_mode_uses_the_cache():
+    pdf = make_pdf_bytes()
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = RenderCache(tmp, max_bytes=10 * 1024 * 1024)
+        with patch.object(render, "get_render_cache", lambda: cache):
+            _, cold = open_pages(pdf, 81, lazy=False)
+            with patch.object(render, "render_pages", side_effect=AssertionError("cached pages rasterized again")):
+                _, warm = open_pages(pdf, 81, lazy=False)
+            lazy_document, lazy_pages = open_pages(pdf, 81, lazy=True)
+            lazy_image = lazy_document.render(0, 81)
+            lazy_document.close()
+
+    assert [(p.page_num, p.text, p.image().data) for p in warm] == [(p.page_num, p.text, p.image().data) for p in cold]
+    assert lazy_image[0] == cold[0].image().data and lazy_document.renders == 0, "Both paths share cache entries"
+
+if __name__ == "__main__":
+    test_rerun_reads_images_from_disk()
+    test_evicts_least_recently_used()
+    test_known_hash_is_not_recomputed()
+    test_overwrites_are_counted_once()
+    test_eager_mode_uses_the_cache()
@@ -0,0 +1,59 @@
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz # PyMuPDF
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.render import render_pages, render_pages_in_process, split_page_ranges
+
+def make_pdf(path, pages=10):
+    doc = fitz.open()
+    for n in range(1, pages + 1):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Page {n}: Evaluation Scheme", fontsize=14)
+        page.draw_rect(fitz.Rect(72, 100, 72 + 30 * n, 140), color=(0, 0, 1), fill=(0.8, 0.8, 1))
+    doc.save(path)
+    doc.close()
+
+def test_split_page_ranges():
+    assert split_page_ranges(10, 3) == [(0, 4), (4, 7), (7, 10)]
+    assert split_page_ranges(2, 8) == [(0, 1), (1, 2)]
+    assert split_page_ranges(5, 1) == [(0, 5)]
+
+def test_pool_matches_single_process_render():
+    print("🚀 Testing process-pool renderer against in-process renderer...\n")
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "handout.pdf")
+        make_pdf(pdf_path, pages=10)
+
+        expected = render_pages_in_process(pdf_path, dpi=81)
+        with ProcessPoolExecutor(max_workers=3) as pool:
+            pooled = render_pages(pdf_path, dpi=81, workers=3, pool=pool)
+
+    assert [p[0] for p in pooled] == list(range(1, 11)), "Pages must come back in page order"
+    assert [(n, text, img.data, img.mime) for n, text, img in pooled] == \
+        [(n, text, img.data, img.mime) for n, text, img in expected], "Pool output differs from in-process output"
+    assert pooled[0][2].data.startswith(b"\x89PNG"), "Expected PNG payloads"
+    assert pooled[0][2].mime == "image/png"
+    print("   ✅ PASSED")
+
+def test_pool_renders_in_memory_uploads():
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "handout.pdf")
+        make_pdf(pdf_path, pages=9)
+        with open(pdf_path, "rb") as f:
+            data = f.read()
+
+        expected = render_pages_in_process(pdf_path, dpi=81)
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            pooled = render_pages(data, dpi=81, workers=2, pool=pool)
+
+    assert [img.data for _, _, img in pooled] == [img.data for _, _, img in expected]
+
+if __name__ == "__main__":
+    test_split_page_ranges()
+    test_pool_matches_single_process_render()
+    test_pool_renders_in_memory_uploads()
@@ -0,0 +1,89 @@
+import os
+import sys
+import json
+import time
+import asyncio
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessageChunk
+from langchain_core.runnables import RunnableLambda
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+import src.graph as graph
+from src.row_stream import PartialRows
+from src.render import LazyPage, PageImage
+
+MIDSEM = {"event_name": "Mid-Sem Exam", "date_raw": "11/10/2025", "time_raw": "4-5:30 PM", "format": "CB", "weightage": "30%"}
+COMPRE = {"event_name": "Comprehensive Exam", "date_raw": "05/12/2025", "time_raw": "FN", "format": "OB", "weightage": "40%"}
+PAGE_TEXT = "Course Title: Digital Design\nEvaluation scheme: mid-semester test and comprehensive examination, see table."
+CHUNK_DELAY = 0.01
+
+class StreamingVisionLLM:
+    """Generates its answer a few characters at a time, inside a ```json fence like the real model."""
+
+    def __init__(self, answer):
+        self.text = "```json\n" + json.dumps(answer, indent=2) + "\n```"
+        self.finished_at = None
+
+    async def astream(self, messages):
+        for start in range(0, len(self.text), 8):
+            await asyncio.sleep(CHUNK_DELAY)
+            yield AIMessageChunk(content=self.text[start:start + 8])
+        self.finished_at = time.perf_counter()
+
+def test_rows_complete_as_soon_as_their_brace_closes():
+    print("🚀 Testing streamed row parsing...\n")
+    tricky = dict(MIDSEM, event_name='Quiz "A" {open}', time_raw="4\\5 PM")
+    text = "Here you go:\n```json\n" + json.dumps({"evaluations": [tricky, COMPRE], "references": [{"title": "T", "author": "A"}]}) + "\n```"
+    scanner = PartialRows()
+    completed = []
+    for index, char in enumerate(text):
+        for key, row in scanner.feed(char):
+            completed.append((key, row, index))
+
+    assert [(key, row) for key, row, _ in completed] == [("evaluations", tricky), ("evaluations", COMPRE), ("references", {"title": "T", "author": "A"})]
+    first_close = text.index("}", text.index("{open}") + 6)
+    assert completed[0][2] == first_close, "A row is emitted on its own closing brace, not at the end of the answer"
+    assert scanner.finished
+    print("   ✅ PASSED")
+
+def test_vision_extractor_streams_aggregated_rows():
+    rows = []
+    state = {"page_image_b64": PageImage(b"png").b64, "known_course_title": "Digital Design", "user_date_format": "DMY",
+             "on_row": lambda kind, data: rows.append((time.perf_counter(), kind, data))}
+    model = StreamingVisionLLM({"items": [MIDSEM, COMPRE]})
+    with patch.object(graph, "vision_llm", model):
+        result = asyncio.run(graph.vision_eval_extractor_node(state))
+
+    assert result["eval_data"] == [MIDSEM, COMPRE]
+    assert [(kind, data["Subject"]) for _, kind, data in rows] == [
+        ("eval", "Digital Design + Mid-Sem Exam"), ("eval", "Digital Design + Comprehensive Exam")]
+    assert rows[0][2]["Start_DateTime"] == "2025-10-11T16:00:00"
+    assert rows[0][0] < rows[1][0] < model.finished_at, "Rows arrive while the completion is still being generated"
+
+def test_stream_pages_emits_row_events_before_page_done():
+    async def route(prompt_value):
+        return json.dumps({"categories": ["EVAL"]})
+
+    async def collect(pages):
+        return [json.loads(chunk) async for chunk in main.stream_pages("handout.pdf", pages)]
+
+    pages = [LazyPage(1, PAGE_TEXT, image=PageImage(b"png"))]
+    with patch.object(graph, "PREROUTER", False), patch.object(graph, "EVAL_TEXT_EXTRACT", False), \
+            patch.object(graph, "llm", RunnableLambda(route)), \
+            patch.object(graph, "vision_llm", StreamingVisionLLM({"items": [MIDSEM, COMPRE]})):
+        events = asyncio.run(collect(pages))
+
+    types = [event["type"] for event in events]
+    row_events = [event for event in events if event["type"] == "row"]
+    assert [event["data"]["Event_Name"] for event in row_events] == ["Mid-Sem Exam", "Comprehensive Exam"]
+    assert all(event["page"] == 1 and event["kind"] == "eval" for event in row_events)
+    assert types.index("row") < types.index("page_done") < types.index("done")
+    assert [item["Subject"] for item in events[-1]["data"]["evaluation_scheme"]] == [event["data"]["Subject"] for event in row_events]
+
+if __name__ == "__main__":
+    test_rows_complete_as_soon_as_their_brace_closes()
+    test_vision_extractor_streams_aggregated_rows()
+    test_stream_pages_emits_row_events_before_page_done()
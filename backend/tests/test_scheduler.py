@@ -0,0 +1,149 @@
+import os
+import sys
+import time
+import asyncio
+from unittest.mock import patch
+
+import httpx
+import openai
+from langchain_core.messages import AIMessage, HumanMessage
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.scheduler as scheduler_module
+from src.scheduler import LLMScheduler, parse_reset, estimate_tokens, PRIORITY_TITLE, PRIORITY_ROUTER, PRIORITY_EXTRACTION
+
+def rate_limit_error(retry_after="0.01"):
+    request = httpx.Request("POST", "https://provider.test/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": retry_after}, request=request)
+    return openai.RateLimitError("Too Many Requests", response=response, body=None)
+
+def test_queued_calls_run_in_priority_order():
+    print("🚀 Testing LLM scheduler...\n")
+    scheduler = LLMScheduler("test", max_concurrency=1, min_concurrency=1)
+    order = []
+
+    async def call(messages):
+        order.append(messages)
+        await asyncio.sleep(0.01)
+        return AIMessage(content="ok")
+
+    async def run():
+        # The first call occupies the only slot; the rest queue up in arrival order
+        first = asyncio.create_task(scheduler.run(call, "first", PRIORITY_EXTRACTION))
+        await asyncio.sleep(0)
+        queued = [
+            scheduler.run(call, "extraction", PRIORITY_EXTRACTION),
+            scheduler.run(call, "router", PRIORITY_ROUTER),
+            scheduler.run(call, "title", PRIORITY_TITLE),
+        ]
+        await asyncio.gather(first, *queued)
+
+    asyncio.run(run())
+    print(f"   Call order: {order}")
+    assert order == ["first", "title", "router", "extraction"]
+    print("   ✅ PASSED")
+
+def test_rate_limits_halve_concurrency_and_retry():
+    scheduler = LLMScheduler("test", max_concurrency=8, min_concurrency=1, max_retries=3)
+    scheduler.limit = 8.0
+    failures = {"left": 2}
+
+    async def call(messages):
+        if failures["left"]:
+            failures["left"] -= 1
+            raise rate_limit_error()
+        return AIMessage(content="ok")
+
+    response = asyncio.run(scheduler.run(call, "page"))
+    assert response.content == "ok"
+    assert scheduler.stats["rate_limited"] == 2 and scheduler.stats["retries"] == 2
+    assert scheduler.limit < 3, "Two 429s halve the limit twice (plus one success step)"
+
+def test_gives_up_after_max_retries():
+    scheduler = LLMScheduler("test", max_retries=1)
+
+    async def call(messages):
+        raise rate_limit_error()
+
+    try:
+        asyncio.run(scheduler.run(call, "page"))
+        assert False, "The last RateLimitError is re-raised"
+    except openai.RateLimitError:
+        pass
+    assert scheduler.in_flight == 0
+
+def test_server_errors_back_off_before_retrying():
+    request = httpx.Request("POST", "https://provider.test/v1/chat/completions")
+    errors = [
+        openai.InternalServerError("Bad Gateway", response=httpx.Response(502, request=request), body=None),
+        openai.APIConnectionError(request=request),
+    ]
+    scheduler = LLMScheduler("test", max_concurrency=4, max_retries=3)
+    limit_before = scheduler.limit
+    attempts = []
+
+    async def call(messages):
+        attempts.append(time.perf_counter())
+        if len(attempts) <= len(errors):
+            raise errors[len(attempts) - 1]
+        return AIMessage(content="ok")
+
+    with patch.object(scheduler_module, "RETRY_BASE_DELAY", 0.1):
+        response = asyncio.run(scheduler.run(call, "page"))
+    gaps = [later - earlier for earlier, later in zip(attempts, attempts[1:])]
+    print(f"   Retry gaps after 5xx / connection errors: {[round(gap, 3) for gap in gaps]}")
+    assert response.content == "ok" and scheduler.stats["retries"] == 2
+    assert gaps[0] >= 0.05 and gaps[1] >= 0.1, "Each retry waits (jittered 0.5-1x of 0.1s, then 0.2s)"
+    assert scheduler.limit >= limit_before, "Only 429s and timeouts shrink the concurrency limit"
+
+def test_concurrency_grows_on_success_up_to_max():
+    scheduler = LLMScheduler("test", max_concurrency=6, min_concurrency=1)
+    start = scheduler.limit
+
+    async def call(messages):
+        await asyncio.sleep(0.001)
+        return AIMessage(content="ok")
+
+    async def run():
+        await asyncio.gather(*(scheduler.run(call, f"page {i}") for i in range(60)))
+
+    asyncio.run(run())
+    assert start < scheduler.limit <= 6
+    assert scheduler.stats["peak_in_flight"] <= 6
+
+def test_request_bucket_paces_calls():
+    # 600 RPM = 10 per second; the bucket starts full, so the excess waits for refills
+    scheduler = LLMScheduler("test", rpm=600)
+    scheduler.requests.tokens = 2
+
+    async def call(messages):
+        return AIMessage(content="ok")
+
+    async def run():
+        await asyncio.gather(*(scheduler.run(call, f"page {i}") for i in range(4)))
+
+    start = time.perf_counter()
+    asyncio.run(run())
+    elapsed = time.perf_counter() - start
+    assert 0.15 <= elapsed < 1.0, elapsed
+
+def test_provider_headers_cap_the_buckets():
+    scheduler = LLMScheduler("test", rpm=100, tpm=10000)
+    scheduler.observe_headers({"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "1.5s",
+                               "X-RateLimit-Remaining-Tokens": "500"})
+    assert scheduler.requests.tokens < 1 and scheduler.tokens.tokens <= 500
+    assert scheduler.paused_until - time.monotonic() > 1.0
+
+    assert parse_reset("6m0s") == 360 and parse_reset("250ms") == 0.25 and parse_reset("20") == 20
+    image_message = HumanMessage(content=[{"type": "text", "text": "x" * 400}, {"type": "image_url", "image_url": {"url": ""}}])
+    assert estimate_tokens([image_message]) == 100 + 1000
+
+if __name__ == "__main__":
+    test_queued_calls_run_in_priority_order()
+    test_rate_limits_halve_concurrency_and_retry()
+    test_gives_up_after_max_retries()
+    test_server_errors_back_off_before_retrying()
+    test_concurrency_grows_on_success_up_to_max()
+    test_request_bucket_paces_calls()
+    test_provider_headers_cap_the_buckets()
@@ -0,0 +1,91 @@
+import os
+import sys
+import json
+import asyncio
+from unittest.mock import patch
+
+import httpx
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import api
+from src.singleflight import SingleFlight
+
+def slow_stream(calls, chunks=4, delay=0.02):
+    async def stream():
+        calls.append(1)
+        for i in range(chunks):
+            await asyncio.sleep(delay)
+            yield f"chunk {i}\n"
+    return stream
+
+async def collect(flight):
+    return [chunk async for chunk in flight.subscribe()]
+
+def test_late_subscribers_get_replay_then_live_stream():
+    print("🚀 Testing single-flight streams...\n")
+    calls = []
+
+    async def run():
+        flights = SingleFlight()
+        first, started = flights.join("pdf", slow_stream(calls))
+        first_task = asyncio.create_task(collect(first))
+        await asyncio.sleep(0.05) # Two chunks already emitted
+
+        second, second_started = flights.join("pdf", slow_stream(calls))
+        assert started and not second_started and second is first
+        results = await asyncio.gather(first_task, collect(second))
+        return flights, results
+
+    flights, (first, second) = asyncio.run(run())
+    print(f"   Pipeline runs: {len(calls)}, streams: {first} / {second}")
+    assert len(calls) == 1
+    assert first == second == [f"chunk {i}\n" for i in range(4)]
+    assert flights.flights == {} and flights.joined == 1, "Finished flights are forgotten"
+    print("   ✅ PASSED")
+
+def test_pipeline_is_cancelled_when_everyone_disconnects():
+    calls = []
+
+    async def run():
+        flights = SingleFlight()
+        flight, _ = flights.join("pdf", slow_stream(calls, chunks=100))
+        stream = flight.subscribe()
+        await stream.__anext__()
+        await stream.aclose()
+        await asyncio.sleep(0.01)
+        return flight
+
+    flight = asyncio.run(run())
+    assert flight.task.cancelled() and len(flight.chunks) < 100
+
+def test_concurrent_identical_uploads_share_one_pipeline():
+    calls = []
+
+    async def fake_process_pdf_stream(source, date_format, filename=None, page_cache=None, source_hash=None):
+        calls.append(filename)
+        yield json.dumps({"type": "init", "total_pages": 2}) + "\n"
+        await asyncio.sleep(0.05)
+        yield json.dumps({"type": "done", "data": {"course_title": "Digital Design"}}) + "\n"
+
+    async def upload(client, fmt="DMY"):
+        files = {"file": ("handout.pdf", b"%PDF-1.4 same bytes", "application/pdf")}
+        response = await client.post("/generate", files=files, data={"date_format": fmt})
+        return [json.loads(line) for line in response.text.splitlines()]
+
+    async def run():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(upload(client), upload(client), upload(client, fmt="MDY"))
+
+    with patch.object(api, "process_pdf_stream", fake_process_pdf_stream), patch.object(api, "redis_client", None):
+        first, second, other_format = asyncio.run(run())
+
+    assert len(calls) == 2, "The MDY upload is a different result; the two DMY uploads share a run"
+    assert first == second and first[-1]["type"] == "done"
+    assert other_format[-1]["type"] == "done"
+
+if __name__ == "__main__":
+    test_late_subscribers_get_replay_then_live_stream()
+    test_pipeline_is_cancelled_when_everyone_disconnects()
+    test_concurrent_identical_uploads_share_one_pipeline()
@@ -0,0 +1,113 @@
+import os
+import sys
+import json
+import time
+import asyncio
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.graph as graph
+from src.prerouter import likely_eval
+from src.render import LazyPage, PageImage
+
+EVAL_ITEM = {"event_name": "Mid-Sem Exam", "date_raw": "11/10/2025", "time_raw": "4-5:30 PM", "format": "CB", "weightage": "30%"}
+# Exam terms and a table's worth of dates, but no weightage: the pre-router defers to the LLM
+EVAL_PAGE = "Quiz 1 on 02/09/2025, Quiz 2 on 07/10/2025, Mid-semester test on 11/10/2025. Details in class."
+COVER_PAGE = "Instruction Division, First Semester 2025-2026. Instructor-in-charge: Sarang Dhongdi. Chamber consultation hours."
+LATENCY = 0.2
+
+class FakeVisionLLM:
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        await asyncio.sleep(LATENCY)
+        return AIMessage(content=json.dumps({"items": [EVAL_ITEM]}))
+
+def fake_router(categories):
+    async def route(prompt_value):
+        await asyncio.sleep(LATENCY)
+        return json.dumps({"categories": categories})
+    return RunnableLambda(route)
+
+async def run_page(text):
+    state = {"raw_text": text, "page": LazyPage(1, text, image=PageImage(b"png")), "classification": []}
+    routed = await graph.router_node(state)
+    state.update(routed)
+    if graph.route_decision(state) == "end":
+        return state, {}
+    return state, await graph.vision_orchestrator_node(state)
+
+def timed_page(text, categories, speculative):
+    fake = FakeVisionLLM()
+    with patch.object(graph, "SPECULATIVE_EVAL", speculative), patch.object(graph, "PREROUTER", False), \
+            patch.object(graph, "llm", fake_router(categories)), patch.object(graph, "vision_llm", fake):
+        start = time.perf_counter()
+        state, result = asyncio.run(run_page(text))
+        return time.perf_counter() - start, result, fake.calls
+
+def test_speculation_overlaps_router_and_extraction():
+    print("🚀 Testing speculative EVAL extraction...\n")
+    assert likely_eval(EVAL_PAGE) and not likely_eval(COVER_PAGE)
+
+    serial, serial_result, _ = timed_page(EVAL_PAGE, ["EVAL"], speculative=False)
+    stats_before = dict(graph.SPECULATION_STATS)
+    overlapped, result, calls = timed_page(EVAL_PAGE, ["EVAL"], speculative=True)
+
+    print(f"   Router + extraction: {serial:.2f}s serial, {overlapped:.2f}s speculative")
+    assert result["eval_data"] == serial_result["eval_data"] == [EVAL_ITEM]
+    assert calls == 1
+    assert overlapped < serial - LATENCY / 2
+    assert graph.SPECULATION_STATS["kept"] == stats_before["kept"] + 1
+    print("   ✅ PASSED")
+
+def test_speculation_is_discarded_when_router_says_skip():
+    stats_before = dict(graph.SPECULATION_STATS)
+    _, result, _ = timed_page(EVAL_PAGE, ["SKIP"], speculative=True)
+    assert result == {}
+    assert graph.SPECULATION_STATS["discarded"] == stats_before["discarded"] + 1
+    assert graph.SPECULATION_STATS["wasted_calls"] == stats_before["wasted_calls"] + 1
+
+def test_cancelled_page_cancels_its_speculation():
+    speculations, Speculation = [], graph.Speculation
+
+    def tracked(state):
+        speculations.append(Speculation(state))
+        return speculations[-1]
+
+    async def cancel_page(node):
+        state = {"raw_text": EVAL_PAGE, "page": LazyPage(1, EVAL_PAGE, image=PageImage(b"png")), "classification": []}
+        if node == "orchestrator":
+            state.update(await graph.router_node(state))
+            page = asyncio.create_task(graph.vision_orchestrator_node(state))
+        else:
+            page = asyncio.create_task(graph.router_node(state))
+        await asyncio.sleep(LATENCY / 4)
+        page.cancel()
+        await asyncio.gather(page, return_exceptions=True)
+        await asyncio.sleep(0)
+        return speculations[-1].task.cancelled()
+
+    slow_vision = FakeVisionLLM()
+    slow_vision.ainvoke = lambda messages: asyncio.sleep(LATENCY * 5)
+    with patch.object(graph, "SPECULATIVE_EVAL", True), patch.object(graph, "PREROUTER", False), \
+            patch.object(graph, "llm", fake_router(["EVAL"])), patch.object(graph, "vision_llm", slow_vision), \
+            patch.object(graph, "Speculation", tracked):
+        for node in ("router", "orchestrator"):
+            assert asyncio.run(cancel_page(node)), f"speculation left running after cancelling the {node}"
+
+def test_unlikely_pages_are_not_speculated():
+    stats_before = dict(graph.SPECULATION_STATS)
+    _, _, calls = timed_page(COVER_PAGE, ["SKIP"], speculative=True)
+    assert calls == 0 and graph.SPECULATION_STATS == stats_before
+
+if __name__ == "__main__":
+    test_speculation_overlaps_router_and_extraction()
+    test_speculation_is_discarded_when_router_says_skip()
+    test_cancelled_page_cancels_its_speculation()
+    test_unlikely_pages_are_not_speculated()
@@ -141,6 +141,9 @@ export default function Home() {
                 updateGlobalProgress();
               } else if (data.type === "progress") {
                 setFileStatuses(prev => ({ ...prev, [file.name]: data.message }));
+              } else if (data.type === "row" && data.kind === "eval") {
+                // Streamed before its page is done; the final "done" payload replaces it
+                setFileStatuses(prev => ({ ...prev, [file.name]: `Found ${data.data.Event_Name} (${data.data.Start_DateTime.slice(0, 10)})` }));
               } else if (data.type === "page_done") {
                 progressTracker[index].completedPages++;
                 totalEvents += data.events_found || 0;